@@ -1,4 +1,4 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from models import test_connection
 from routes.menu_routes import menu_bp
@@ -6,81 +6,130 @@ from routes.customer_routes import customer_bp
 from routes.order_routes import order_bp
 from routes.payment_routes import payment_bp
 from routes.report_routes import report_bp
+from routes.table_routes import table_bp
+from routes.system_routes import system_bp
+from routes.export_routes import export_bp
+from routes.batch_routes import batch_bp
+from utils.compression import init_compression
+from utils.load_shedding import init_load_shedding
+from utils.coalescing import init_coalescing
+from utils.cache_sync import init_cache_sync
+from utils.work_queue import work_queue
+import services.side_effects  # registers the outbox handlers
+import services.cache_refresh  # registers the cross-worker cache refreshers
+from config import Config
+from utils.warmup import warm_up
 
-app = Flask(__name__)
-
-# ==========================================
-# CORS CONFIGURATION - FIXED
-# ==========================================
-CORS(app, 
-     origins=["http://localhost:5173", "http://localhost:3000", "http://127.0.0.1:5173"],
-     methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
-     supports_credentials=True,
-     expose_headers=["Content-Type", "Authorization"],
-     max_age=3600
-)
-
-# Disable trailing slash redirects (THIS IS THE KEY FIX!)
-app.url_map.strict_slashes = False
-
-# Register blueprints
-app.register_blueprint(menu_bp)
-app.register_blueprint(customer_bp)
-app.register_blueprint(order_bp)
-app.register_blueprint(payment_bp)
-app.register_blueprint(report_bp)
-
-@app.route('/')
-def home():
-    return jsonify({
-        'status': 'success',
-        'message': 'Restaurant Management System API',
-        'version': '1.0.0'
-    })
-
-@app.route('/api/test-connection')
-def test_db_connection():
-    success, result = test_connection()
-    if success:
+
+def create_app(config=None):
+    """
+    Build the Flask application
+
+    Args:
+        config: settings object for app.config (defaults to config.Config)
+
+    Module-level state (pools, caches, the outbox workers) is per process,
+    so under a pre-fork server each worker calls this after the fork; see
+    gunicorn.conf.py. Call warm_up(app) before serving traffic.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config or Config)
+
+    # ==========================================
+    # CORS CONFIGURATION - FIXED
+    # ==========================================
+    CORS(app, 
+         origins=["http://localhost:5173", "http://localhost:3000", "http://127.0.0.1:5173"],
+         methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+         allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+         supports_credentials=True,
+         expose_headers=["Content-Type", "Authorization"],
+         max_age=3600
+    )
+
+    # Disable trailing slash redirects (THIS IS THE KEY FIX!)
+    app.url_map.strict_slashes = False
+
+    # Register blueprints
+    app.register_blueprint(menu_bp)
+    app.register_blueprint(customer_bp)
+    app.register_blueprint(order_bp)
+    app.register_blueprint(payment_bp)
+    app.register_blueprint(report_bp)
+    app.register_blueprint(table_bp)
+    app.register_blueprint(system_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(batch_bp)
+
+    # gzip/brotli for large JSON bodies (see utils/compression.py for settings)
+    init_compression(app)
+
+    # Per-class concurrency limits and statement timeouts (utils/load_shedding.py)
+    init_load_shedding(app)
+
+    # Identical concurrent GETs share one execution (utils/coalescing.py)
+    init_coalescing(app)
+
+    # Host-wide shared cache and NOTIFY-driven refreshes across workers (utils/cache_sync.py)
+    init_cache_sync(app)
+
+    # Post-commit side effects (customer stats, ...) drained from the outbox
+    work_queue.start()
+
+    @app.route('/')
+    def home():
         return jsonify({
             'status': 'success',
-            'message': 'Database connected successfully',
-            'version': result
+            'message': 'Restaurant Management System API',
+            'version': '1.0.0'
         })
-    else:
+
+    @app.route('/api/test-connection')
+    def test_db_connection():
+        success, result = test_connection()
+        if success:
+            return jsonify({
+                'status': 'success',
+                'message': 'Database connected successfully',
+                'version': result
+            })
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'Database connection failed',
+                'error': result
+            }), 500
+
+    @app.errorhandler(404)
+    def not_found(error):
         return jsonify({
             'status': 'error',
-            'message': 'Database connection failed',
-            'error': result
+            'message': 'Endpoint not found'
+        }), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({
+            'status': 'error',
+            'message': 'Internal server error',
+            'error': str(error)
         }), 500
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        'status': 'error',
-        'message': 'Endpoint not found'
-    }), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({
-        'status': 'error',
-        'message': 'Internal server error',
-        'error': str(error)
-    }), 500
-
-# Add explicit OPTIONS handler
-@app.before_request
-def handle_preflight():
-    from flask import request
-    if request.method == "OPTIONS":
-        response = jsonify({'status': 'ok'})
-        response.headers.add('Access-Control-Allow-Origin', request.headers.get('Origin', '*'))
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Requested-With')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,PATCH,DELETE,OPTIONS')
-        response.headers.add('Access-Control-Max-Age', '3600')
-        return response
+    # Add explicit OPTIONS handler
+    @app.before_request
+    def handle_preflight():
+        if request.method == "OPTIONS":
+            response = jsonify({'status': 'ok'})
+            response.headers.add('Access-Control-Allow-Origin', request.headers.get('Origin', '*'))
+            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,X-Requested-With')
+            response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,PATCH,DELETE,OPTIONS')
+            response.headers.add('Access-Control-Max-Age', '3600')
+            return response
+
+    return app
+
+
+app = create_app()
 
 if __name__ == '__main__':
     print("=" * 50)
@@ -103,8 +152,12 @@ if __name__ == '__main__':
     print("   • http://127.0.0.1:5000/api/orders")
     print("   • http://127.0.0.1:5000/api/customers")
     print("   • http://127.0.0.1:5000/api/payments")
+    print("   • http://127.0.0.1:5000/api/tables")
+    print("   • http://127.0.0.1:5000/api/exports")
     print("=" * 50)
     print("🌐 CORS enabled for: http://localhost:5173")
     print("=" * 50)
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    # The reloader would start (and warm) the whole app twice
+    warm_up(app)
+    app.run(debug=True, port=5000, host='0.0.0.0', use_reloader=getattr(Config, 'USE_RELOADER', False))
@@ -0,0 +1,102 @@
+"""
+In-memory analytics engine vs the equivalent SQL
+
+Runs the same slices through services.analytics and through GROUP BY
+queries against the configured database, checks that both agree, and
+prints the time per query:
+
+  15-minute buckets   orders and revenue per 15 minutes
+  weekday x hour      heatmap of orders
+  cuisine x type      item revenue and quantity
+
+Usage (from the backend folder, database from config.py):
+    python benchmarks/analytics_bench.py [--days 90] [--iterations 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import get_db_connection
+from services.analytics import analytics
+
+# (label, group_by, metrics, SQL returning the same totals, compared metric)
+CASES = [
+    ('15-minute buckets', ['bucket:15m'], ['orders', 'revenue'], """
+        SELECT date_trunc('hour', created_at)
+                   + floor(extract(minute FROM created_at) / 15) * INTERVAL '15 minutes' AS bucket,
+               COUNT(*) AS orders, SUM(total_amount) AS revenue
+        FROM Orders
+        WHERE order_date BETWEEN %s AND %s AND order_status <> 'cancelled'
+        GROUP BY 1
+    """, 'revenue'),
+    ('weekday x hour', ['weekday', 'hour'], ['orders'], """
+        SELECT extract(isodow FROM created_at) AS weekday, extract(hour FROM created_at) AS hour,
+               COUNT(*) AS orders
+        FROM Orders
+        WHERE order_date BETWEEN %s AND %s AND order_status <> 'cancelled'
+        GROUP BY 1, 2
+    """, 'orders'),
+    ('cuisine x type', ['cuisine', 'order_type'], ['revenue', 'quantity'], """
+        SELECT m.cuisine, o.order_type, SUM(oi.subtotal) AS revenue, SUM(oi.quantity) AS quantity
+        FROM OrderItems oi
+        JOIN Orders o ON o.order_id = oi.order_id AND o.order_date = oi.order_date
+        JOIN Menu m ON m.menu_id = oi.menu_id
+        WHERE oi.order_date BETWEEN %s AND %s AND o.order_status <> 'cancelled'
+        GROUP BY 1, 2
+    """, 'revenue'),
+]
+
+
+def timed(func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return result, (time.perf_counter() - start) / iterations * 1000
+
+
+def main(days, iterations):
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days)
+
+    start = time.perf_counter()
+    analytics.refresh()
+    print(f"Initial load: {analytics._orders.size} orders, {analytics._items.size} items "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    start = time.perf_counter()
+    analytics.refresh()
+    print(f"Incremental refresh with no changes: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print()
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    def run_sql(sql):
+        cur.execute(sql, (start_date, end_date))
+        return cur.fetchall()
+
+    print(f"{'query':<20}{'groups':>8}{'engine ms':>12}{'SQL ms':>10}{'speedup':>9}  totals")
+    for label, group_by, metrics, sql, check in CASES:
+        result, engine_ms = timed(lambda: analytics.query(group_by, metrics, start_date, end_date), iterations)
+        rows, sql_ms = timed(lambda: run_sql(sql), iterations)
+        engine_total = round(sum(row[check] for row in result['rows']), 2)
+        sql_total = round(float(sum(row[check] or 0 for row in rows)), 2)
+        agree = 'match' if engine_total == sql_total and len(result['rows']) == len(rows) else \
+            f"MISMATCH ({engine_total} vs {sql_total})"
+        print(f"{label:<20}{len(result['rows']):>8}{engine_ms:>12.2f}{sql_ms:>10.2f}"
+              f"{sql_ms / max(engine_ms, 1e-6):>8.1f}x  {agree}")
+
+    conn.rollback()
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+    main(args.days, args.iterations)
@@ -0,0 +1,80 @@
+"""
+CPU vs bytes trade-off of response compression on realistic listings
+
+Usage (from the backend folder):
+    python benchmarks/compression_bench.py [--rows 500] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.compression import brotli, compress_bytes
+
+STATUSES = ['pending', 'preparing', 'ready', 'completed', 'cancelled']
+NAMES = ['Aarav Shah', 'Diya Patel', 'Kabir Rao', 'Meera Iyer', 'Rohan Gupta', 'Walk-in Customer']
+
+
+def make_orders(rows):
+    """Rows shaped like GET /api/orders (o.* plus customer columns)"""
+    rng = random.Random(42)
+    start = datetime(2025, 1, 1, 12, 0, 0)
+    orders = []
+    for i in range(rows):
+        order_type = rng.choice(['dine-in', 'takeaway'])
+        subtotal = round(rng.uniform(150, 3000), 2)
+        created = start + timedelta(minutes=3 * i)
+        orders.append({
+            'order_id': i + 1,
+            'order_token': f"D{rng.randint(1, 25)}-{i % 40:02d}" if order_type == 'dine-in' else f"T-{i % 400:03d}",
+            'customer_id': rng.randint(1, 200),
+            'order_type': order_type,
+            'table_number': rng.randint(1, 25) if order_type == 'dine-in' else None,
+            'order_status': rng.choice(STATUSES),
+            'special_instructions': rng.choice([None, 'Less spicy', 'No onion, no garlic']),
+            'subtotal': f"{subtotal:.2f}",
+            'gst_amount': f"{subtotal * 0.05:.2f}",
+            'service_charge': f"{subtotal * 0.10:.2f}" if order_type == 'dine-in' else '0.00',
+            'total_amount': f"{subtotal * 1.15:.2f}",
+            'order_date': created.strftime('%a, %d %b %Y 00:00:00 GMT'),
+            'created_at': created.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+            'updated_at': created.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+            'change_seq': i + 1,
+            'customer_name': rng.choice(NAMES),
+            'customer_phone': f"98{rng.randint(10000000, 99999999)}",
+        })
+    return orders
+
+
+def run(rows, repeat):
+    body = json.dumps({'status': 'success', 'message': 'Success', 'data': make_orders(rows)}).encode()
+
+    settings = [('gzip', level) for level in (1, 4, 6, 9)]
+    if brotli is not None:
+        settings += [('br', quality) for quality in (1, 4, 6, 11)]
+    else:
+        print("(brotli not installed - only gzip is measured)")
+
+    print(f"Payload: {rows} orders, {len(body):,} bytes uncompressed")
+    print(f"{'coding':<8}{'level':>6}{'bytes':>12}{'ratio':>8}{'ms/op':>10}{'MB/s':>9}")
+    for encoding, level in settings:
+        compressed = b''
+        start = time.perf_counter()
+        for _ in range(repeat):
+            compressed = compress_bytes(body, encoding, gzip_level=level, brotli_quality=level)
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{encoding:<8}{level:>6}{len(compressed):>12,}{len(body) / len(compressed):>8.1f}"
+              f"{elapsed * 1000:>10.2f}{len(body) / elapsed / 1e6:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,164 @@
+"""
+Microbenchmarks for the pure-Python work on the order and billing paths
+
+  order_totals        GST/service-charge math done by create_order
+  next_order_token    token parsing and formatting in generate_order_token
+  success_response    row dicts (Decimal, datetime) to a JSON response
+  build_bill          bill assembly behind GET /api/payments/bill/<id>
+  render_text         thermal-printer receipt for the same bill
+
+Every case runs on fixed synthetic fixtures (seeded, no database) and is
+timed with timeit: each repeat is auto-ranged to at least 0.2 s and the
+fastest repeat is reported, which is the most stable figure between runs.
+
+Save a baseline once, then compare later runs against it; the comparison
+exits with status 1 if any case is more than --max-regression percent
+slower than its baseline, so it can gate a CI job. Baselines are only
+comparable on the same machine and Python version.
+
+Usage (from the backend folder):
+    python benchmarks/hotpath_bench.py [--repeat 7] [--save-baseline bench.json]
+    python benchmarks/hotpath_bench.py --compare bench.json [--max-regression 10]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from utils.helpers import success_response
+from services.billing import order_totals, build_bill, render_text
+from routes.order_routes import token_prefix, next_order_token
+
+
+def order_rows(rng, count):
+    """Rows shaped like GET /api/orders results from RealDictCursor"""
+    base = datetime(2026, 1, 15, 19, 0)
+    rows = []
+    for order_id in range(1, count + 1):
+        dine_in = rng.random() < 0.6
+        subtotal = Decimal(rng.randrange(150, 4000)).quantize(Decimal('0.01'))
+        totals = order_totals(float(subtotal), 'dine-in' if dine_in else 'takeaway')
+        created = base + timedelta(seconds=rng.randrange(0, 4 * 3600))
+        rows.append({
+            'order_id': order_id,
+            'order_token': f"D{order_id % 25 + 1}-{order_id % 7 + 1:02d}" if dine_in else f"T-{order_id:03d}",
+            'customer_id': rng.randrange(1, 500),
+            'order_type': 'dine-in' if dine_in else 'takeaway',
+            'table_number': order_id % 25 + 1 if dine_in else None,
+            'order_status': rng.choice(['pending', 'preparing', 'ready', 'completed']),
+            'special_instructions': rng.choice([None, 'Less spicy', 'No onion, no garlic']),
+            'subtotal': subtotal,
+            'gst_amount': Decimal(f"{totals['gst_amount']:.2f}"),
+            'service_charge': Decimal(f"{totals['service_charge']:.2f}"),
+            'total_amount': Decimal(f"{totals['total_amount']:.2f}"),
+            'order_date': date(2026, 1, 15),
+            'created_at': created,
+            'updated_at': created + timedelta(minutes=12),
+            'change_seq': order_id,
+            'customer_name': f"Guest {order_id}",
+            'customer_phone': f"98{order_id:08d}",
+        })
+    return rows
+
+
+def item_rows(rng, count):
+    """Rows shaped like the bill's OrderItems query"""
+    items = []
+    for _ in range(count):
+        price = Decimal(rng.choice([80, 150, 220, 320, 450, 550])).quantize(Decimal('0.01'))
+        quantity = rng.randint(1, 3)
+        items.append({
+            'quantity': quantity,
+            'unit_price': price,
+            'subtotal': price * quantity,
+            'customization': rng.choice([None, None, 'Extra cheese']),
+            'item_name': rng.choice(['Paneer Tikka', 'Butter Chicken', 'Masala Dosa', 'Mango Lassi']),
+            'category': rng.choice(['appetizer', 'main', 'beverage']),
+        })
+    return items
+
+
+def cases():
+    """name -> zero-argument callable, each doing one batch of work"""
+    rng = random.Random(42)
+    subtotals = [(rng.randrange(100, 500000) / 100, rng.choice(['dine-in', 'takeaway'])) for _ in range(1000)]
+    tokens = []
+    for _ in range(1000):
+        prefix = token_prefix(rng.choice(['takeaway', 'dine-in']), rng.randint(1, 25))
+        tokens.append((prefix, rng.choice([None, next_order_token(prefix, None), f"{prefix}-{rng.randint(1, 400):03d}"])))
+    rows = order_rows(rng, 200)
+    bill_order = rows[0]
+    bill_items = item_rows(rng, 8)
+    bill = build_bill(bill_order, bill_items)
+
+    app = Flask('hotpath_bench')
+    context = app.app_context()
+    context.push()
+
+    return {
+        'order_totals x1000': lambda: [order_totals(subtotal, kind) for subtotal, kind in subtotals],
+        'next_order_token x1000': lambda: [next_order_token(prefix, last) for prefix, last in tokens],
+        'success_response 200 rows': lambda: success_response(rows)[0].get_data(),
+        'build_bill 8 items': lambda: build_bill(bill_order, bill_items),
+        'render_text 8 items': lambda: render_text(bill),
+    }
+
+
+def measure(fn, repeat):
+    """Fastest per-call time in microseconds over `repeat` auto-ranged runs"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(number, int(number * 0.2 / max(timer.timeit(number), 1e-9)))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main(repeat, save_baseline, compare, max_regression):
+    results = {name: measure(fn, repeat) for name, fn in cases().items()}
+
+    baseline = None
+    if compare:
+        with open(compare) as f:
+            baseline = json.load(f)['results']
+
+    print(f"{'case':<28}{'us/call':>12}" + (f"{'baseline':>12}{'change':>10}" if baseline else ''))
+    regressions = []
+    for name, micros in results.items():
+        line = f"{name:<28}{micros:>12.2f}"
+        if baseline and name in baseline:
+            change = (micros / baseline[name] - 1) * 100
+            line += f"{baseline[name]:>12.2f}{change:>+9.1f}%"
+            if change > max_regression:
+                regressions.append(name)
+                line += '  REGRESSION'
+        print(line)
+
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2)
+        print(f"\nBaseline written to {save_baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) more than {max_regression}% slower than baseline")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--max-regression', type=float, default=10.0, help='percent')
+    args = parser.parse_args()
+    main(args.repeat, args.save_baseline, args.compare, args.max_regression)
@@ -0,0 +1,104 @@
+"""
+Kitchen ETA engine under hundreds of concurrent tickets
+
+Builds a synthetic menu and feeds services.kitchen a stream of orders
+while older ones start cooking and leave the queue, then reports the
+cost of each kind of update. For comparison it also times rebuilding
+every station from scratch after each new order, which is what a
+non-incremental engine would do.
+
+No database is needed; the queue is driven entirely in memory.
+
+Usage (from the backend folder):
+    python benchmarks/kitchen_bench.py [--orders 2000] [--open 300] [--items 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.kitchen import KitchenQueue
+
+CATEGORIES = ['appetizer', 'main', 'dessert', 'beverage']
+
+
+def synthetic_menu(size=60):
+    return [{
+        'menu_id': menu_id,
+        'item_name': f'Dish {menu_id}',
+        'category': CATEGORIES[menu_id % len(CATEGORIES)],
+        'preparation_time': random.choice([5, 10, 15, 20, 25, 30])
+    } for menu_id in range(1, size + 1)]
+
+
+def random_order(menu, items):
+    return [dict(random.choice(menu), quantity=random.randint(1, 3)) for _ in range(random.randint(1, items))]
+
+
+def run(orders, open_orders, items, incremental=True):
+    random.seed(7)
+    menu = synthetic_menu()
+    queue = KitchenQueue()
+    queue.loaded = True  # synthetic tickets only, skip the database
+    timings = {'add': [], 'start': [], 'remove': [], 'snapshot': []}
+    now = time.time()
+    open_ids = []
+
+    for order_id in range(1, orders + 1):
+        now += 20
+        order_items = random_order(menu, items)
+        start = time.perf_counter()
+        queue.add_order(order_id, f'T-{order_id:03d}', 'takeaway', order_items, now=now)
+        if not incremental:
+            for station in queue._stations.values():
+                station.replay(now)
+        timings['add'].append(time.perf_counter() - start)
+        open_ids.append(order_id)
+
+        if len(open_ids) > open_orders:
+            cooking = open_ids[len(open_ids) // 4]
+            start = time.perf_counter()
+            queue.start_order(cooking, now=now)
+            queue.eta(cooking, now=now)
+            timings['start'].append(time.perf_counter() - start)
+
+            done = open_ids.pop(0)
+            start = time.perf_counter()
+            queue.remove_order(done, now=now)
+            timings['remove'].append(time.perf_counter() - start)
+
+        if order_id % 50 == 0:
+            start = time.perf_counter()
+            queue.snapshot(now=now)
+            timings['snapshot'].append(time.perf_counter() - start)
+
+    return timings
+
+
+def summary(samples):
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples) * 1e6
+    p99 = samples[int(len(samples) * 0.99) - 1] * 1e6
+    return f"{mean:>10.1f}{p99:>10.1f}"
+
+
+def main(orders, open_orders, items):
+    print(f"{orders} orders, ~{open_orders} open at a time, up to {items} items each\n")
+    print(f"{'mode':<14}{'update':<10}{'mean us':>10}{'p99 us':>10}")
+    for mode, incremental in (('incremental', True), ('full replay', False)):
+        timings = run(orders, open_orders, items, incremental)
+        for update in ('add', 'start', 'remove', 'snapshot'):
+            if timings[update] and (incremental or update == 'add'):
+                print(f"{mode:<14}{update:<10}{summary(timings[update])}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--open', type=int, default=300)
+    parser.add_argument('--items', type=int, default=3)
+    args = parser.parse_args()
+    main(args.orders, args.open, args.items)
@@ -0,0 +1,276 @@
+"""
+Dinner-rush load test: a scripted service mix from many simulated clients
+
+Each simulated client plays one role in a closed loop (do its work, think,
+repeat) until the run ends:
+
+  pos      takes an order:         POST /api/orders
+  kitchen  polls the order board:  GET /api/orders/active
+  cashier  settles an open order:  GET /api/payments/bill/<id>, POST /api/payments
+  manager  loads a report:         GET /api/reports/...
+
+Clients are split between roles by --mix. Cashiers settle orders the POS
+clients created during the run. Requests go over HTTP to --url, or to an
+in-process app built with create_app() when --url is omitted.
+
+The report is JSON on stdout: overall throughput, order throughput, and
+per-endpoint count, error rate, status codes and p50/p95/p99 latency. A
+summary table goes to stderr. Store the JSON per release to compare runs.
+Errors are 5xx responses and failed connections; 503 load shedding is
+counted as an error and also reported separately.
+
+Usage (from the backend folder):
+    python benchmarks/load_test.py [--url http://localhost:5000] [--clients 40]
+        [--mix pos=4,kitchen=2,cashier=3,manager=1] [--duration 30]
+        [--think-scale 1.0] [--output report.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict, deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+REPORTS = [
+    '/api/reports/daily-sales',
+    '/api/reports/popular-items',
+    '/api/reports/revenue-by-cuisine',
+    '/api/reports/peak-hours',
+    '/api/reports/payment-methods',
+    '/api/reports/order-status',
+    '/api/reports/trending',
+]
+PAYMENT_METHODS = ['cash', 'card', 'upi']
+
+
+class HttpTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, None
+        except (urllib.error.URLError, OSError, ValueError):
+            return 0, None
+
+
+class AppTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_json(silent=True)
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+
+class Run:
+    """State shared by every simulated client"""
+
+    def __init__(self, menu_ids, recorder):
+        self.menu_ids = menu_ids
+        self.recorder = recorder
+        self.unpaid = deque()
+
+    def call(self, transport, method, path, endpoint, body=None):
+        start = time.perf_counter()
+        status, payload = transport.request(method, path, body)
+        self.recorder.record(endpoint, status, time.perf_counter() - start)
+        return status, payload
+
+
+def pos(run, transport):
+    phone = f"98{random.randint(0, 499):08d}"
+    items = [{'menu_id': menu_id, 'quantity': random.randint(1, 3)}
+             for menu_id in random.sample(run.menu_ids, random.randint(1, min(4, len(run.menu_ids))))]
+    status, payload = run.call(transport, 'POST', '/api/orders', 'POST /api/orders', {
+        'customer': {'name': f'Guest {phone[-3:]}', 'phone': phone},
+        'order_type': 'takeaway',
+        'items': items
+    })
+    if status == 201:
+        run.unpaid.append(payload['data']['order_id'])
+
+
+def kitchen(run, transport):
+    run.call(transport, 'GET', '/api/orders/active', 'GET /api/orders/active')
+
+
+def cashier(run, transport):
+    try:
+        order_id = run.unpaid.popleft()
+    except IndexError:
+        return
+    run.call(transport, 'GET', f'/api/payments/bill/{order_id}', 'GET /api/payments/bill/<id>')
+    run.call(transport, 'POST', '/api/payments/', 'POST /api/payments', {
+        'order_id': order_id,
+        'payment_method': random.choice(PAYMENT_METHODS)
+    })
+
+
+def manager(run, transport):
+    path = random.choice(REPORTS)
+    run.call(transport, 'GET', path, f'GET {path}')
+
+
+# role -> (one iteration, mean think time in seconds)
+ROLES = {
+    'pos': (pos, 0.5),
+    'kitchen': (kitchen, 2.0),
+    'cashier': (cashier, 1.0),
+    'manager': (manager, 5.0),
+}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        role, _, weight = part.partition('=')
+        if role not in ROLES:
+            raise argparse.ArgumentTypeError(f"unknown role {role!r}, expected one of {', '.join(ROLES)}")
+        mix[role] = float(weight or 1)
+    return mix
+
+
+def assign_roles(clients, mix):
+    """Split clients between roles in proportion to the mix, at least one each"""
+    total = sum(mix.values())
+    counts = {role: max(1, round(clients * weight / total)) for role, weight in mix.items() if weight > 0}
+    return [role for role, count in counts.items() for _ in range(count)]
+
+
+def client_loop(run, role, transport, deadline, think_scale):
+    work, think = ROLES[role]
+    time.sleep(random.uniform(0, think * think_scale))  # stagger the start
+    while time.time() < deadline:
+        work(run, transport)
+        time.sleep(think * think_scale * random.uniform(0.5, 1.5))
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(1, int(round(pct / 100 * len(sorted_samples))))
+    return sorted_samples[rank - 1]
+
+
+def report(recorder, elapsed, config):
+    endpoints = {}
+    total = errors = 0
+    for endpoint in sorted(recorder.latencies):
+        samples = sorted(recorder.latencies[endpoint])
+        statuses = recorder.statuses[endpoint]
+        failed = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+        total += len(samples)
+        errors += failed
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'errors': failed,
+            'error_rate': round(failed / len(samples), 4),
+            'shed': statuses.get(503, 0),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'p50_ms': round(percentile(samples, 50) * 1000, 2),
+            'p95_ms': round(percentile(samples, 95) * 1000, 2),
+            'p99_ms': round(percentile(samples, 99) * 1000, 2),
+            'max_ms': round(samples[-1] * 1000, 2),
+        }
+    created = recorder.statuses['POST /api/orders'].get(201, 0)
+    return {
+        'config': config,
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2),
+        'orders_created': created,
+        'orders_per_second': round(created / elapsed, 2),
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0,
+        'endpoints': endpoints,
+    }
+
+
+def print_summary(result):
+    out = sys.stderr
+    print(f"{result['requests']} requests in {result['elapsed_s']}s: {result['throughput_rps']} req/s, "
+          f"{result['orders_per_second']} orders/s, error rate {result['error_rate']:.2%}\n", file=out)
+    print(f"{'endpoint':<40}{'req':>7}{'err%':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}", file=out)
+    for endpoint, stats in result['endpoints'].items():
+        print(f"{endpoint:<40}{stats['requests']:>7}{stats['error_rate'] * 100:>7.1f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}", file=out)
+
+
+def main(args):
+    random.seed(args.seed)
+    if args.url:
+        make_transport = lambda: HttpTransport(args.url)  # noqa: E731
+    else:
+        from app import create_app
+        app = create_app()
+        make_transport = lambda: AppTransport(app)  # noqa: E731
+
+    status, payload = make_transport().request('GET', '/api/menu/?available=true&fields=menu_id')
+    if status != 200 or not payload['data']:
+        sys.exit(f"Could not load the menu (HTTP {status})")
+    run = Run([item['menu_id'] for item in payload['data']], Recorder())
+
+    roles = assign_roles(args.clients, args.mix)
+    deadline = time.time() + args.duration
+    threads = [
+        threading.Thread(target=client_loop, args=(run, role, make_transport(), deadline, args.think_scale), daemon=True)
+        for role in roles
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = report(run.recorder, elapsed, {
+        'target': args.url or 'in-process',
+        'clients': dict(Counter(roles)),
+        'duration_s': args.duration,
+        'think_scale': args.think_scale,
+        'seed': args.seed,
+    })
+    print_summary(result)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='base URL of a running server; default runs the app in-process')
+    parser.add_argument('--clients', type=int, default=40)
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('pos=4,kitchen=2,cashier=3,manager=1'))
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--think-scale', type=float, default=1.0,
+                        help='multiply every think time; below 1 pushes harder')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='also write the JSON report to this file')
+    main(parser.parse_args())
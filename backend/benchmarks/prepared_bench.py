@@ -0,0 +1,108 @@
+"""
+Planning time saved by prepared statements on the hot request paths
+
+Replays the statements of two workloads against the configured database,
+once with plain parameterised queries and once with EXECUTE:
+
+  order-creation  customer upsert by phone + menu price per item
+  kitchen-refresh active orders + items for each active order
+
+Usage (from the backend folder, database from config.py):
+    python benchmarks/prepared_bench.py [--iterations 500]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models import get_db_connection
+from utils.prepared import STATEMENTS, execute_prepared
+
+
+def order_creation(cur, run, phone, menu_ids):
+    run(cur, 'customer_upsert', ('Bench', phone, None))
+    cur.fetchone()
+    for menu_id in menu_ids:
+        run(cur, 'menu_price', (menu_id,))
+        cur.fetchone()
+
+
+def kitchen_refresh(cur, run, *_):
+    run(cur, 'active_orders', ())
+    for order in cur.fetchall():
+        run(cur, 'active_order_items', (order['order_id'], order['order_date']))
+        cur.fetchall()
+
+
+def plain(cur, name, params):
+    cur.execute(STATEMENTS[name], params)
+
+
+def planning_ms(cur, name, params, prepared):
+    """Planning time reported by EXPLAIN ANALYZE for one statement"""
+    if prepared:
+        placeholders = ', '.join(['%s'] * len(params))
+        sql = f"EXPLAIN (ANALYZE, FORMAT JSON) EXECUTE {name}" + (f" ({placeholders})" if params else '')
+    else:
+        sql = "EXPLAIN (ANALYZE, FORMAT JSON) " + STATEMENTS[name]
+    cur.execute(sql, params)
+    plan = cur.fetchone()['QUERY PLAN']
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Planning Time']
+
+
+def main(iterations):
+    conn = get_db_connection()
+    cur = conn.cursor()
+
+    cur.execute("SELECT phone FROM Customers LIMIT 1")
+    row = cur.fetchone()
+    phone = row['phone'] if row else '0000000000'
+    cur.execute("SELECT menu_id FROM Menu ORDER BY menu_id LIMIT 4")
+    menu_ids = [r['menu_id'] for r in cur.fetchall()]
+    conn.rollback()
+
+    workloads = [('order-creation', order_creation), ('kitchen-refresh', kitchen_refresh)]
+
+    print(f"{'workload':<18}{'mode':<10}{'ms/iter':>10}")
+    for label, workload in workloads:
+        for mode, run in (('plain', plain), ('prepared', execute_prepared)):
+            workload(cur, run, phone, menu_ids)  # warm up / PREPARE
+            conn.rollback()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                workload(cur, run, phone, menu_ids)
+                conn.rollback()
+            elapsed = (time.perf_counter() - start) / iterations
+            print(f"{label:<18}{mode:<10}{elapsed * 1000:>10.3f}")
+
+    print()
+    print(f"{'statement':<24}{'plan ms (plain)':>18}{'plan ms (EXECUTE)':>20}")
+    samples = {
+        'customer_upsert': ('Bench', phone, None),
+        'menu_price': (menu_ids[0] if menu_ids else 1,),
+        'active_orders': (),
+        'active_order_items': (1, date.today()),
+    }
+    for name, params in samples.items():
+        # Postgres switches to a cached generic plan after five executions
+        for _ in range(6):
+            execute_prepared(cur, name, params)
+        print(f"{name:<24}{planning_ms(cur, name, params, False):>18.3f}"
+              f"{planning_ms(cur, name, params, True):>20.3f}")
+        conn.rollback()
+
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+    main(args.iterations)
@@ -1,4 +1,6 @@
 -- Drop existing tables
+DROP SEQUENCE IF EXISTS order_change_seq CASCADE;
+DROP TABLE IF EXISTS SideEffectOutbox CASCADE;
 DROP TABLE IF EXISTS Payments CASCADE;
 DROP TABLE IF EXISTS OrderItems CASCADE;
 DROP TABLE IF EXISTS Orders CASCADE;
@@ -29,9 +31,11 @@ CREATE TABLE Menu (
 CREATE TABLE Customers (
     customer_id SERIAL PRIMARY KEY,
     name VARCHAR(100),
-    phone VARCHAR(15),
+    phone VARCHAR(15) UNIQUE,
     email VARCHAR(100),
     customer_type VARCHAR(20) CHECK (customer_type IN ('dine-in', 'takeaway')),
+    total_orders INTEGER DEFAULT 0,
+    total_spent DECIMAL(10, 2) DEFAULT 0.00,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -42,18 +46,39 @@ CREATE TABLE RestaurantTables (
     table_id SERIAL PRIMARY KEY,
     table_number INTEGER UNIQUE NOT NULL CHECK (table_number > 0),
     seating_capacity INTEGER NOT NULL DEFAULT 4 CHECK (seating_capacity > 0),
-    status VARCHAR(20) DEFAULT 'available' CHECK (status IN ('available', 'occupied', 'reserved', 'maintenance')),
+    status VARCHAR(20) DEFAULT 'available' CHECK (status IN ('available', 'seated', 'occupied', 'reserved', 'maintenance')),
     location VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ==============================================
+-- MONTHLY PARTITIONS
+-- ==============================================
+-- Orders, OrderItems and Payments are range-partitioned by month so that
+-- "today" queries only touch the current partition. Partitions are named
+-- <table>_YYYY_MM; maintenance.py pre-creates future months and archives
+-- old ones. Rows outside every month land in the <table>_default partition;
+-- maintenance.py moves them out when their month's partition is created.
+CREATE OR REPLACE FUNCTION ensure_month_partition(parent TEXT, month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    part TEXT := format('%s_%s', lower(parent), to_char(month_start, 'YYYY_MM'));
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+        part, lower(parent), month_start, (month_start + INTERVAL '1 month')::date
+    );
+    RETURN part;
+END;
+$$ LANGUAGE plpgsql;
+
 -- ==============================================
 -- ORDERS TABLE (FIXED - Added missing columns!)
 -- ==============================================
 CREATE TABLE Orders (
-    order_id SERIAL PRIMARY KEY,
-    order_token VARCHAR(20) UNIQUE NOT NULL,
+    order_id SERIAL,
+    order_token VARCHAR(20) NOT NULL,
     customer_id INTEGER REFERENCES Customers(customer_id) ON DELETE SET NULL,
     order_type VARCHAR(20) NOT NULL CHECK (order_type IN ('dine-in', 'takeaway')),
     table_number INTEGER REFERENCES RestaurantTables(table_number) ON DELETE SET NULL,
@@ -63,36 +88,92 @@ CREATE TABLE Orders (
     gst_amount DECIMAL(10, 2) DEFAULT 0.00 CHECK (gst_amount >= 0),
     service_charge DECIMAL(10, 2) DEFAULT 0.00 CHECK (service_charge >= 0),
     total_amount DECIMAL(10, 2) DEFAULT 0.00 CHECK (total_amount >= 0),
-    order_date DATE DEFAULT CURRENT_DATE,
+    order_date DATE NOT NULL DEFAULT CURRENT_DATE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Set when the order is paid or marked completed
+    completed_at TIMESTAMP,
+    change_seq BIGINT NOT NULL DEFAULT 0,
+    change_xid XID8,
+    -- Set by POS terminals for orders taken offline and synced later
+    client_uuid UUID,
+    PRIMARY KEY (order_id, order_date),
+    -- Tokens restart every day, so they are unique per order_date
+    UNIQUE (order_token, order_date),
+    -- order_date comes from the client's timestamp, so a replayed order
+    -- always lands on the same day and collides here
+    UNIQUE (client_uuid, order_date)
+) PARTITION BY RANGE (order_date);
 
 -- ==============================================
 -- ORDER ITEMS TABLE (FIXED - Added customization!)
 -- ==============================================
 CREATE TABLE OrderItems (
-    order_item_id SERIAL PRIMARY KEY,
-    order_id INTEGER NOT NULL REFERENCES Orders(order_id) ON DELETE CASCADE,
+    order_item_id SERIAL,
+    order_id INTEGER NOT NULL,
+    order_date DATE NOT NULL,
     menu_id INTEGER NOT NULL REFERENCES Menu(menu_id) ON DELETE RESTRICT,
     quantity INTEGER NOT NULL CHECK (quantity > 0),
     unit_price DECIMAL(10, 2) NOT NULL CHECK (unit_price >= 0),
     subtotal DECIMAL(10, 2) NOT NULL CHECK (subtotal >= 0),
     customization TEXT,
-    item_status VARCHAR(20) DEFAULT 'pending' CHECK (item_status IN ('pending', 'preparing', 'ready', 'served'))
-);
+    item_status VARCHAR(20) DEFAULT 'pending' CHECK (item_status IN ('pending', 'preparing', 'ready', 'served')),
+    PRIMARY KEY (order_item_id, order_date),
+    FOREIGN KEY (order_id, order_date) REFERENCES Orders(order_id, order_date) ON DELETE CASCADE
+) PARTITION BY RANGE (order_date);
 
 -- ==============================================
 -- PAYMENTS TABLE
 -- ==============================================
+-- Partitioned by payment_date, which can fall in a later month than the
+-- order it settles. A foreign key to Orders would pin old order partitions
+-- in place, so order_id/order_date are checked by the application instead.
 CREATE TABLE Payments (
-    payment_id SERIAL PRIMARY KEY,
-    order_id INTEGER NOT NULL REFERENCES Orders(order_id) ON DELETE RESTRICT,
+    payment_id SERIAL,
+    order_id INTEGER NOT NULL,
+    order_date DATE NOT NULL,
+    -- The order's totals at the time it was paid
+    subtotal DECIMAL(10, 2) DEFAULT 0.00 CHECK (subtotal >= 0),
+    gst_amount DECIMAL(10, 2) DEFAULT 0.00 CHECK (gst_amount >= 0),
+    service_charge DECIMAL(10, 2) DEFAULT 0.00 CHECK (service_charge >= 0),
+    total_amount DECIMAL(10, 2) DEFAULT 0.00 CHECK (total_amount >= 0),
     payment_method VARCHAR(20) NOT NULL CHECK (payment_method IN ('cash', 'card', 'upi')),
     amount_paid DECIMAL(10, 2) NOT NULL CHECK (amount_paid >= 0),
+    -- Cash handed over, and the change given back
+    amount_received DECIMAL(10, 2) CHECK (amount_received >= 0),
+    change_returned DECIMAL(10, 2) DEFAULT 0.00 CHECK (change_returned >= 0),
     payment_status VARCHAR(20) DEFAULT 'completed' CHECK (payment_status IN ('pending', 'completed', 'failed', 'refunded')),
-    payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    payment_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (payment_id, payment_date)
+) PARTITION BY RANGE (payment_date);
+
+CREATE TABLE orders_default PARTITION OF Orders DEFAULT;
+CREATE TABLE orderitems_default PARTITION OF OrderItems DEFAULT;
+CREATE TABLE payments_default PARTITION OF Payments DEFAULT;
+
+-- Current month plus the next two; run maintenance.py to keep ahead
+SELECT ensure_month_partition(parent, (date_trunc('month', CURRENT_DATE) + n * INTERVAL '1 month')::date)
+FROM unnest(ARRAY['orders', 'orderitems', 'payments']) AS parent,
+     generate_series(0, 2) AS n;
+
+-- ==============================================
+-- SIDE-EFFECT OUTBOX
+-- ==============================================
+-- Non-critical work (customer stats, receipts, report refreshes) is written
+-- here in the same transaction as the request and applied afterwards by the
+-- worker threads in utils/work_queue.py.
+CREATE TABLE SideEffectOutbox (
+    outbox_id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL,
+    dedupe_key VARCHAR(100) UNIQUE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    available_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP
 );
 
 -- ==============================================
@@ -105,10 +186,13 @@ CREATE INDEX idx_orders_status ON Orders(order_status);
 CREATE INDEX idx_orders_date ON Orders(order_date);
 CREATE INDEX idx_orders_customer ON Orders(customer_id);
 CREATE INDEX idx_orders_token ON Orders(order_token);
+CREATE INDEX idx_orders_change_seq ON Orders(change_seq);
+CREATE INDEX idx_orders_change_xid ON Orders(change_xid);
 CREATE INDEX idx_order_items_order ON OrderItems(order_id);
 CREATE INDEX idx_order_items_menu ON OrderItems(menu_id);
 CREATE INDEX idx_payments_order ON Payments(order_id);
 CREATE INDEX idx_tables_status ON RestaurantTables(status);
+CREATE INDEX idx_outbox_pending ON SideEffectOutbox(available_at) WHERE status = 'pending';
 
 -- ==============================================
 -- TRIGGERS FOR AUTO-UPDATE TIMESTAMPS
@@ -131,6 +215,28 @@ CREATE TRIGGER update_orders_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Every insert/update of an order (status change, cancellation, payment)
+-- takes a fresh value from order_change_seq, and records the writing
+-- transaction in change_xid. Sequence values are handed out before
+-- commit, so a slow transaction can commit below a cursor a reader has
+-- already passed; GET /api/orders/changes?since=<cursor> therefore pages
+-- by change_xid and only up to the oldest transaction still running.
+CREATE SEQUENCE order_change_seq;
+
+CREATE OR REPLACE FUNCTION bump_order_change_seq()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.change_seq = nextval('order_change_seq');
+    NEW.change_xid = pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bump_orders_change_seq
+    BEFORE INSERT OR UPDATE ON Orders
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_order_change_seq();
+
 CREATE TRIGGER update_tables_updated_at
     BEFORE UPDATE ON RestaurantTables
     FOR EACH ROW
@@ -0,0 +1,34 @@
+"""
+Production launcher settings for gunicorn
+
+Usage (from the backend folder):
+    gunicorn -c gunicorn.conf.py
+
+preload_app stays off: every worker imports app.py after the fork, so
+connection pools, outbox threads and in-memory caches are never shared
+across processes by accident. Workers on a host deliberately share only
+the memory-mapped cache segment (utils/shared_cache.py), and each keeps
+its in-memory copies current by LISTENing for the changes the others
+publish (utils/cache_sync.py). Each worker then runs warm_up() before it
+accepts its first request. Keep DB_POOL_MIN >= GUNICORN_THREADS so every thread finds
+a warm, prepared connection.
+"""
+import multiprocessing
+from config import Config
+
+wsgi_app = 'app:app'
+bind = getattr(Config, 'GUNICORN_BIND', '0.0.0.0:5000')
+workers = getattr(Config, 'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+worker_class = 'gthread'
+threads = getattr(Config, 'GUNICORN_THREADS', 4)
+preload_app = False
+timeout = getattr(Config, 'GUNICORN_TIMEOUT', 60)
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_worker_init(worker):
+    from utils.warmup import warm_up
+
+    state = warm_up(worker.wsgi)
+    worker.log.info("Worker %s warm in %ss (ready=%s)", state['pid'], state['seconds'], state['ready'])
@@ -0,0 +1,262 @@
+"""
+Partition maintenance for Orders, OrderItems and Payments
+
+Usage (from the backend folder):
+    python maintenance.py partitions [--ahead 3]
+        Create monthly partitions from the current month up to N months ahead,
+        moving rows that already sit in the default partitions into them.
+
+    python maintenance.py archive [--keep-months 12] [--archive-dir archive] [--keep-detached]
+        Dump partitions older than the retention window to <archive-dir>/<partition>.csv.gz,
+        then detach them (and drop them unless --keep-detached). Rows older than
+        the window that sit in the default partitions are dumped to
+        <archive-dir>/<table>_default_before_YYYY_MM.csv.gz and deleted.
+
+    python maintenance.py check-pruning
+        EXPLAIN the "today" queries and report how many partitions each one touches.
+
+    python maintenance.py purge-outbox [--days 7]
+        Delete side-effect outbox rows that were applied more than N days ago.
+
+Run `partitions` and `archive` daily from cron; both are idempotent.
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import date
+from models import get_db_connection
+from utils.prepared import STATEMENTS
+
+# Detach order matters: OrderItems references Orders
+PARENTS = ['payments', 'orderitems', 'orders']
+PARTITION_NAME = re.compile(r'^(orders|orderitems|payments)_(\d{4})_(\d{2})$')
+PARTITION_KEYS = {'payments': 'payment_date', 'orderitems': 'order_date', 'orders': 'order_date'}
+
+# (label, query, params, max partitions expected per parent table)
+PRUNING_CHECKS = [
+    ('active orders', STATEMENTS['active_orders'], (), 2),
+    ('active order items', STATEMENTS['active_order_items'], (1, date.today()), 1),
+    ('order status today', """
+        SELECT order_status, COUNT(*), SUM(total_amount)
+        FROM Orders WHERE order_date = CURRENT_DATE GROUP BY order_status
+    """, (), 1),
+    ('payment summary today', """
+        SELECT COUNT(*), SUM(amount_paid) FROM Payments
+        WHERE payment_date >= CURRENT_DATE AND payment_date < CURRENT_DATE + 1
+    """, (), 1),
+    ('takeaway token', """
+        SELECT max(split_part(order_token, '-', 2)::int) FROM Orders
+        WHERE order_token ~ '^T-[0-9]+$' AND order_date = CURRENT_DATE
+    """, (), 1),
+]
+
+
+def add_months(month_start, months):
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def list_partitions(cur):
+    """Monthly partitions as (parent, name, month_start), oldest first"""
+    cur.execute("""
+        SELECT c.relname AS partition
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = ANY(%s)
+    """, (PARENTS,))
+    partitions = []
+    for row in cur.fetchall():
+        match = PARTITION_NAME.match(row['partition'])
+        if match:
+            parent, year, month = match.groups()
+            partitions.append((parent, row['partition'], date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda p: (p[2], PARENTS.index(p[0])))
+
+
+def move_out_of_default(cur, month_start, missing):
+    """
+    Lift a month's rows out of the parent tables before its partitions are
+    created; Postgres refuses a new partition while the default partition
+    holds rows that belong in it. They go back in once the partitions exist.
+    """
+    # Deleting orders cascades to their items, so those move along too
+    moving = [p for p in PARENTS if p in missing or (p == 'orderitems' and 'orders' in missing)]
+    month_end = add_months(month_start, 1)
+    cur.execute(f"LOCK TABLE {', '.join(moving)} IN EXCLUSIVE MODE")
+
+    moved = {}
+    for parent in moving:
+        key = PARTITION_KEYS[parent]
+        cur.execute(f'CREATE TEMP TABLE "moving_{parent}" AS SELECT * FROM "{parent}" '
+                    f'WHERE {key} >= %s AND {key} < %s', (month_start, month_end))
+        cur.execute(f'DELETE FROM "{parent}" WHERE {key} >= %s AND {key} < %s', (month_start, month_end))
+        moved[parent] = cur.rowcount
+    return moved
+
+
+def create_partitions(ahead):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    this_month = date.today().replace(day=1)
+
+    for offset in range(ahead + 1):
+        month_start = add_months(this_month, offset)
+        missing = []
+        for parent in PARENTS:
+            cur.execute("SELECT to_regclass(%s) IS NULL AS missing", (f"{parent}_{month_start:%Y_%m}",))
+            if cur.fetchone()['missing']:
+                missing.append(parent)
+        moved = move_out_of_default(cur, month_start, missing) if missing else {}
+
+        # Orders first, so moved order items find their order again
+        for parent in reversed(PARENTS):
+            cur.execute("SELECT ensure_month_partition(%s, %s) AS partition", (parent, month_start))
+            partition = cur.fetchone()['partition']
+            if parent in moved:
+                cur.execute(f'INSERT INTO "{parent}" SELECT * FROM "moving_{parent}"')
+                cur.execute(f'DROP TABLE "moving_{parent}"')
+            print(f"✅ {partition}" + (f" ({moved[parent]} rows moved from {parent}_default)" if moved.get(parent) else ""))
+
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def archive_partitions(keep_months, archive_dir, keep_detached):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cutoff = add_months(date.today().replace(day=1), -keep_months)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    expired = [p for p in list_partitions(cur) if p[2] < cutoff]
+
+    for parent, partition, month_start in expired:
+        path = os.path.join(archive_dir, f"{partition}.csv.gz")
+        tmp_path = path + '.tmp'
+        with gzip.open(tmp_path, 'wb') as archive:
+            cur.copy_expert(f'COPY "{partition}" TO STDOUT WITH (FORMAT csv, HEADER)', archive)
+        os.replace(tmp_path, path)
+
+        cur.execute(f'ALTER TABLE "{parent}" DETACH PARTITION "{partition}"')
+        if not keep_detached:
+            cur.execute(f'DROP TABLE "{partition}"')
+        conn.commit()
+        print(f"📦 {partition} -> {path}" + (" (detached)" if keep_detached else " (dropped)"))
+
+    # Offline syncs can file orders under any date; once the month-named
+    # partitions above are gone, older rows left in the parents are the
+    # default partitions' share
+    archived_defaults = 0
+    for parent in PARENTS:
+        key = PARTITION_KEYS[parent]
+        cur.execute(f'SELECT count(*) AS rows FROM "{parent}" WHERE {key} < %s', (cutoff,))
+        rows = cur.fetchone()['rows']
+        if not rows:
+            continue
+
+        path = os.path.join(archive_dir, f"{parent}_default_before_{cutoff:%Y_%m}.csv.gz")
+        tmp_path = path + '.tmp'
+        exists = os.path.exists(path)
+        # A later run in the same month appends another gzip member, without a header
+        header = 'false' if exists else 'true'
+        copy = cur.mogrify(f'COPY (SELECT * FROM "{parent}" WHERE {key} < %s) '
+                           f'TO STDOUT WITH (FORMAT csv, HEADER {header})', (cutoff,))
+        with gzip.open(tmp_path, 'wb') as archive:
+            cur.copy_expert(copy.decode(), archive)
+        with open(tmp_path, 'rb') as chunk, open(path, 'ab') as target:
+            target.write(chunk.read())
+        os.remove(tmp_path)
+
+        cur.execute(f'DELETE FROM "{parent}" WHERE {key} < %s', (cutoff,))
+        conn.commit()
+        archived_defaults += rows
+        print(f"📦 {rows} rows from {parent}_default -> {path} (deleted)")
+
+    if not expired and not archived_defaults:
+        print(f"Nothing older than {cutoff} to archive")
+
+    cur.close()
+    conn.close()
+
+
+def purge_outbox(days):
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("""
+        DELETE FROM SideEffectOutbox
+        WHERE status = 'done' AND processed_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 day'
+    """, (days,))
+    print(f"🧹 Removed {cur.rowcount} processed outbox rows")
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+def scanned_partitions(plan, found=None):
+    """Collect the relation names scanned anywhere in an EXPLAIN JSON plan"""
+    found = found if found is not None else []
+    if 'Relation Name' in plan:
+        found.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        scanned_partitions(child, found)
+    return found
+
+
+def check_pruning():
+    conn = get_db_connection()
+    cur = conn.cursor()
+    failures = 0
+
+    for label, query, params, expected in PRUNING_CHECKS:
+        cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = cur.fetchone()['QUERY PLAN']
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        per_parent = {}
+        for relation in scanned_partitions(plan[0]['Plan']):
+            match = PARTITION_NAME.match(relation) or re.match(r'^(orders|orderitems|payments)_default$', relation)
+            if match:
+                per_parent.setdefault(match.group(1), []).append(relation)
+
+        pruned = all(len(parts) <= expected + 1 for parts in per_parent.values())  # +1 for the default partition
+        failures += not pruned
+        detail = ', '.join(f"{parent}: {len(parts)}" for parent, parts in sorted(per_parent.items()))
+        print(f"{'✅' if pruned else '❌'} {label:<24} {detail}")
+
+    conn.rollback()
+    cur.close()
+    conn.close()
+    return failures == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    partitions_cmd = commands.add_parser('partitions', help='pre-create future monthly partitions')
+    partitions_cmd.add_argument('--ahead', type=int, default=3)
+
+    archive_cmd = commands.add_parser('archive', help='archive and detach old partitions')
+    archive_cmd.add_argument('--keep-months', type=int, default=12)
+    archive_cmd.add_argument('--archive-dir', default='archive')
+    archive_cmd.add_argument('--keep-detached', action='store_true')
+
+    commands.add_parser('check-pruning', help='verify hot queries prune partitions')
+
+    purge_cmd = commands.add_parser('purge-outbox', help='delete old processed outbox rows')
+    purge_cmd.add_argument('--days', type=int, default=7)
+
+    args = parser.parse_args()
+    if args.command == 'partitions':
+        create_partitions(args.ahead)
+    elif args.command == 'archive':
+        archive_partitions(args.keep_months, args.archive_dir, args.keep_detached)
+    elif args.command == 'purge-outbox':
+        purge_outbox(args.days)
+    else:
+        sys.exit(0 if check_pruning() else 1)
@@ -1,18 +1,403 @@
+import threading
+import time
+from functools import wraps
 import psycopg2
+from flask import g, has_app_context
+from psycopg2 import pool as pg_pool
 from psycopg2.extras import RealDictCursor
 from config import Config
 
-def get_db_connection():
-    """Establish database connection"""
-    try:
-        conn = psycopg2.connect(
+# xid8 (Orders.change_xid) comes back as text by default; read it as an int
+# everywhere so order rows and the /api/orders/changes cursor agree.
+# 5069 is the built-in type's fixed OID.
+XID8 = psycopg2.extensions.new_type((5069,), 'XID8', lambda value, cur: None if value is None else int(value))
+psycopg2.extensions.register_type(XID8)
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """
+    psycopg2 connection that remembers which statements were PREPAREd on
+    it and the session statement_timeout (ms, 0 = none) last set on it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.statement_timeout = 0
+
+
+class PooledConnection:
+    """
+    Lease on a pooled connection
+
+    Behaves like the underlying psycopg2 connection, except that close()
+    hands it back to the pool instead of disconnecting.
+    """
+    _pool = None
+    _conn = None
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._conn, name, value)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        # Safety net for error paths that return without calling close()
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool that waits for a free connection instead of failing
+
+    The last `reserved` connections are only handed to priority callers
+    (order taking), so background workers, probes, batches and reports
+    together can never take every connection.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, reserved=0, **dsn):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.reserved = max(0, min(reserved, maxconn - 1))
+        self.in_use = 0
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+        self._pool = pg_pool.ThreadedConnectionPool(
+            minconn, maxconn,
+            connection_factory=PreparedConnection,
+            cursor_factory=RealDictCursor,
+            **dsn
+        )
+
+    def getconn(self, timeout=None, priority=False, statement_timeout=0):
+        """
+        Lease a connection, waiting up to timeout seconds for one
+
+        statement_timeout (ms, 0 = none) is set for the session if the
+        connection does not have it already. It is set outside any
+        transaction, so the lease starts idle.
+        """
+        limit = self.maxconn if priority else self.maxconn - self.reserved
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._freed:
+            while self.in_use >= limit:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise pg_pool.PoolError('Timed out waiting for a database connection')
+                self._freed.wait(remaining)
+            self.in_use += 1
+        conn = None
+        try:
+            conn = self._pool.getconn()
+            if conn.statement_timeout != statement_timeout:
+                conn.autocommit = True
+                try:
+                    cur = conn.cursor()
+                    cur.execute("SET statement_timeout = %s", (statement_timeout,))
+                    cur.close()
+                finally:
+                    conn.autocommit = False
+                conn.statement_timeout = statement_timeout
+        except Exception:
+            if conn is not None:
+                self._pool.putconn(conn, close=True)
+            with self._freed:
+                self.in_use -= 1
+                self._freed.notify_all()
+            raise
+        return PooledConnection(self, conn)
+
+    def putconn(self, conn):
+        # Broken connections are discarded; the next getconn() reconnects
+        # and starts with an empty set of prepared statements.
+        try:
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            with self._freed:
+                self.in_use -= 1
+                self._freed.notify_all()
+
+    def closeall(self):
+        self._pool.closeall()
+
+    def stats(self):
+        with self._lock:
+            in_use = self.in_use
+        return {
+            'min': self.minconn,
+            'max': self.maxconn,
+            'reserved': self.reserved,
+            'in_use': in_use,
+            'saturation': round(in_use / self.maxconn, 2)
+        }
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _dsn(role):
+    """Connection settings for 'primary' or 'replica' (DB_READ_* falls back to DB_*)"""
+    # A dead server or network path fails within seconds instead of
+    # hanging a lease (or a health probe) until the OS gives up
+    liveness = dict(
+        connect_timeout=getattr(Config, 'DB_CONNECT_TIMEOUT', 5),
+        keepalives=1,
+        keepalives_idle=getattr(Config, 'DB_KEEPALIVES_IDLE', 30),
+        keepalives_interval=10,
+        keepalives_count=3
+    )
+    if role == 'primary':
+        return dict(
             host=Config.DB_HOST,
             port=Config.DB_PORT,
             database=Config.DB_NAME,
             user=Config.DB_USER,
             password=Config.DB_PASSWORD,
-            cursor_factory=RealDictCursor
+            **liveness
         )
+    return dict(
+        host=Config.DB_READ_HOST,
+        port=getattr(Config, 'DB_READ_PORT', Config.DB_PORT),
+        database=getattr(Config, 'DB_READ_NAME', Config.DB_NAME),
+        user=getattr(Config, 'DB_READ_USER', Config.DB_USER),
+        password=getattr(Config, 'DB_READ_PASSWORD', Config.DB_PASSWORD),
+        options='-c default_transaction_read_only=on',
+        **liveness
+    )
+
+
+def dedicated_connection(role='primary'):
+    """A connection outside the pools, for long-lived sessions such as LISTEN"""
+    return psycopg2.connect(**_dsn(role))
+
+
+def pool_stats():
+    """Lease counts of every pool this process has opened, by role"""
+    return {role: pool.stats() for role, pool in list(_pools.items())}
+
+
+def replica_configured():
+    return bool(getattr(Config, 'DB_READ_HOST', None))
+
+
+def get_pool(role='primary'):
+    """Create the connection pool for a role on first use"""
+    if role not in _pools:
+        with _pool_lock:
+            if role not in _pools:
+                prefix = 'DB_READ_POOL' if role == 'replica' else 'DB_POOL'
+                _pools[role] = ConnectionPool(
+                    getattr(Config, f'{prefix}_MIN', 1),
+                    getattr(Config, f'{prefix}_MAX', 10),
+                    getattr(Config, f'{prefix}_TIMEOUT', 5),
+                    # Only the primary takes orders
+                    reserved=getattr(Config, f'{prefix}_RESERVED', 3 if role == 'primary' else 0),
+                    **_dsn(role)
+                )
+    return _pools[role]
+
+
+class ReplicaLagGuard:
+    """
+    Cached verdict on whether the replica is fresh enough to read from
+
+    Lag is measured at most once per check_interval on a connection that is
+    about to serve a read; a replica that has replayed everything it
+    received counts as zero lag even if the primary has been idle.
+    """
+
+    def __init__(self, max_lag, check_interval):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def due(self):
+        return time.monotonic() - self.checked_at >= self.check_interval
+
+    def measure(self, conn):
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT CASE
+                WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+            END AS lag
+        """)
+        lag = float(cur.fetchone()['lag'])
+        cur.close()
+        conn.rollback()
+        with self._lock:
+            self.lag = lag
+            self.checked_at = time.monotonic()
+
+    def mark_unreachable(self):
+        with self._lock:
+            self.lag = float('inf')
+            self.checked_at = time.monotonic()
+
+    def fresh(self):
+        return self.lag is not None and self.lag <= self.max_lag
+
+
+replica_guard = ReplicaLagGuard(
+    getattr(Config, 'DB_REPLICA_MAX_LAG', 5.0),
+    getattr(Config, 'DB_REPLICA_LAG_CHECK_SECONDS', 1.0)
+)
+
+
+def read_only(view):
+    """Mark a route as safe to serve from the read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+class SharedTransaction:
+    """
+    One primary connection and transaction for every get_db_connection()
+    made on this thread while the block is active (used by /api/batch)
+
+    Callers get a _SharedLease: commit() and close() wait for the block to
+    end, and rollback() only undoes the current step. Call step() before
+    each unit of work. The block commits on a clean exit unless fail()
+    was called; committed is True only once that commit went through.
+    """
+    _local = threading.local()
+
+    def __init__(self):
+        self.conn = None
+        self.failed = False
+        self.committed = False
+
+    @classmethod
+    def current(cls):
+        return getattr(cls._local, 'transaction', None)
+
+    def __enter__(self):
+        self.conn = get_pool('primary').getconn()
+        SharedTransaction._local.transaction = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        SharedTransaction._local.transaction = None
+        try:
+            if exc_type is None and not self.failed:
+                self.conn.commit()
+                self.committed = True
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+        return False
+
+    def step(self):
+        cur = self.conn.cursor()
+        cur.execute("SAVEPOINT batch_step")
+        cur.close()
+
+    def fail(self):
+        self.failed = True
+
+
+class _SharedLease:
+    """A sub-request's view of a SharedTransaction connection"""
+    _transaction = None
+
+    def __init__(self, transaction):
+        self._transaction = transaction
+
+    def __getattr__(self, name):
+        return getattr(self._transaction.conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._transaction.conn, name, value)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        cur = self._transaction.conn.cursor()
+        cur.execute("ROLLBACK TO SAVEPOINT batch_step")
+        cur.close()
+
+    def close(self):
+        pass
+
+
+def _replica_connection(statement_timeout=0):
+    """A replica connection, or None when the replica is stale or down"""
+    if not replica_guard.due() and not replica_guard.fresh():
+        return None
+    try:
+        conn = get_pool('replica').getconn(statement_timeout=statement_timeout)
+    except Exception as e:
+        print(f"Read replica unavailable, using primary: {e}")
+        replica_guard.mark_unreachable()
+        return None
+    try:
+        if replica_guard.due():
+            replica_guard.measure(conn)
+    except Exception as e:
+        print(f"Read replica lag check failed, using primary: {e}")
+        conn.close()
+        replica_guard.mark_unreachable()
+        return None
+    if not replica_guard.fresh():
+        conn.close()
+        return None
+    return conn
+
+
+def get_db_connection(read_only=None):
+    """
+    Borrow a database connection from the pool (close() returns it)
+
+    Routes decorated with @read_only get a replica connection when a
+    replica is configured and not lagging; everything else, and every
+    fallback, uses the primary; g.db_used_replica records that a request
+    read from the replica. Inside a SharedTransaction every call gets
+    the same connection. Inside a request admitted by the load
+    shedder, the connection runs under the request class's
+    statement_timeout, and order-class requests may use the primary
+    pool's reserved connections.
+    """
+    transaction = SharedTransaction.current()
+    if transaction is not None:
+        return _SharedLease(transaction)
+    if read_only is None:
+        read_only = has_app_context() and g.get('db_read_only', False)
+    timeout_ms = int(g.get('db_statement_timeout') or 0) if has_app_context() else 0
+    priority = has_app_context() and g.get('load_class') == 'orders'
+    try:
+        conn = None
+        if read_only and replica_configured():
+            conn = _replica_connection(timeout_ms)
+            if conn is not None and has_app_context():
+                g.db_used_replica = True
+        if conn is None:
+            conn = get_pool('primary').getconn(priority=priority, statement_timeout=timeout_ms)
         return conn
     except Exception as e:
         print(f"Database connection error: {e}")
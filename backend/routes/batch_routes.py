@@ -0,0 +1,167 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, current_app, jsonify
+from config import Config
+from models import SharedTransaction
+from utils.helpers import success_response, error_response
+from services.tables import occupancy
+from services.kitchen import kitchen
+from services.billing import bill_cache
+from services.customers import customer_resolver
+from services.trending import trending
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+MAX_REQUESTS = getattr(Config, 'BATCH_MAX_REQUESTS', 20)
+WORKERS = getattr(Config, 'BATCH_WORKERS', 4)
+MODES = ('parallel', 'sequential', 'transaction')
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+FORWARDED_HEADERS = ('Authorization', 'X-Requested-With')
+
+# Shared by all batches so a burst of them cannot spawn unbounded threads
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='batch')
+
+# Parallel sub-requests submitted to _executor and not yet started / finished
+_backlog_lock = threading.Lock()
+_backlog = {'queued': 0, 'running': 0}
+
+
+def executor_backlog():
+    """Batch sub-requests waiting for, or running on, the shared worker threads"""
+    with _backlog_lock:
+        return dict(_backlog, workers=WORKERS)
+
+
+def _submit(app, sub, headers):
+    with _backlog_lock:
+        _backlog['queued'] += 1
+    return _executor.submit(_run_queued, app, sub, headers)
+
+
+def _run_queued(app, sub, headers):
+    with _backlog_lock:
+        _backlog['queued'] -= 1
+        _backlog['running'] += 1
+    try:
+        return _dispatch(app, sub, headers)
+    finally:
+        with _backlog_lock:
+            _backlog['running'] -= 1
+
+
+def _validate(sub):
+    if not isinstance(sub, dict):
+        return 'each request must be an object'
+    method = str(sub.get('method', 'GET')).upper()
+    path = sub.get('path')
+    if method not in METHODS:
+        return f"method must be one of: {', '.join(METHODS)}"
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return 'path must start with /api/'
+    if path.startswith(('/api/batch', '/api/exports')):
+        return 'batches and streamed exports cannot be nested in a batch'
+    return None
+
+
+def _dispatch(app, sub, headers):
+    """Run one sub-request through the full app stack and capture its result"""
+    client = app.test_client(use_cookies=False)
+    response = client.open(
+        sub['path'],
+        method=str(sub.get('method', 'GET')).upper(),
+        json=sub.get('body'),
+        query_string=sub.get('params'),
+        headers=headers
+    )
+    body = response.get_json(silent=True)
+    return {
+        'id': sub.get('id'),
+        'status': response.status_code,
+        'body': body if body is not None else response.get_data(as_text=True)
+    }
+
+
+def _resync_memory():
+    """
+    Rebuild in-memory mirrors after a batch transaction that did not commit
+
+    Sub-requests update the mirrors as they go, before the batch commits.
+    Every mirror is attempted even if one fails to reload.
+    """
+    for name, refresh in (('table map', occupancy.load), ('kitchen queue', kitchen.load),
+                          ('trending counts', trending.load), ('bills', bill_cache.clear),
+                          ('customers', customer_resolver.clear)):
+        try:
+            refresh()
+        except Exception as e:
+            print(f"⚠️  Batch rollback: {name} resync failed: {e}")
+
+
+# POST several API calls in one round trip
+@batch_bp.route('/', methods=['POST'])
+@batch_bp.route('', methods=['POST'])
+def run_batch():
+    """
+    Body: {"mode": "parallel" | "sequential" | "transaction",
+           "requests": [{"id", "method", "path", "params", "body"}, ...]}
+
+    parallel (default) runs independent calls concurrently, each with its
+    own pooled connection. sequential runs them in order. transaction runs
+    them in order on one connection and commits only if every call
+    succeeds; the first failure rolls back everything and skips the rest.
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', 'parallel')
+    subs = data.get('requests')
+
+    if mode not in MODES:
+        return error_response(f"mode must be one of: {', '.join(MODES)}", 400)
+    if not isinstance(subs, list) or not subs:
+        return error_response('requests must be a non-empty list', 400)
+    if len(subs) > MAX_REQUESTS:
+        return error_response(f'At most {MAX_REQUESTS} requests per batch', 400)
+    for i, sub in enumerate(subs):
+        problem = _validate(sub)
+        if problem:
+            return error_response(f'requests[{i}]: {problem}', 400)
+
+    app = current_app._get_current_object()
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+
+    try:
+        if mode == 'parallel':
+            futures = [_submit(app, sub, headers) for sub in subs]
+            return success_response({'mode': mode, 'results': [f.result() for f in futures]})
+
+        if mode == 'sequential':
+            return success_response({'mode': mode, 'results': [_dispatch(app, sub, headers) for sub in subs]})
+
+        results = []
+        transaction = SharedTransaction()
+        try:
+            with transaction:
+                for sub in subs:
+                    if transaction.failed:
+                        results.append({'id': sub.get('id'), 'status': 424, 'body': 'Skipped: an earlier request failed'})
+                        continue
+                    transaction.step()
+                    result = _dispatch(app, sub, headers)
+                    results.append(result)
+                    if result['status'] >= 400:
+                        transaction.fail()
+        finally:
+            # A failed step, an exception or a failed COMMIT all leave the
+            # mirrors holding writes the database never kept
+            if not transaction.committed:
+                _resync_memory()
+
+        if transaction.failed:
+            failed = next(r for r in results if r['status'] >= 400 and r['status'] != 424)
+            return jsonify({
+                'status': 'error',
+                'message': f"Batch rolled back: request {failed['id']} failed",
+                'data': {'mode': mode, 'committed': False, 'results': results}
+            }), failed['status']
+        return success_response({'mode': mode, 'committed': True, 'results': results})
+    except Exception as e:
+        return error_response(str(e), 500)
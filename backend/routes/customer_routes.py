@@ -1,20 +1,36 @@
 from flask import Blueprint, request
-from models import get_db_connection
-from utils.helpers import success_response, error_response
+from models import get_db_connection, read_only
+from utils.helpers import success_response, error_response, compact_cursor, rows_response, RESULT_SHAPES
+from utils.load_shedding import route_class
+from utils.prepared import execute_prepared
+from utils.fields import requested_fields, select_list
+from utils.cache_sync import publish
+from services.billing import bill_cache
+from services.customers import customer_resolver
 
 customer_bp = Blueprint('customer', __name__, url_prefix='/api/customers')
 
 # GET all customers
 @customer_bp.route('/', methods=['GET'])
+@read_only
 def get_all_customers():
     try:
+        try:
+            fields = requested_fields('customer', request.args.get('fields'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
+        shape = request.args.get('shape', 'objects')
+        if shape not in RESULT_SHAPES:
+            return error_response(f'Invalid shape. Must be one of: {list(RESULT_SHAPES)}', 400)
+        
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = compact_cursor(conn)
         
         customer_type = request.args.get('customer_type')
         search = request.args.get('search')
         
-        query = "SELECT * FROM Customers WHERE 1=1"
+        query = f"SELECT {select_list('customer', fields) or '*'} FROM Customers WHERE 1=1"
         params = []
         
         if customer_type:
@@ -28,11 +44,11 @@ def get_all_customers():
         query += " ORDER BY created_at DESC"
         
         cur.execute(query, params)
-        customers = cur.fetchall()
+        response = rows_response(cur, shape)
         cur.close()
         conn.close()
         
-        return success_response(customers)
+        return response
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -40,9 +56,15 @@ def get_all_customers():
 @customer_bp.route('/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
     try:
+        try:
+            fields = requested_fields('customer', request.args.get('fields'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
         conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM Customers WHERE customer_id = %s", (customer_id,))
+        cur.execute(f"SELECT {select_list('customer', fields) or '*'} FROM Customers WHERE customer_id = %s",
+                    (customer_id,))
         customer = cur.fetchone()
         cur.close()
         conn.close()
@@ -77,6 +99,7 @@ def create_customer():
         ))
         
         customer_id = cur.fetchone()['customer_id']
+        publish(cur, 'customers', customer_id)
         conn.commit()
         cur.close()
         conn.close()
@@ -106,13 +129,20 @@ def update_customer(customer_id):
             data.get('customer_type', 'regular'),
             customer_id
         ))
+        publish(cur, 'customers', customer_id)
         
         conn.commit()
         cur.close()
         conn.close()
         
+        # Bills show the customer's name and phone
+        bill_cache.clear()
+        customer_resolver.invalidate(customer_id)
+        
         return success_response(None, 'Customer updated successfully')
     except Exception as e:
+        if 'unique constraint' in str(e).lower():
+            return error_response('Phone number already exists', 400)
         return error_response(str(e), 500)
 
 # DELETE customer
@@ -122,26 +152,34 @@ def delete_customer(customer_id):
         conn = get_db_connection()
         cur = conn.cursor()
         cur.execute("DELETE FROM Customers WHERE customer_id = %s", (customer_id,))
+        publish(cur, 'customers', customer_id)
         conn.commit()
         cur.close()
         conn.close()
         
+        bill_cache.clear()
+        customer_resolver.invalidate(customer_id)
+        
         return success_response(None, 'Customer deleted successfully')
     except Exception as e:
         return error_response(str(e), 500)
 
 # NEW: Get customer by phone
 @customer_bp.route('/phone/<phone>', methods=['GET'])
+@route_class('orders')
 def get_customer_by_phone(phone):
     try:
+        customers_version = customer_resolver.version
         conn = get_db_connection()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM Customers WHERE phone = %s", (phone,))
+        execute_prepared(cur, 'customer_by_phone', (phone,))
         customer = cur.fetchone()
         cur.close()
         conn.close()
         
         if customer:
+            # The POS looks a caller up right before ordering for them
+            customer_resolver.remember({phone: customer['customer_id']}, customers_version)
             return success_response(customer)
         return error_response('Customer not found', 404)
     except Exception as e:
@@ -0,0 +1,79 @@
+from flask import Blueprint, request, Response
+from models import get_db_connection
+from utils.helpers import error_response
+from utils.exports import CopyStream, ColumnarStream, COLUMNAR_FORMATS, copy_sql, pyarrow
+from datetime import datetime, date
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/exports')
+
+# dataset -> query over [start_date, end_date]; each filters on its partition key
+EXPORTS = {
+    'orders': """
+        SELECT o.*, c.name as customer_name, c.phone as customer_phone
+        FROM Orders o
+        LEFT JOIN Customers c ON o.customer_id = c.customer_id
+        WHERE o.order_date BETWEEN %(start_date)s AND %(end_date)s
+    """,
+    'order-items': """
+        SELECT oi.*, m.item_name, m.category
+        FROM OrderItems oi
+        JOIN Menu m ON oi.menu_id = m.menu_id
+        WHERE oi.order_date BETWEEN %(start_date)s AND %(end_date)s
+    """,
+    'payments': """
+        SELECT p.*
+        FROM Payments p
+        WHERE p.payment_date >= %(start_date)s AND p.payment_date < %(end_date)s::date + 1
+    """
+}
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+# GET a dataset as CSV (default), Parquet or Arrow, streamed
+@export_bp.route('/<dataset>', methods=['GET'])
+def export_dataset(dataset):
+    if dataset not in EXPORTS:
+        return error_response(f"Unknown export '{dataset}'. Use one of: {', '.join(EXPORTS)}", 404)
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in MIMETYPES:
+        return error_response(f"format must be one of: {', '.join(MIMETYPES)}", 400)
+    if fmt in COLUMNAR_FORMATS and pyarrow is None:
+        return error_response(f"{fmt} export needs pyarrow installed on the server", 501)
+
+    try:
+        today = date.today()
+        start_date = datetime.strptime(request.args.get('start_date', today.replace(day=1).isoformat()), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end_date', today.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return error_response('start_date and end_date must be YYYY-MM-DD', 400)
+    if start_date > end_date:
+        return error_response('start_date must not be after end_date', 400)
+
+    conn = None
+    try:
+        # Exports are read-only; a fresh replica takes them off the primary
+        conn = get_db_connection(read_only=True)
+        cur = conn.cursor()
+        params = {'start_date': start_date, 'end_date': end_date}
+        if fmt == 'csv':
+            body = CopyStream(conn, copy_sql(cur, EXPORTS[dataset], params))
+        else:
+            body = ColumnarStream(conn, cur.mogrify(EXPORTS[dataset], params).decode(), fmt)
+        cur.close()
+    except Exception as e:
+        if conn is not None:
+            conn.close()
+        return error_response(str(e), 500)
+
+    filename = f"{dataset}_{start_date}_{end_date}.{fmt}"
+    response = Response(body, mimetype=MIMETYPES[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(body.close)
+    return response
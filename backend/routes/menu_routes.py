@@ -1,12 +1,26 @@
 from flask import Blueprint, request
-from models import get_db_connection
+from models import get_db_connection, read_only
 from utils.helpers import success_response, error_response
+from utils.load_shedding import route_class
+from utils.coalescing import coalesce
+from utils.cache_sync import publish
+from utils.fields import requested_fields, select_list
+from services.billing import bill_cache
+from services.menu_search import menu_search
 
 menu_bp = Blueprint('menu', __name__, url_prefix='/api/menu')
 
 @menu_bp.route('/', methods=['GET'])
+@read_only
+@route_class('orders')
+@coalesce(shared=('menu',))
 def get_all_menu_items():
     try:
+        try:
+            fields = requested_fields('menu', request.args.get('fields'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
         conn = get_db_connection()
         cur = conn.cursor()
         
@@ -14,7 +28,7 @@ def get_all_menu_items():
         category = request.args.get('category')
         available = request.args.get('available')
         
-        query = "SELECT * FROM Menu WHERE 1=1"
+        query = f"SELECT {select_list('menu', fields) or '*'} FROM Menu WHERE 1=1"
         params = []
         
         if cuisine:
@@ -40,13 +54,32 @@ def get_all_menu_items():
     except Exception as e:
         return error_response(str(e), 500)
 
+# Search-as-you-type for the POS: partial words, typos, best sellers first
+@menu_bp.route('/search', methods=['GET'])
+@route_class('orders')
+def search_menu():
+    try:
+        q = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        available = request.args.get('available')
+        
+        items = menu_search.search(q, max(1, min(limit, 50)), available_only=available == 'true')
+        return success_response(items)
+    except Exception as e:
+        return error_response(str(e), 500)
+
 @menu_bp.route('/<int:menu_id>', methods=['GET'])
 def get_menu_item(menu_id):
     try:
+        try:
+            fields = requested_fields('menu', request.args.get('fields'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("SELECT * FROM Menu WHERE menu_id = %s", (menu_id,))
+        cur.execute(f"SELECT {select_list('menu', fields) or '*'} FROM Menu WHERE menu_id = %s", (menu_id,))
         item = cur.fetchone()
         
         cur.close()
@@ -80,10 +113,13 @@ def create_menu_item():
         ))
         
         menu_id = cur.fetchone()['menu_id']
+        publish(cur, 'menu', menu_id)
         conn.commit()
         cur.close()
         conn.close()
         
+        menu_search.refresh_item(menu_id)
+        
         return success_response({'menu_id': menu_id}, 'Menu item created', 201)
     except Exception as e:
         return error_response(str(e), 500)
@@ -110,11 +146,16 @@ def update_menu_item(menu_id):
             data.get('is_available', True),
             menu_id
         ))
+        publish(cur, 'menu', menu_id)
         
         conn.commit()
         cur.close()
         conn.close()
         
+        # Bills show item names and categories
+        bill_cache.clear()
+        menu_search.refresh_item(menu_id)
+        
         return success_response(None, 'Menu item updated')
     except Exception as e:
         return error_response(str(e), 500)
@@ -130,11 +171,14 @@ def toggle_availability(menu_id):
             "UPDATE Menu SET is_available = %s WHERE menu_id = %s",
             (data['is_available'], menu_id)
         )
+        publish(cur, 'menu', menu_id)
         
         conn.commit()
         cur.close()
         conn.close()
         
+        menu_search.refresh_item(menu_id)
+        
         return success_response(None, 'Availability updated')
     except Exception as e:
         return error_response(str(e), 500)
@@ -146,11 +190,14 @@ def delete_menu_item(menu_id):
         cur = conn.cursor()
         
         cur.execute("DELETE FROM Menu WHERE menu_id = %s", (menu_id,))
+        publish(cur, 'menu', menu_id)
         conn.commit()
         
         cur.close()
         conn.close()
         
+        menu_search.refresh_item(menu_id)
+        
         return success_response(None, 'Menu item deleted')
     except Exception as e:
         return error_response(str(e), 500)
@@ -1,50 +1,68 @@
 from flask import Blueprint, request
-from models import get_db_connection
-from utils.helpers import success_response, error_response
+from psycopg2.extras import execute_values
+from config import Config
+from models import get_db_connection, read_only
+from utils.helpers import success_response, error_response, compact_cursor, rows_response, RESULT_SHAPES, after_commit
+from utils.load_shedding import route_class
+from utils.coalescing import coalesce
+from utils.cache_sync import publish
+from utils.prepared import execute_prepared
+from utils.fields import requested_fields, select_list, trim
+from services.tables import occupancy, update_table_status, claim_table_for_order, release_table, ORDERABLE_STATUSES
+from services.billing import bill_cache, order_totals
+from services.trending import trending
+from services.kitchen import kitchen, format_eta, eta_minutes
+from services.customers import customer_resolver
 from datetime import datetime
 import random
+import uuid
 
 order_bp = Blueprint('order', __name__, url_prefix='/api/orders')
 
-def generate_order_token(order_type, table_number=None):
-    """Generate order token: T-001 for takeaway, D5-01 for dine-in table 5"""
+SYNC_MAX_ORDERS = getattr(Config, 'SYNC_MAX_ORDERS', 500)
+
+def token_prefix(order_type, table_number=None):
+    """'T' for takeaway, 'D5' for dine-in at table 5"""
+    return 'T' if order_type == 'takeaway' else f"D{table_number}"
+
+def format_order_token(prefix, number):
+    """T-001 (three digits) for takeaway, D5-01 (two digits) for dine-in"""
+    return f"{prefix}-{number:0{3 if prefix == 'T' else 2}d}"
+
+def next_order_token(prefix, last_token=None):
+    """The token after last_token (the prefix's latest today), or the first"""
+    return format_order_token(prefix, int(last_token.split('-')[1]) + 1 if last_token else 1)
+
+def generate_order_token(order_type, table_number=None, cur=None):
+    """Generate order token: T-001 for takeaway, D5-01 for dine-in table 5
+
+    Pass the caller's cursor to avoid borrowing a second pooled connection.
+    """
+    conn = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        if cur is None:
+            conn = get_db_connection()
+            cur = conn.cursor()
         
-        if order_type == 'takeaway':
-            cur.execute("""
-                SELECT order_token FROM Orders 
-                WHERE order_token LIKE 'T-%%' AND order_date = CURRENT_DATE 
-                ORDER BY order_id DESC LIMIT 1
-            """)
-            last_order = cur.fetchone()
-            
-            if last_order and last_order['order_token']:
-                last_num = int(last_order['order_token'].split('-')[1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            token = f"T-{new_num:03d}"
-        else:
-            cur.execute("""
-                SELECT order_token FROM Orders 
-                WHERE order_token LIKE %s AND order_date = CURRENT_DATE 
-                ORDER BY order_id DESC LIMIT 1
-            """, (f"D{table_number}-%",))
-            last_order = cur.fetchone()
-            
-            if last_order and last_order['order_token']:
-                last_num = int(last_order['order_token'].split('-')[1])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            
-            token = f"D{table_number}-{new_num:02d}"
+        # Concurrent orders would read the same last token; hold the prefix
+        # until the caller's transaction ends
+        prefix = token_prefix(order_type, table_number)
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"order_token:{prefix}",))
         
-        cur.close()
-        conn.close()
+        # Highest number, not the newest row: offline syncs number their
+        # orders by when they were taken, not in order_id order
+        cur.execute("""
+            SELECT max(split_part(order_token, '-', 2)::int) AS last_num
+            FROM Orders
+            WHERE order_token ~ %s AND order_date = CURRENT_DATE
+        """, (f"^{prefix}-[0-9]+$",))
+        last_num = cur.fetchone()['last_num']
+        
+        token = format_order_token(prefix, (last_num or 0) + 1)
+        
+        if conn is not None:
+            cur.close()
+            conn.close()
         return token
     except Exception as e:
         print(f"Error generating token: {e}")
@@ -52,21 +70,40 @@ def generate_order_token(order_type, table_number=None):
 
 @order_bp.route('/', methods=['GET'])
 @order_bp.route('', methods=['GET'])
+@read_only
+@coalesce(shared=('orders', 'customers'))
 def get_all_orders():
     try:
+        try:
+            # Listings never load items, so a field set must name columns
+            fields = requested_fields('order', request.args.get('fields'), relations=False)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
+        shape = request.args.get('shape', 'objects')
+        if shape not in RESULT_SHAPES:
+            return error_response(f'Invalid shape. Must be one of: {list(RESULT_SHAPES)}', 400)
+        
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = compact_cursor(conn)
         
         status = request.args.get('status')
         order_type = request.args.get('order_type')
         order_date = request.args.get('date')
         
-        query = """
-            SELECT o.*, c.name as customer_name, c.phone as customer_phone
-            FROM Orders o
-            LEFT JOIN Customers c ON o.customer_id = c.customer_id
-            WHERE 1=1
-        """
+        if fields is None:
+            query = """
+                SELECT o.*, c.name as customer_name, c.phone as customer_phone
+                FROM Orders o
+                LEFT JOIN Customers c ON o.customer_id = c.customer_id
+                WHERE 1=1
+            """
+        else:
+            # Only join Customers when a customer column was asked for
+            query = f"SELECT {select_list('order', fields)} FROM Orders o"
+            if 'customer_name' in fields or 'customer_phone' in fields:
+                query += " LEFT JOIN Customers c ON o.customer_id = c.customer_id"
+            query += " WHERE 1=1"
         params = []
         
         if status:
@@ -82,27 +119,104 @@ def get_all_orders():
         query += " ORDER BY o.created_at DESC"
         
         cur.execute(query, params)
-        orders = cur.fetchall()
+        response = rows_response(cur, shape)
         cur.close()
         conn.close()
         
-        return success_response(orders)
+        return response
     except Exception as e:
         print(f"Error fetching orders: {e}")
         return error_response(str(e), 500)
 
+@order_bp.route('/changes', methods=['GET'])
+@route_class('orders')
+def get_order_changes():
+    """Orders created, updated, cancelled or paid after the `since` cursor.
+
+    The cursor is the id of the last transaction returned (Orders.change_xid,
+    set by a trigger on every write). Only transactions below the oldest
+    one still running are returned, so everything under the cursor has
+    committed and a poll never skips a write that commits late. Pages end
+    on a transaction boundary and may run slightly over `limit`.
+    """
+    try:
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', 500, type=int)
+        order_type = request.args.get('order_type')
+
+        if since < 0:
+            return error_response('since must be a non-negative cursor', 400)
+        limit = max(1, min(limit, 1000))
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+
+        where = """
+            o.change_xid > %(since)s::text::xid8
+            AND o.change_xid < pg_snapshot_xmin(pg_current_snapshot())
+        """
+        params = {'since': since, 'limit': limit, 'order_type': order_type}
+
+        if order_type:
+            where += " AND o.order_type = %(order_type)s"
+
+        cur.execute(f"""
+            WITH page AS (
+                SELECT o.change_xid
+                FROM Orders o
+                WHERE {where}
+                ORDER BY o.change_xid
+                LIMIT %(limit)s
+            )
+            SELECT o.order_id, o.order_token, o.customer_id, o.order_type, o.table_number,
+                   o.order_status, o.special_instructions, o.subtotal, o.gst_amount,
+                   o.service_charge, o.total_amount, o.order_date, o.created_at, o.updated_at,
+                   o.completed_at, o.client_uuid, o.change_seq, o.change_xid,
+                   c.name as customer_name, c.phone as customer_phone,
+                   (SELECT count(*) FROM page) AS page_size
+            FROM Orders o
+            LEFT JOIN Customers c ON o.customer_id = c.customer_id
+            WHERE {where}
+              AND o.change_xid <= (SELECT max(change_xid) FROM page)
+            ORDER BY o.change_xid, o.change_seq
+        """, params)
+        orders = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        has_more = bool(orders) and orders[0]['page_size'] == limit
+        for order in orders:
+            del order['page_size']
+
+        return success_response({
+            'orders': orders,
+            'cursor': orders[-1]['change_xid'] if orders else since,
+            'has_more': has_more
+        })
+    except Exception as e:
+        print(f"Error fetching order changes: {e}")
+        return error_response(str(e), 500)
+
 @order_bp.route('/<int:order_id>', methods=['GET'])
+@route_class('orders')
 def get_order(order_id):
     try:
+        try:
+            fields = requested_fields('order', request.args.get('fields'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("""
-            SELECT o.*, c.name as customer_name, c.phone as customer_phone
-            FROM Orders o
-            LEFT JOIN Customers c ON o.customer_id = c.customer_id
-            WHERE o.order_id = %s
-        """, (order_id,))
+        if fields is None:
+            execute_prepared(cur, 'order_by_id', (order_id,))
+        else:
+            # order_date locates the items' partition; trimmed below if not asked for
+            query = f"SELECT {select_list('order', fields, required=('order_date',))} FROM Orders o"
+            if 'customer_name' in fields or 'customer_phone' in fields:
+                query += " LEFT JOIN Customers c ON o.customer_id = c.customer_id"
+            cur.execute(query + " WHERE o.order_id = %s", (order_id,))
         
         order = cur.fetchone()
         
@@ -111,20 +225,15 @@ def get_order(order_id):
             conn.close()
             return error_response('Order not found', 404)
         
-        cur.execute("""
-            SELECT oi.*, m.item_name, m.price as current_price
-            FROM OrderItems oi
-            JOIN Menu m ON oi.menu_id = m.menu_id
-            WHERE oi.order_id = %s
-        """, (order_id,))
-        
-        items = cur.fetchall()
-        order['items'] = items
+        if fields is None or 'items' in fields:
+            execute_prepared(cur, 'order_items_by_order', (order_id, order['order_date']))
+            items = cur.fetchall()
+            order['items'] = items
         
         cur.close()
         conn.close()
         
-        return success_response(order)
+        return success_response(trim(order, fields))
     except Exception as e:
         print(f"Error fetching order {order_id}: {e}")
         return error_response(str(e), 500)
@@ -152,36 +261,47 @@ def create_order():
         if not data.get('items') or len(data['items']) == 0:
             return error_response('Order must contain at least one item', 400)
         
+        # The in-memory map rejects a reserved or blocked table without a
+        # round trip; claim_table_for_order() below makes the decision that
+        # counts, including whether an occupied table is another round
+        if data['order_type'] == 'dine-in':
+            try:
+                data['table_number'] = int(data['table_number'])
+            except (TypeError, ValueError):
+                return error_response('Table number must be an integer', 400)
+            table = occupancy.get(data['table_number'])
+            if not table:
+                return error_response(f"Table {data['table_number']} not found", 404)
+            if table['status'] not in ORDERABLE_STATUSES + ('occupied',):
+                return error_response(f"Table {data['table_number']} is already {table['status']}", 409)
+        
         conn = get_db_connection()
         cur = conn.cursor()
         
         # Step 1: Create or get customer
-        cur.execute("""
-            SELECT customer_id FROM Customers WHERE phone = %s
-        """, (data['customer']['phone'],))
-        
-        existing_customer = cur.fetchone()
+        customers_version = customer_resolver.version
+        customer_id = customer_resolver.resolve(
+            cur,
+            data['customer']['name'],
+            data['customer']['phone'],
+            data['customer'].get('email')
+        )
+        print(f"✅ Resolved customer: {customer_id}")
         
-        if existing_customer:
-            customer_id = existing_customer['customer_id']
-            print(f"✅ Found existing customer: {customer_id}")
-        else:
-            cur.execute("""
-                INSERT INTO Customers (name, phone, email)
-                VALUES (%s, %s, %s)
-                RETURNING customer_id
-            """, (
-                data['customer']['name'],
-                data['customer']['phone'],
-                data['customer'].get('email')
-            ))
-            customer_id = cur.fetchone()['customer_id']
-            print(f"✅ Created new customer: {customer_id}")
+        # Take the table; a concurrent order for it waits on the row lock
+        # and then finds it occupied by another party
+        if data['order_type'] == 'dine-in' and not claim_table_for_order(cur, data['table_number'], customer_id):
+            conn.rollback()
+            cur.close()
+            conn.close()
+            after_commit('Table map update', occupancy.refresh, [data['table_number']])
+            table = occupancy.get(data['table_number'])
+            return error_response(f"Table {data['table_number']} is already {table['status']}", 409)
         
         # Step 2: Calculate order totals
         subtotal = 0
         for item in data['items']:
-            cur.execute("SELECT price FROM Menu WHERE menu_id = %s", (item['menu_id'],))
+            execute_prepared(cur, 'menu_price', (item['menu_id'],))
             menu_item = cur.fetchone()
             if not menu_item:
                 cur.close()
@@ -191,16 +311,18 @@ def create_order():
             item_subtotal = float(menu_item['price']) * item['quantity']
             subtotal += item_subtotal
         
-        gst_amount = subtotal * 0.05  # 5% GST
-        service_charge = subtotal * 0.10 if data['order_type'] == 'dine-in' else 0
-        total_amount = subtotal + gst_amount + service_charge
+        totals = order_totals(subtotal, data['order_type'])
+        gst_amount = totals['gst_amount']
+        service_charge = totals['service_charge']
+        total_amount = totals['total_amount']
         
         print(f"💰 Calculated totals - Subtotal: {subtotal}, GST: {gst_amount}, Service: {service_charge}, Total: {total_amount}")
         
         # Step 3: Generate order token
         order_token = generate_order_token(
             data['order_type'],
-            data.get('table_number')
+            data.get('table_number'),
+            cur
         )
         print(f"🎫 Generated token: {order_token}")
         
@@ -212,7 +334,7 @@ def create_order():
                 service_charge, total_amount, order_date
             )
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_DATE)
-            RETURNING order_id
+            RETURNING order_id, order_date
         """, (
             order_token,
             customer_id,
@@ -226,24 +348,28 @@ def create_order():
             total_amount
         ))
         
-        order_id = cur.fetchone()['order_id']
+        created = cur.fetchone()
+        order_id = created['order_id']
         print(f"✅ Created order: {order_id}")
         
         # Step 5: Insert order items
+        ordered = []
         for item in data['items']:
-            cur.execute("SELECT price FROM Menu WHERE menu_id = %s", (item['menu_id'],))
+            execute_prepared(cur, 'menu_price', (item['menu_id'],))
             menu_item = cur.fetchone()
             unit_price = float(menu_item['price'])
+            ordered.append(dict(menu_item, menu_id=item['menu_id'], quantity=item['quantity']))
             item_subtotal = unit_price * item['quantity']
             
             cur.execute("""
                 INSERT INTO OrderItems (
-                    order_id, menu_id, quantity, unit_price,
+                    order_id, order_date, menu_id, quantity, unit_price,
                     subtotal, customization, item_status
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             """, (
                 order_id,
+                created['order_date'],
                 item['menu_id'],
                 item['quantity'],
                 unit_price,
@@ -254,25 +380,30 @@ def create_order():
         
         print(f"✅ Added {len(data['items'])} items to order")
         
-        # Step 6: Update table status if dine-in
-        if data['order_type'] == 'dine-in':
-            cur.execute("""
-                UPDATE RestaurantTables
-                SET status = 'occupied'
-                WHERE table_number = %s
-            """, (data['table_number'],))
-            print(f"✅ Updated table {data['table_number']} status to occupied")
-        
+        publish(cur, 'orders', order_id)
         conn.commit()
         cur.close()
         conn.close()
         
         print(f"✅ Order {order_token} created successfully!")
         
+        # The order exists now: a failure below must not turn into a 500
+        # that makes the POS retry and create it twice
+        if data['order_type'] == 'dine-in':
+            after_commit('Table map update', occupancy.set_status, data['table_number'], 'occupied')
+        after_commit('Customer cache update', customer_resolver.remember,
+                     {data['customer']['phone']: customer_id}, customers_version)
+        after_commit('Trending update', trending.record,
+                     [(i['menu_id'], i['item_name'], i['quantity']) for i in ordered], order_id=order_id)
+        ready_at = after_commit('Kitchen queue update', kitchen.add_order,
+                                order_id, order_token, data['order_type'], ordered)
+        
         return success_response({
             'order_id': order_id,
             'order_token': order_token,
-            'total_amount': float(total_amount)
+            'total_amount': float(total_amount),
+            'estimated_ready_at': format_eta(ready_at) if ready_at else None,
+            'eta_minutes': eta_minutes(ready_at) if ready_at else None
         }, 'Order created successfully', 201)
         
     except Exception as e:
@@ -281,6 +412,279 @@ def create_order():
         traceback.print_exc()
         return error_response(f"Failed to create order: {str(e)}", 500)
 
+def _parse_offline_order(raw):
+    """Validate one order queued by a POS terminal while offline
+
+    Returns (order, None) with normalised fields, or (None, error message).
+    """
+    if not isinstance(raw, dict):
+        return None, 'Order must be an object'
+    try:
+        client_uuid = str(uuid.UUID(str(raw.get('client_uuid'))))
+    except ValueError:
+        return None, 'client_uuid must be a UUID'
+    
+    customer = raw.get('customer') or {}
+    if not customer.get('name') or not customer.get('phone'):
+        return None, 'Customer name and phone are required'
+    
+    order_type = raw.get('order_type')
+    if order_type not in ('dine-in', 'takeaway'):
+        return None, "order_type must be 'dine-in' or 'takeaway'"
+    
+    table_number = None
+    if order_type == 'dine-in':
+        try:
+            table_number = int(raw.get('table_number'))
+        except (TypeError, ValueError):
+            return None, 'Table number is required for dine-in orders'
+        if not occupancy.get(table_number):
+            return None, f"Table {table_number} not found"
+    
+    items = raw.get('items')
+    if not isinstance(items, list) or not items:
+        return None, 'Order must contain at least one item'
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('menu_id'), int) \
+                or not isinstance(item.get('quantity'), int) or item['quantity'] < 1:
+            return None, 'Each item needs an integer menu_id and a positive integer quantity'
+    
+    created_at = datetime.now()
+    if raw.get('created_at'):
+        try:
+            created_at = datetime.fromisoformat(str(raw['created_at']).replace('Z', '+00:00'))
+        except ValueError:
+            return None, 'created_at must be an ISO 8601 timestamp'
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone().replace(tzinfo=None)
+    
+    return {
+        'client_uuid': client_uuid,
+        'customer': customer,
+        'order_type': order_type,
+        'table_number': table_number,
+        'special_instructions': raw.get('special_instructions'),
+        'items': items,
+        'created_at': created_at,
+        'order_date': created_at.date()
+    }, None
+
+def _assign_tokens(cur, orders):
+    """Give each order the next token of its day and prefix, oldest first"""
+    for order in orders:
+        order['token_prefix'] = token_prefix(order['order_type'], order['table_number'])
+    for prefix in sorted({order['token_prefix'] for order in orders}):
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"order_token:{prefix}",))
+    cur.execute("""
+        SELECT order_date, split_part(order_token, '-', 1) AS prefix,
+               max(split_part(order_token, '-', 2)::int) AS last_num
+        FROM Orders
+        WHERE order_date = ANY(%s) AND order_token ~ '^(T|D[0-9]+)-[0-9]+$'
+        GROUP BY 1, 2
+    """, (sorted({order['order_date'] for order in orders}),))
+    last = {(row['order_date'], row['prefix']): row['last_num'] for row in cur.fetchall()}
+    
+    for order in sorted(orders, key=lambda o: o['created_at']):
+        key = (order['order_date'], order['token_prefix'])
+        last[key] = last.get(key, 0) + 1
+        order['order_token'] = format_order_token(order['token_prefix'], last[key])
+
+@order_bp.route('/sync', methods=['POST'])
+def sync_offline_orders():
+    """
+    Ingest orders a POS terminal queued while offline, in one transaction
+
+    Body: {"orders": [{"client_uuid", "created_at", "order_type",
+                       "table_number", "customer", "items",
+                       "special_instructions"}, ...]}
+
+    Orders whose client_uuid is already stored are reported as duplicates
+    with their existing id and token, so a terminal can safely resend its
+    whole queue after a failed sync. The insert skips conflicting rows, so
+    a concurrent sync of the same queue also gets duplicates, not an
+    error. Invalid orders are rejected one by one; the rest are inserted
+    with set-based statements. Results come back in request order.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        raw_orders = data.get('orders')
+        if not isinstance(raw_orders, list) or not raw_orders:
+            return error_response('orders must be a non-empty list', 400)
+        if len(raw_orders) > SYNC_MAX_ORDERS:
+            return error_response(f'At most {SYNC_MAX_ORDERS} orders per sync', 400)
+        
+        results = []
+        first = {}  # client_uuid -> result of its first occurrence in this sync
+        pending = {}
+        for raw in raw_orders:
+            order, problem = _parse_offline_order(raw)
+            client_uuid = order['client_uuid'] if order else (raw.get('client_uuid') if isinstance(raw, dict) else None)
+            result = {'client_uuid': client_uuid}
+            results.append(result)
+            if problem:
+                result.update(status='rejected', error=problem)
+            elif client_uuid in first:
+                result['same_as'] = first[client_uuid]
+            else:
+                first[client_uuid] = result
+                pending[client_uuid] = dict(order, result=result)
+        
+        conn = get_db_connection()
+        cur = conn.cursor()
+        
+        # Step 1: Drop orders an earlier sync already stored; the insert
+        # below catches the ones a concurrent sync is storing right now
+        if pending:
+            cur.execute("""
+                SELECT client_uuid::text AS client_uuid, order_id, order_token
+                FROM Orders WHERE client_uuid = ANY(%s::uuid[])
+            """, (list(pending),))
+            for row in cur.fetchall():
+                order = pending.pop(row['client_uuid'])
+                order['result'].update(status='duplicate', order_id=row['order_id'], order_token=row['order_token'])
+        
+        # Step 2: Price every item from one menu read
+        menu = {}
+        if pending:
+            cur.execute("""
+                SELECT menu_id, price, item_name, category, preparation_time
+                FROM Menu WHERE menu_id = ANY(%s)
+            """, (list({item['menu_id'] for order in pending.values() for item in order['items']}),))
+            menu = {row['menu_id']: row for row in cur.fetchall()}
+        for client_uuid, order in list(pending.items()):
+            unknown = [item['menu_id'] for item in order['items'] if item['menu_id'] not in menu]
+            if unknown:
+                order['result'].update(status='rejected', error=f"Menu item {unknown[0]} not found")
+                del pending[client_uuid]
+                continue
+            subtotal = sum(float(menu[item['menu_id']]['price']) * item['quantity'] for item in order['items'])
+            order.update(order_totals(subtotal, order['order_type']))
+        
+        orders = list(pending.values())
+        if not orders:
+            cur.close()
+            conn.close()
+            return success_response(_sync_summary(results), 'Nothing new to sync')
+        
+        # Step 3: Resolve customers, creating the new ones in one insert
+        customers = {}
+        for order in orders:
+            customers.setdefault(order['customer']['phone'], order['customer'])
+        customers_version = customer_resolver.version
+        customer_ids = customer_resolver.resolve_many(cur, customers)
+        
+        # Step 4: Tokens for every order, then the orders in one insert
+        _assign_tokens(cur, orders)
+        rows = execute_values(cur, """
+            INSERT INTO Orders (
+                client_uuid, order_token, customer_id, order_type, table_number,
+                order_status, special_instructions, subtotal, gst_amount,
+                service_charge, total_amount, order_date, created_at
+            )
+            VALUES %s
+            ON CONFLICT (client_uuid, order_date) DO NOTHING
+            RETURNING order_id, client_uuid::text AS client_uuid
+        """, [(
+            order['client_uuid'],
+            order['order_token'],
+            customer_ids[order['customer']['phone']],
+            order['order_type'],
+            order['table_number'],
+            'pending',
+            order['special_instructions'],
+            order['subtotal'],
+            order['gst_amount'],
+            order['service_charge'],
+            order['total_amount'],
+            order['order_date'],
+            order['created_at']
+        ) for order in orders], page_size=len(orders), fetch=True)
+        for row in rows:
+            pending[row['client_uuid']]['order_id'] = row['order_id']
+        
+        # Rows another sync committed first were skipped: report those
+        skipped = [order['client_uuid'] for order in orders if 'order_id' not in order]
+        if skipped:
+            cur.execute("""
+                SELECT client_uuid::text AS client_uuid, order_id, order_token
+                FROM Orders WHERE client_uuid = ANY(%s::uuid[])
+            """, (skipped,))
+            for row in cur.fetchall():
+                pending[row['client_uuid']]['result'].update(
+                    status='duplicate', order_id=row['order_id'], order_token=row['order_token']
+                )
+            orders = [order for order in orders if 'order_id' in order]
+        if not orders:
+            conn.commit()
+            cur.close()
+            conn.close()
+            customer_resolver.remember(customer_ids, customers_version)
+            return success_response(_sync_summary(results), 'Nothing new to sync')
+        
+        # Step 5: All their items in one insert
+        execute_values(cur, """
+            INSERT INTO OrderItems (
+                order_id, order_date, menu_id, quantity, unit_price,
+                subtotal, customization, item_status
+            )
+            VALUES %s
+        """, [(
+            order['order_id'],
+            order['order_date'],
+            item['menu_id'],
+            item['quantity'],
+            float(menu[item['menu_id']]['price']),
+            float(menu[item['menu_id']]['price']) * item['quantity'],
+            item.get('customization'),
+            'pending'
+        ) for order in orders for item in order['items']], page_size=1000)
+        
+        # Step 6: Tables seated while offline are occupied now
+        tables = sorted({order['table_number'] for order in orders if order['table_number'] is not None})
+        for table_number in tables:
+            update_table_status(cur, table_number, 'occupied')
+        
+        publish(cur, 'orders')
+        conn.commit()
+        cur.close()
+        conn.close()
+        
+        # The orders exist now: a failure below must not turn into a 500
+        # that makes the terminal resend them
+        after_commit('Customer cache update', customer_resolver.remember, customer_ids, customers_version)
+        for table_number in tables:
+            after_commit('Table map update', occupancy.set_status, table_number, 'occupied')
+        for order in orders:
+            ordered = [dict(menu[item['menu_id']], quantity=item['quantity']) for item in order['items']]
+            after_commit('Trending update', trending.record,
+                         [(i['menu_id'], i['item_name'], i['quantity']) for i in ordered], order_id=order['order_id'])
+            ready_at = after_commit('Kitchen queue update', kitchen.add_order,
+                                    order['order_id'], order['order_token'], order['order_type'], ordered)
+            order['result'].update(
+                status='created',
+                order_id=order['order_id'],
+                order_token=order['order_token'],
+                total_amount=float(order['total_amount']),
+                estimated_ready_at=format_eta(ready_at) if ready_at else None
+            )
+        
+        print(f"✅ Synced {len(orders)} offline orders")
+        return success_response(_sync_summary(results), 'Offline orders synced')
+    except Exception as e:
+        print(f"❌ Error syncing offline orders: {e}")
+        return error_response(f"Failed to sync orders: {str(e)}", 500)
+
+def _sync_summary(results):
+    counts = {'created': 0, 'duplicate': 0, 'rejected': 0}
+    for result in results:
+        # An order repeated within one sync shares the first copy's fate
+        same_as = result.pop('same_as', None)
+        if same_as is not None:
+            result.update((k, v) for k, v in same_as.items() if k in ('order_id', 'order_token', 'error'))
+            result['status'] = 'rejected' if same_as['status'] == 'rejected' else 'duplicate'
+        counts[result['status']] += 1
+    return dict(counts, orders=results)
+
 @order_bp.route('/<int:order_id>/status', methods=['PATCH'])
 def update_order_status(order_id):
     try:
@@ -298,10 +702,11 @@ def update_order_status(order_id):
         
         cur.execute("""
             UPDATE Orders
-            SET order_status = %s
+            SET order_status = %s,
+                completed_at = CASE WHEN %s = 'completed' THEN COALESCE(completed_at, CURRENT_TIMESTAMP) END
             WHERE order_id = %s
             RETURNING order_id
-        """, (data['order_status'], order_id))
+        """, (data['order_status'], data['order_status'], order_id))
         
         result = cur.fetchone()
         
@@ -310,38 +715,36 @@ def update_order_status(order_id):
             conn.close()
             return error_response('Order not found', 404)
         
+        publish(cur, 'orders', order_id)
         conn.commit()
         cur.close()
         conn.close()
         
+        bill_cache.invalidate(order_id)
+        if data['order_status'] == 'preparing':
+            after_commit('Kitchen queue update', kitchen.start_order, order_id)
+        elif data['order_status'] in ('ready', 'completed', 'cancelled'):
+            after_commit('Kitchen queue update', kitchen.remove_order, order_id)
+        
         return success_response(None, 'Order status updated successfully')
     except Exception as e:
         print(f"Error updating order status: {e}")
         return error_response(str(e), 500)
 
 @order_bp.route('/active', methods=['GET'])
+@route_class('orders')
+@coalesce(shared=('orders', 'customers', 'menu'))
 def get_active_orders():
     try:
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("""
-            SELECT o.*, c.name as customer_name, c.phone as customer_phone
-            FROM Orders o
-            LEFT JOIN Customers c ON o.customer_id = c.customer_id
-            WHERE o.order_status IN ('pending', 'preparing', 'ready')
-            ORDER BY o.created_at ASC
-        """)
+        execute_prepared(cur, 'active_orders')
         
         orders = cur.fetchall()
         
         for order in orders:
-            cur.execute("""
-                SELECT oi.*, m.item_name
-                FROM OrderItems oi
-                JOIN Menu m ON oi.menu_id = m.menu_id
-                WHERE oi.order_id = %s
-            """, (order['order_id'],))
+            execute_prepared(cur, 'active_order_items', (order['order_id'], order['order_date']))
             order['items'] = cur.fetchall()
         
         cur.close()
@@ -352,6 +755,16 @@ def get_active_orders():
         print(f"Error fetching active orders: {e}")
         return error_response(str(e), 500)
 
+# Kitchen queue with expected ready times, soonest first
+@order_bp.route('/queue', methods=['GET'])
+@route_class('orders')
+def get_kitchen_queue():
+    try:
+        return success_response(kitchen.snapshot())
+    except Exception as e:
+        print(f"Error building kitchen queue: {e}")
+        return error_response(str(e), 500)
+
 @order_bp.route('/<int:order_id>', methods=['DELETE'])
 def cancel_order(order_id):
     try:
@@ -372,17 +785,18 @@ def cancel_order(order_id):
             conn.close()
             return error_response('Order not found', 404)
         
-        if result['order_type'] == 'dine-in' and result['table_number']:
-            cur.execute("""
-                UPDATE RestaurantTables
-                SET status = 'available'
-                WHERE table_number = %s
-            """, (result['table_number'],))
+        released = result['order_type'] == 'dine-in' and result['table_number'] and release_table(cur, result['table_number'])
+        publish(cur, 'orders', order_id)
         
         conn.commit()
         cur.close()
         conn.close()
         
+        if released:
+            after_commit('Table map update', occupancy.set_status, result['table_number'], 'available')
+        bill_cache.invalidate(order_id)
+        after_commit('Kitchen queue update', kitchen.remove_order, order_id)
+        
         return success_response(None, 'Order cancelled successfully')
     except Exception as e:
         print(f"Error cancelling order: {e}")
@@ -1,16 +1,30 @@
-from flask import Blueprint, request
-from models import get_db_connection
-from utils.helpers import success_response, error_response
+from flask import Blueprint, Response, request
+from models import get_db_connection, read_only
+from utils.helpers import success_response, error_response, compact_cursor, rows_response, RESULT_SHAPES, after_commit
+from utils.load_shedding import route_class
+from utils.coalescing import coalesce
+from utils.cache_sync import publish
+from utils.prepared import execute_prepared
+from services.tables import occupancy, release_table
+from utils.work_queue import enqueue, work_queue
+from services.billing import bill_cache, build_bill, RENDERERS
+from services.kitchen import kitchen
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
 payment_bp = Blueprint('payment', __name__, url_prefix='/api/payments')
 
 # GET all payments
 @payment_bp.route('/', methods=['GET'])
+@read_only
 def get_all_payments():
     try:
+        shape = request.args.get('shape', 'objects')
+        if shape not in RESULT_SHAPES:
+            return error_response(f'Invalid shape. Must be one of: {list(RESULT_SHAPES)}', 400)
+        
         conn = get_db_connection()
-        cur = conn.cursor()
+        cur = compact_cursor(conn)
         
         date = request.args.get('date')
         payment_method = request.args.get('payment_method')
@@ -18,15 +32,15 @@ def get_all_payments():
         query = """
             SELECT p.*, o.order_token, c.name as customer_name
             FROM Payments p
-            JOIN Orders o ON p.order_id = o.order_id
+            JOIN Orders o ON p.order_id = o.order_id AND p.order_date = o.order_date
             LEFT JOIN Customers c ON o.customer_id = c.customer_id
             WHERE 1=1
         """
         params = []
         
         if date:
-            query += " AND DATE(p.payment_date) = %s"
-            params.append(date)
+            query += " AND p.payment_date >= %s::date AND p.payment_date < %s::date + 1"
+            params.extend([date, date])
         
         if payment_method:
             query += " AND p.payment_method = %s"
@@ -35,11 +49,11 @@ def get_all_payments():
         query += " ORDER BY p.payment_date DESC"
         
         cur.execute(query, params)
-        payments = cur.fetchall()
+        response = rows_response(cur, shape)
         cur.close()
         conn.close()
         
-        return success_response(payments)
+        return response
     except Exception as e:
         return error_response(str(e), 500)
 
@@ -53,7 +67,7 @@ def get_payment(payment_id):
         cur.execute("""
             SELECT p.*, o.order_token, c.name as customer_name, c.phone as customer_phone
             FROM Payments p
-            JOIN Orders o ON p.order_id = o.order_id
+            JOIN Orders o ON p.order_id = o.order_id AND p.order_date = o.order_date
             LEFT JOIN Customers c ON o.customer_id = c.customer_id
             WHERE p.payment_id = %s
         """, (payment_id,))
@@ -75,12 +89,7 @@ def get_payment_by_order(order_id):
         conn = get_db_connection()
         cur = conn.cursor()
         
-        cur.execute("""
-            SELECT p.*, o.order_token
-            FROM Payments p
-            JOIN Orders o ON p.order_id = o.order_id
-            WHERE p.order_id = %s
-        """, (order_id,))
+        execute_prepared(cur, 'payment_by_order', (order_id,))
         
         payment = cur.fetchone()
         cur.close()
@@ -106,7 +115,8 @@ def create_payment():
         
         # Get order details
         cur.execute("""
-            SELECT subtotal, gst_amount, service_charge, total_amount, order_status
+            SELECT subtotal, gst_amount, service_charge, total_amount, order_status,
+                   order_type, table_number, order_date, customer_id
             FROM Orders
             WHERE order_id = %s
         """, (data['order_id'],))
@@ -124,7 +134,7 @@ def create_payment():
             return error_response('Cannot process payment for cancelled order', 400)
         
         # Check if payment already exists
-        cur.execute("SELECT payment_id FROM Payments WHERE order_id = %s", (data['order_id'],))
+        execute_prepared(cur, 'payment_id_by_order', (data['order_id'],))
         existing_payment = cur.fetchone()
         
         if existing_payment:
@@ -132,26 +142,33 @@ def create_payment():
             conn.close()
             return error_response('Payment already processed for this order', 400)
         
-        # Calculate change if cash payment
-        amount_received = data.get('amount_received', order['total_amount'])
-        change_returned = 0
+        # Calculate change if cash payment (the POS form sends amount_paid)
+        try:
+            amount_received = Decimal(str(data.get('amount_received', data.get('amount_paid', order['total_amount']))))
+        except InvalidOperation:
+            cur.close()
+            conn.close()
+            return error_response('amount_received must be a number', 400)
+        change_returned = Decimal('0')
         
         if data['payment_method'] == 'cash' and amount_received > order['total_amount']:
             change_returned = amount_received - order['total_amount']
         
-        # Insert payment
+        # Insert payment; amount_paid is what settled the bill
         cur.execute("""
-            INSERT INTO Payments (order_id, subtotal, gst_amount, service_charge, 
-                                 total_amount, payment_method, amount_received, change_returned)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO Payments (order_id, order_date, subtotal, gst_amount, service_charge, 
+                                 total_amount, payment_method, amount_paid, amount_received, change_returned)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING payment_id
         """, (
             data['order_id'],
+            order['order_date'],
             order['subtotal'],
             order['gst_amount'],
             order['service_charge'],
             order['total_amount'],
             data['payment_method'],
+            order['total_amount'],
             amount_received,
             change_returned
         ))
@@ -162,31 +179,31 @@ def create_payment():
         cur.execute("""
             UPDATE Orders 
             SET order_status = 'completed', completed_at = CURRENT_TIMESTAMP
-            WHERE order_id = %s
-        """, (data['order_id'],))
+            WHERE order_id = %s AND order_date = %s
+        """, (data['order_id'], order['order_date']))
         
-        # Update customer stats
-        cur.execute("""
-            UPDATE Customers
-            SET total_orders = total_orders + 1,
-                total_spent = total_spent + %s
-            WHERE customer_id = (SELECT customer_id FROM Orders WHERE order_id = %s)
-        """, (order['total_amount'], data['order_id']))
+        # Customer stats are not needed to settle the bill; the outbox
+        # worker applies them after commit
+        enqueue(cur, 'customer_stats', {
+            'customer_id': order['customer_id'],
+            'amount': str(order['total_amount'])
+        }, dedupe_key=f"customer_stats:{payment_id}")
         
-        # Free up table if dine-in
-        cur.execute("""
-            UPDATE RestaurantTables
-            SET status = 'available'
-            WHERE table_number = (
-                SELECT table_number FROM Orders 
-                WHERE order_id = %s AND order_type = 'dine-in'
-            )
-        """, (data['order_id'],))
+        # Free up table if dine-in, unless the party has another round open
+        released = order['order_type'] == 'dine-in' and order['table_number'] and release_table(cur, order['table_number'])
+        publish(cur, 'payments', data['order_id'])
+        publish(cur, 'orders', data['order_id'])
         
         conn.commit()
         cur.close()
         conn.close()
         
+        if released:
+            after_commit('Table map update', occupancy.set_status, order['table_number'], 'available')
+        bill_cache.invalidate(data['order_id'])
+        after_commit('Kitchen queue update', kitchen.remove_order, data['order_id'])
+        work_queue.notify()
+        
         return success_response({
             'payment_id': payment_id,
             'change_returned': float(change_returned)
@@ -196,25 +213,46 @@ def create_payment():
 
 # NEW: Generate bill preview (without processing payment)
 @payment_bp.route('/bill/<int:order_id>', methods=['GET'])
+@route_class('orders')
 def generate_bill(order_id):
     try:
-        conn = get_db_connection()
+        fmt = request.args.get('format', 'json')
+        if fmt not in RENDERERS:
+            return error_response(f'Invalid format. Must be one of: {list(RENDERERS)}', 400)
+        
+        bill = bill_cache.get(order_id, fmt)
+        if bill is None:
+            version = bill_cache.version(order_id)
+            bill = load_bill(order_id)
+            if bill is None:
+                return error_response('Order not found', 404)
+            bill_cache.put(order_id, version, bill)
+            bill = RENDERERS[fmt](bill)
+        
+        if fmt == 'text':
+            return Response(bill, mimetype='text/plain')
+        if fmt == 'escpos':
+            return Response(bill, mimetype='application/octet-stream', headers={
+                'Content-Disposition': f'attachment; filename=bill-{order_id}.bin'
+            })
+        return success_response(bill)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+def load_bill(order_id):
+    """Build a bill from the database; None if the order does not exist"""
+    conn = get_db_connection()
+    try:
         cur = conn.cursor()
         
         # Get order details
-        cur.execute("""
-            SELECT o.*, c.name as customer_name, c.phone as customer_phone
-            FROM Orders o
-            LEFT JOIN Customers c ON o.customer_id = c.customer_id
-            WHERE o.order_id = %s
-        """, (order_id,))
+        execute_prepared(cur, 'order_by_id', (order_id,))
         
         order = cur.fetchone()
         
         if not order:
             cur.close()
-            conn.close()
-            return error_response('Order not found', 404)
+            return None
         
         # Get order items
         cur.execute("""
@@ -222,36 +260,19 @@ def generate_bill(order_id):
                    m.item_name, m.category
             FROM OrderItems oi
             JOIN Menu m ON oi.menu_id = m.menu_id
-            WHERE oi.order_id = %s
-        """, (order_id,))
+            WHERE oi.order_id = %s AND oi.order_date = %s
+        """, (order_id, order['order_date']))
         
         items = cur.fetchall()
         cur.close()
-        conn.close()
         
-        bill = {
-            'order_id': order['order_id'],
-            'order_token': order['order_token'],
-            'order_type': order['order_type'],
-            'table_number': order['table_number'],
-            'customer_name': order['customer_name'],
-            'customer_phone': order['customer_phone'],
-            'items': items,
-            'subtotal': float(order['subtotal']),
-            'gst_amount': float(order['gst_amount']),
-            'gst_percentage': 5,
-            'service_charge': float(order['service_charge']),
-            'service_charge_percentage': 10 if order['order_type'] == 'dine-in' else 0,
-            'total_amount': float(order['total_amount']),
-            'order_date': order['created_at'].strftime('%Y-%m-%d %H:%M:%S') if order['created_at'] else None
-        }
-        
-        return success_response(bill)
-    except Exception as e:
-        return error_response(str(e), 500)
+        return build_bill(order, items)
+    finally:
+        conn.close()
 
 # NEW: Today's payment summary
 @payment_bp.route('/summary/today', methods=['GET'])
+@coalesce(shared=('payments',))
 def get_today_summary():
     try:
         conn = get_db_connection()
@@ -265,7 +286,7 @@ def get_today_summary():
                 SUM(CASE WHEN payment_method = 'card' THEN total_amount ELSE 0 END) as card_total,
                 SUM(CASE WHEN payment_method = 'upi' THEN total_amount ELSE 0 END) as upi_total
             FROM Payments
-            WHERE DATE(payment_date) = CURRENT_DATE
+            WHERE payment_date >= CURRENT_DATE AND payment_date < CURRENT_DATE + 1
         """)
         
         summary = cur.fetchone()
@@ -1,12 +1,34 @@
 from flask import Blueprint, request
-from models import get_db_connection
+from models import get_db_connection, read_only
 from utils.helpers import success_response, error_response
+from utils.coalescing import coalesce
+from utils.load_shedding import route_class
+from services.analytics import analytics, np
+from services.trending import trending, WINDOWS
 from datetime import datetime, timedelta
 
 report_bp = Blueprint('report', __name__, url_prefix='/api/reports')
 
+# What's selling right now: top items over a sliding window
+@report_bp.route('/trending', methods=['GET'])
+@route_class(None)  # served from memory, never queues for the database
+def get_trending_items():
+    try:
+        window = request.args.get('window', '1h')
+        limit = request.args.get('limit', 10, type=int)
+        if window not in WINDOWS:
+            return error_response(f"window must be one of: {', '.join(WINDOWS)}", 400)
+        
+        return success_response({
+            'window': window,
+            'items': trending.top(window, max(1, min(limit, trending.capacity)))
+        })
+    except Exception as e:
+        return error_response(str(e), 500)
+
 # Daily sales report
 @report_bp.route('/daily-sales', methods=['GET'])
+@read_only
 def get_daily_sales():
     try:
         date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
@@ -24,7 +46,7 @@ def get_daily_sales():
                 SUM(CASE WHEN o.order_type = 'dine-in' THEN o.total_amount ELSE 0 END) as dine_in_revenue,
                 SUM(CASE WHEN o.order_type = 'takeaway' THEN o.total_amount ELSE 0 END) as takeaway_revenue
             FROM Orders o
-            WHERE DATE(o.order_date) = %s AND o.order_status = 'completed'
+            WHERE o.order_date = %s AND o.order_status = 'completed'
         """, (date,))
         
         sales = cur.fetchone()
@@ -37,6 +59,7 @@ def get_daily_sales():
 
 # Popular items
 @report_bp.route('/popular-items', methods=['GET'])
+@read_only
 def get_popular_items():
     try:
         start_date = request.args.get('start_date', (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d'))
@@ -58,13 +81,14 @@ def get_popular_items():
                 SUM(oi.subtotal) as total_revenue
             FROM OrderItems oi
             JOIN Menu m ON oi.menu_id = m.menu_id
-            JOIN Orders o ON oi.order_id = o.order_id
-            WHERE DATE(o.order_date) BETWEEN %s AND %s
+            JOIN Orders o ON oi.order_id = o.order_id AND oi.order_date = o.order_date
+            WHERE o.order_date BETWEEN %s AND %s
+              AND oi.order_date BETWEEN %s AND %s
               AND o.order_status = 'completed'
             GROUP BY m.menu_id, m.item_name, m.category, m.cuisine, m.price
             ORDER BY total_quantity DESC
             LIMIT %s
-        """, (start_date, end_date, limit))
+        """, (start_date, end_date, start_date, end_date, limit))
         
         items = cur.fetchall()
         cur.close()
@@ -76,6 +100,7 @@ def get_popular_items():
 
 # Revenue by cuisine
 @report_bp.route('/revenue-by-cuisine', methods=['GET'])
+@read_only
 def get_revenue_by_cuisine():
     try:
         start_date = request.args.get('start_date', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
@@ -93,12 +118,13 @@ def get_revenue_by_cuisine():
                 AVG(oi.subtotal) as avg_item_value
             FROM OrderItems oi
             JOIN Menu m ON oi.menu_id = m.menu_id
-            JOIN Orders o ON oi.order_id = o.order_id
-            WHERE DATE(o.order_date) BETWEEN %s AND %s
+            JOIN Orders o ON oi.order_id = o.order_id AND oi.order_date = o.order_date
+            WHERE o.order_date BETWEEN %s AND %s
+              AND oi.order_date BETWEEN %s AND %s
               AND o.order_status = 'completed'
             GROUP BY m.cuisine
             ORDER BY total_revenue DESC
-        """, (start_date, end_date))
+        """, (start_date, end_date, start_date, end_date))
         
         cuisines = cur.fetchall()
         cur.close()
@@ -110,6 +136,7 @@ def get_revenue_by_cuisine():
 
 # Peak hours analysis
 @report_bp.route('/peak-hours', methods=['GET'])
+@read_only
 def get_peak_hours():
     try:
         date = request.args.get('date', datetime.now().strftime('%Y-%m-%d'))
@@ -123,7 +150,7 @@ def get_peak_hours():
                 COUNT(*) as order_count,
                 SUM(total_amount) as revenue
             FROM Orders
-            WHERE DATE(order_date) = %s AND order_status = 'completed'
+            WHERE order_date = %s AND order_status = 'completed'
             GROUP BY EXTRACT(HOUR FROM created_at)
             ORDER BY hour
         """, (date,))
@@ -138,6 +165,7 @@ def get_peak_hours():
 
 # Payment method breakdown
 @report_bp.route('/payment-methods', methods=['GET'])
+@read_only
 def get_payment_methods():
     try:
         start_date = request.args.get('start_date', datetime.now().strftime('%Y-%m-%d'))
@@ -153,7 +181,7 @@ def get_payment_methods():
                 SUM(total_amount) as total_amount,
                 AVG(total_amount) as avg_transaction_value
             FROM Payments
-            WHERE DATE(payment_date) BETWEEN %s AND %s
+            WHERE payment_date >= %s::date AND payment_date < %s::date + 1
             GROUP BY payment_method
             ORDER BY total_amount DESC
         """, (start_date, end_date))
@@ -168,6 +196,7 @@ def get_payment_methods():
 
 # NEW: Weekly comparison
 @report_bp.route('/weekly-comparison', methods=['GET'])
+@read_only
 def get_weekly_comparison():
     try:
         conn = get_db_connection()
@@ -180,7 +209,7 @@ def get_weekly_comparison():
                 COUNT(*) as orders,
                 SUM(total_amount) as revenue
             FROM Orders
-            WHERE order_date >= CURRENT_DATE - INTERVAL '7 days'
+            WHERE order_date BETWEEN CURRENT_DATE - 7 AND CURRENT_DATE
               AND order_status = 'completed'
             GROUP BY DATE(order_date), TO_CHAR(order_date, 'Day')
             ORDER BY DATE(order_date)
@@ -196,6 +225,8 @@ def get_weekly_comparison():
 
 # NEW: Order status summary
 @report_bp.route('/order-status', methods=['GET'])
+@read_only
+@coalesce(shared=('orders',))
 def get_order_status_summary():
     try:
         conn = get_db_connection()
@@ -207,7 +238,7 @@ def get_order_status_summary():
                 COUNT(*) as count,
                 SUM(total_amount) as total_value
             FROM Orders
-            WHERE DATE(order_date) = CURRENT_DATE
+            WHERE order_date = CURRENT_DATE
             GROUP BY order_status
         """)
         
@@ -218,3 +249,27 @@ def get_order_status_summary():
         return success_response(status)
     except Exception as e:
         return error_response(str(e), 500)
+
+# Ad-hoc group-by over the in-memory order/item facts
+@report_bp.route('/query', methods=['GET'])
+@read_only
+def query_reports():
+    if np is None:
+        return error_response('Ad-hoc reports need numpy installed on the server', 501)
+    try:
+        split = lambda name: [v for v in request.args.get(name, '').split(',') if v] or None
+        start_date = datetime.strptime(request.args.get('start_date', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.args.get('end_date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+        result = analytics.query(
+            group_by=split('group_by') or [],
+            metrics=split('metrics') or ['orders', 'revenue'],
+            start_date=start_date,
+            end_date=end_date,
+            order_types=split('order_type'),
+            statuses=split('status')
+        )
+        return success_response(result)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    except Exception as e:
+        return error_response(str(e), 500)
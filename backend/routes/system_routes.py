@@ -0,0 +1,53 @@
+from flask import Blueprint, current_app, jsonify
+from utils.helpers import success_response, error_response
+from utils.work_queue import work_queue
+from utils.health import db_probe, cache_state, backlog, uptime
+from models import pool_stats
+import os
+
+system_bp = Blueprint('system', __name__, url_prefix='/api/system')
+
+# Outbox depth, lag and worker counters
+@system_bp.route('/queue', methods=['GET'])
+def get_queue_stats():
+    try:
+        return success_response(work_queue.stats())
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# In-flight and shed requests per load class
+@system_bp.route('/load', methods=['GET'])
+def get_load_stats():
+    try:
+        return success_response(current_app.extensions['load_shedder'].stats())
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# Liveness probe: answers from memory, never touches the database
+@system_bp.route('/live', methods=['GET'])
+def get_liveness():
+    return success_response({'pid': os.getpid(), 'uptime_seconds': uptime()}, 'Alive')
+
+# Readiness probe: 503 until warm_up() has finished and while the database is unreachable
+@system_bp.route('/ready', methods=['GET'])
+def get_readiness():
+    """
+    Uses a pooled connection and a short-TTL cached SELECT 1 (see
+    utils/health.py), so probes every few seconds from every worker cost
+    at most one query per HEALTH_DB_TTL per process.
+    """
+    warmup = current_app.extensions.get('warmup', {'ready': False, 'steps': {}})
+    database = db_probe.check()
+    data = {
+        'warm': warmup['ready'],
+        'warmup': warmup,
+        'database': database,
+        'pools': pool_stats(),
+        'caches': cache_state(),
+        'backlog': backlog(current_app),
+        'uptime_seconds': uptime(),
+    }
+    if warmup['ready'] and database['ok'] is not False:
+        return success_response(data, 'Ready')
+    message = 'Warming up' if not warmup['ready'] else 'Database unavailable'
+    return jsonify({'status': 'error', 'message': message, 'data': data}), 503
@@ -0,0 +1,104 @@
+from flask import Blueprint, request
+from models import get_db_connection
+from utils.helpers import success_response, error_response
+from services.tables import occupancy, update_table_status, claim_table, TABLE_STATUSES
+
+table_bp = Blueprint('table', __name__, url_prefix='/api/tables')
+
+# GET all tables (served from the in-memory occupancy map)
+@table_bp.route('/', methods=['GET'])
+def get_all_tables():
+    try:
+        status = request.args.get('status')
+        if status and status not in TABLE_STATUSES:
+            return error_response(f'Invalid status. Must be one of: {TABLE_STATUSES}', 400)
+
+        return success_response(occupancy.all(status))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# GET free tables for a party size
+@table_bp.route('/available', methods=['GET'])
+def get_available_tables():
+    try:
+        guests = request.args.get('guests', 1, type=int)
+        if guests < 1:
+            return error_response('guests must be at least 1', 400)
+
+        return success_response(occupancy.free_for(guests))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# GET single table
+@table_bp.route('/<int:table_number>', methods=['GET'])
+def get_table(table_number):
+    try:
+        table = occupancy.get(table_number)
+        if table:
+            return success_response(table)
+        return error_response('Table not found', 404)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# Seat a party at a table
+@table_bp.route('/<int:table_number>/seat', methods=['PATCH'])
+def seat_table(table_number):
+    try:
+        data = request.get_json(silent=True) or {}
+
+        table = occupancy.get(table_number)
+        if not table:
+            return error_response('Table not found', 404)
+
+        try:
+            guests = int(data.get('guests', 1))
+        except (TypeError, ValueError):
+            return error_response('guests must be an integer', 400)
+        if guests < 1:
+            return error_response('guests must be at least 1', 400)
+        if guests > table['seating_capacity']:
+            return error_response(f"Table {table_number} seats only {table['seating_capacity']} guests", 400)
+
+        if table['status'] != 'available':
+            return error_response(f"Table {table_number} is already {table['status']}", 409)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        claimed = claim_table(cur, table_number, 'seated')
+        conn.commit()
+        cur.close()
+        conn.close()
+
+        if not claimed:
+            occupancy.refresh([table_number])
+            return error_response(f"Table {table_number} is already {occupancy.get(table_number)['status']}", 409)
+
+        occupancy.set_status(table_number, 'seated')
+        return success_response(occupancy.get(table_number), 'Table seated')
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# UPDATE table status (release, reserve, maintenance)
+@table_bp.route('/<int:table_number>/status', methods=['PATCH'])
+def update_status(table_number):
+    try:
+        data = request.get_json()
+
+        if data.get('status') not in TABLE_STATUSES:
+            return error_response(f'Invalid status. Must be one of: {TABLE_STATUSES}', 400)
+
+        if not occupancy.get(table_number):
+            return error_response('Table not found', 404)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        update_table_status(cur, table_number, data['status'])
+        conn.commit()
+        cur.close()
+        conn.close()
+
+        occupancy.set_status(table_number, data['status'])
+
+        return success_response(occupancy.get(table_number), 'Table status updated')
+    except Exception as e:
+        return error_response(str(e), 500)
@@ -0,0 +1,364 @@
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from psycopg2.extensions import cursor as TupleCursor
+from config import Config
+from models import get_db_connection
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; /api/reports/query answers 501 without it
+    np = None
+
+ORDER_TYPES = ['dine-in', 'takeaway']
+STATUSES = ['pending', 'preparing', 'ready', 'completed', 'cancelled']
+CATEGORIES = ['appetizer', 'main', 'dessert', 'beverage']
+CUISINES = ['north-indian', 'south-indian', 'chinese', 'italian', 'continental', 'desserts', 'beverages', 'starters']
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Dimensions that need item rows (everything else is answered from order rows)
+ITEM_DIMENSIONS = {'category', 'cuisine', 'menu_item'}
+ORDER_DIMENSIONS = {'date', 'weekday', 'hour', 'order_type', 'status', 'table'}
+METRICS = ('orders', 'revenue', 'quantity', 'avg_order_value')
+
+BUCKET = re.compile(r'^bucket:(\d+)([mhd])$')
+BUCKET_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+MAX_GROUPS = 100000
+
+
+def _code(vocab, value):
+    """Index of value in a vocabulary list, extending it for unseen values"""
+    try:
+        return vocab.index(value)
+    except ValueError:
+        vocab.append(value)
+        return len(vocab) - 1
+
+
+class _Columns:
+    """Fixed set of growable NumPy columns that always have the same length"""
+
+    def __init__(self, dtypes, capacity=1024):
+        self.size = 0
+        self._data = {name: np.zeros(capacity, dtype) for name, dtype in dtypes.items()}
+
+    def append(self, columns):
+        n = len(next(iter(columns.values())))
+        needed = self.size + n
+        capacity = len(next(iter(self._data.values())))
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name, array in self._data.items():
+                grown = np.zeros(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self._data[name] = grown
+        for name, values in columns.items():
+            self._data[name][self.size:needed] = values
+        self.size = needed
+
+    def set(self, name, rows, values):
+        self._data[name][rows] = values
+
+    def view(self):
+        return {name: array[:self.size] for name, array in self._data.items()}
+
+
+class AnalyticsEngine:
+    """
+    Columnar copy of recent order and item facts for ad-hoc group-by queries
+
+    Order rows and item rows live in NumPy arrays; item rows point at their
+    order row, so order attributes (status, type, time) are gathered rather
+    than duplicated. refresh() follows Orders.change_xid the way
+    GET /api/orders/changes does, appending new orders with their items and
+    overwriting status and totals of changed ones in place.
+    """
+
+    def __init__(self, days=400, refresh_seconds=30, batch_size=50000):
+        self.days = days
+        self.refresh_seconds = refresh_seconds
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._orders = None
+        self._items = None
+        self._order_rows = {}
+        self._menu_category = None
+        self._menu_cuisine = None
+        self._menu_names = {}
+        self._cursor = 0
+        self.refreshed_at = None
+        self.window_start = None
+
+    def _reset(self):
+        self._orders = _Columns({
+            'order_id': np.int64, 'created': np.int64, 'order_date': np.int32,
+            'order_type': np.int8, 'status': np.int8, 'table': np.int32, 'total': np.float64
+        })
+        self._items = _Columns({
+            'order_row': np.int32, 'menu_id': np.int32, 'quantity': np.int32, 'subtotal': np.float64
+        })
+        self._order_rows = {}
+        self._cursor = 0
+        self.window_start = date.today() - timedelta(days=self.days)
+
+    def ensure_fresh(self):
+        with self._lock:
+            stale = self.refreshed_at is None or time.time() - self.refreshed_at >= self.refresh_seconds
+            if stale:
+                self._refresh()
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        if self._orders is None or self.window_start < date.today() - timedelta(days=self.days + 30):
+            # First load, or a month's worth of expired history to drop
+            self._reset()
+
+        conn = get_db_connection(read_only=True)
+        cur = conn.cursor(cursor_factory=TupleCursor)
+        try:
+            self._load_menu(cur)
+            # Only transactions below the oldest one still running, so a slow
+            # writer cannot commit under the cursor. Batches page on
+            # (change_xid, order_id) and may split a transaction; the cursor
+            # moves only once every batch is in.
+            since = (self._cursor, 0)
+            while True:
+                cur.execute("""
+                    SELECT order_id, created_at, order_date, order_type, order_status,
+                           table_number, total_amount, change_xid
+                    FROM Orders
+                    WHERE (change_xid, order_id) > (%s::text::xid8, %s)
+                      AND change_xid < pg_snapshot_xmin(pg_current_snapshot())
+                      AND order_date >= %s
+                    ORDER BY change_xid, order_id
+                    LIMIT %s
+                """, (*since, self.window_start, self.batch_size))
+                rows = cur.fetchall()
+                if rows:
+                    self._apply_orders(cur, rows)
+                    since = (rows[-1][-1], rows[-1][0])
+                if len(rows) < self.batch_size:
+                    break
+            self._cursor = since[0]
+            conn.rollback()
+        finally:
+            cur.close()
+            conn.close()
+        self.refreshed_at = time.time()
+
+    def _load_menu(self, cur):
+        cur.execute("SELECT menu_id, item_name, category, cuisine FROM Menu")
+        menu = cur.fetchall()
+        size = max([row[0] for row in menu], default=0) + 1
+        self._menu_category = np.zeros(size, np.int8)
+        self._menu_cuisine = np.zeros(size, np.int8)
+        self._menu_names = {}
+        for menu_id, name, category, cuisine in menu:
+            self._menu_category[menu_id] = _code(CATEGORIES, category)
+            self._menu_cuisine[menu_id] = _code(CUISINES, cuisine)
+            self._menu_names[menu_id] = name
+
+    def _apply_orders(self, cur, rows):
+        columns = {
+            'order_id': [row[0] for row in rows],
+            'created': [row[1] or datetime.combine(row[2], datetime.min.time()) for row in rows],
+            'order_date': [row[2] for row in rows],
+            'order_type': [_code(ORDER_TYPES, row[3]) for row in rows],
+            'status': [_code(STATUSES, row[4]) for row in rows],
+            'table': [row[5] or 0 for row in rows],
+            'total': [float(row[6] or 0) for row in rows]
+        }
+        columns['created'] = np.array(columns['created'], dtype='datetime64[s]').astype(np.int64)
+        columns['order_date'] = np.array(columns['order_date'], dtype='datetime64[D]').astype(np.int32)
+
+        existing = [(i, self._order_rows[order_id]) for i, order_id in enumerate(columns['order_id'])
+                    if order_id in self._order_rows]
+        if existing:
+            positions, order_rows = map(list, zip(*existing))
+            for name in ('status', 'table', 'total'):
+                self._orders.set(name, order_rows, np.asarray(columns[name])[positions])
+
+        fresh = [i for i, order_id in enumerate(columns['order_id']) if order_id not in self._order_rows]
+        if not fresh:
+            return
+        first_row = self._orders.size
+        self._orders.append({name: np.asarray(values)[fresh] for name, values in columns.items()})
+        new_ids = [columns['order_id'][i] for i in fresh]
+        for offset, order_id in enumerate(new_ids):
+            self._order_rows[order_id] = first_row + offset
+
+        new_dates = [rows[i][2] for i in fresh]
+        cur.execute("""
+            SELECT order_id, menu_id, quantity, subtotal
+            FROM OrderItems
+            WHERE order_id = ANY(%s) AND order_date BETWEEN %s AND %s
+        """, (new_ids, min(new_dates), max(new_dates)))
+        items = cur.fetchall()
+        if items:
+            self._items.append({
+                'order_row': [self._order_rows[item[0]] for item in items],
+                'menu_id': [item[1] for item in items],
+                'quantity': [item[2] for item in items],
+                'subtotal': [float(item[3]) for item in items]
+            })
+
+    def query(self, group_by, metrics, start_date, end_date, order_types=None, statuses=None):
+        """
+        Group order (or item) facts and aggregate them
+
+        Args:
+            group_by: dimension names, e.g. ['bucket:15m'], ['weekday', 'hour'],
+                ['cuisine', 'order_type']
+            metrics: subset of METRICS
+            start_date, end_date: inclusive date range (dates)
+            order_types, statuses: optional filters; cancelled orders are
+                excluded unless statuses says otherwise
+
+        Returns:
+            dict with the result rows plus what was scanned
+
+        Raises:
+            ValueError for unknown dimensions, metrics or filter values
+        """
+        for dimension in group_by:
+            if dimension not in ITEM_DIMENSIONS | ORDER_DIMENSIONS and not BUCKET.match(dimension):
+                raise ValueError(f"Unknown dimension '{dimension}'")
+        for metric in metrics:
+            if metric not in METRICS:
+                raise ValueError(f"Unknown metric '{metric}'. Use: {', '.join(METRICS)}")
+        if statuses is None:
+            statuses = [s for s in STATUSES if s != 'cancelled']
+        for value, allowed in [(s, STATUSES) for s in statuses] + [(t, ORDER_TYPES) for t in order_types or []]:
+            if value not in allowed:
+                raise ValueError(f"Unknown filter value '{value}'. Use: {', '.join(allowed)}")
+
+        self.ensure_fresh()
+        started = time.perf_counter()
+
+        with self._lock:
+            orders = self._orders.view()
+            items = self._items.view()
+            n_orders = len(orders['order_id'])
+
+            first_day = np.datetime64(start_date, 'D').astype(np.int64)
+            last_day = np.datetime64(end_date, 'D').astype(np.int64)
+            order_mask = (orders['order_date'] >= first_day) & (orders['order_date'] <= last_day)
+            order_mask &= np.isin(orders['status'], [_code(STATUSES, s) for s in statuses])
+            if order_types:
+                order_mask &= np.isin(orders['order_type'], [_code(ORDER_TYPES, t) for t in order_types])
+
+            item_grain = bool(ITEM_DIMENSIONS.intersection(group_by)) or 'quantity' in metrics
+            if item_grain:
+                item_mask = order_mask[items['order_row']]
+                order_row = items['order_row'][item_mask]
+                menu_id = items['menu_id'][item_mask]
+                revenue = items['subtotal'][item_mask]
+                quantity = items['quantity'][item_mask]
+            else:
+                order_row = np.flatnonzero(order_mask)
+                revenue = orders['total'][order_row]
+                quantity = None
+
+            # Mixed-radix group key: key = ((c0 * n1) + c1) * n2 + c2 ...
+            key = np.zeros(len(order_row), np.int64)
+            decoders = []
+            radix = 1
+            for dimension in group_by:
+                if dimension in ITEM_DIMENSIONS:
+                    codes, size, label = self._item_dimension(dimension, menu_id)
+                else:
+                    codes, size, label = self._order_dimension(dimension, orders, order_row, first_day)
+                radix *= size
+                if radix > 2 ** 62:
+                    raise ValueError('Too many group combinations; use coarser buckets or fewer dimensions')
+                key = key * size + codes
+                decoders.append((dimension, size, label))
+
+            groups, inverse = np.unique(key, return_inverse=True)
+            if len(groups) > MAX_GROUPS:
+                raise ValueError(f"Query produces {len(groups)} groups (limit {MAX_GROUPS})")
+
+            values = {}
+            if 'orders' in metrics or 'avg_order_value' in metrics:
+                if item_grain:
+                    pairs = np.unique(inverse.astype(np.int64) * max(n_orders, 1) + order_row)
+                    values['orders'] = np.bincount(pairs // max(n_orders, 1), minlength=len(groups))
+                else:
+                    values['orders'] = np.bincount(inverse, minlength=len(groups))
+            if 'revenue' in metrics or 'avg_order_value' in metrics:
+                values['revenue'] = np.bincount(inverse, weights=revenue, minlength=len(groups))
+            if 'quantity' in metrics:
+                values['quantity'] = np.bincount(inverse, weights=quantity, minlength=len(groups))
+            if 'avg_order_value' in metrics:
+                values['avg_order_value'] = values['revenue'] / np.maximum(values['orders'], 1)
+
+            labels = {}
+            remainder = groups.copy()
+            for dimension, size, label in reversed(decoders):
+                labels[dimension] = [label(int(code)) for code in remainder % size]
+                remainder //= size
+
+            rows = []
+            for i in range(len(groups)):
+                row = {dimension: labels[dimension][i] for dimension in group_by}
+                for metric in metrics:
+                    value = values[metric][i]
+                    row[metric] = int(value) if metric in ('orders', 'quantity') else round(float(value), 2)
+                rows.append(row)
+
+            return {
+                'group_by': group_by,
+                'metrics': metrics,
+                'grain': 'items' if item_grain else 'orders',
+                'rows': rows,
+                'rows_scanned': len(order_row),
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+                'refreshed_at': datetime.fromtimestamp(self.refreshed_at).strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+    def _order_dimension(self, dimension, orders, order_row, first_day):
+        created = orders['created'][order_row]
+        bucket = BUCKET.match(dimension)
+        if bucket:
+            width = int(bucket.group(1)) * BUCKET_SECONDS[bucket.group(2)]
+            if width <= 0:
+                raise ValueError('Bucket width must be positive')
+            origin = int(first_day) * 86400
+            codes = np.maximum(created - origin, 0) // width
+            size = int(codes.max()) + 1 if len(codes) else 1
+            return codes, size, lambda c: str(np.datetime64(origin + c * width, 's')).replace('T', ' ')
+        if dimension == 'date':
+            codes = orders['order_date'][order_row].astype(np.int64) - int(first_day)
+            size = int(codes.max()) + 1 if len(codes) else 1
+            return codes, size, lambda c: str(np.datetime64(int(first_day) + c, 'D'))
+        if dimension == 'weekday':
+            # 1970-01-01 was a Thursday
+            return (created // 86400 + 3) % 7, 7, lambda c: WEEKDAYS[c]
+        if dimension == 'hour':
+            return created % 86400 // 3600, 24, lambda c: c
+        if dimension == 'order_type':
+            return orders['order_type'][order_row].astype(np.int64), len(ORDER_TYPES), lambda c: ORDER_TYPES[c]
+        if dimension == 'status':
+            return orders['status'][order_row].astype(np.int64), len(STATUSES), lambda c: STATUSES[c]
+        tables = orders['table'][order_row].astype(np.int64)
+        return tables, int(tables.max()) + 1 if len(tables) else 1, lambda c: c or None
+
+    def _item_dimension(self, dimension, menu_id):
+        if dimension == 'category':
+            return self._menu_category[menu_id].astype(np.int64), len(CATEGORIES), lambda c: CATEGORIES[c]
+        if dimension == 'cuisine':
+            return self._menu_cuisine[menu_id].astype(np.int64), len(CUISINES), lambda c: CUISINES[c]
+        codes = menu_id.astype(np.int64)
+        return codes, len(self._menu_category), lambda c: self._menu_names.get(c, f'#{c}')
+
+
+analytics = AnalyticsEngine(
+    days=getattr(Config, 'ANALYTICS_DAYS', 400),
+    refresh_seconds=getattr(Config, 'ANALYTICS_REFRESH_SECONDS', 30)
+)
@@ -0,0 +1,184 @@
+import threading
+from collections import OrderedDict
+from config import Config
+
+GST_PERCENTAGE = 5
+DINE_IN_SERVICE_PERCENTAGE = 10
+
+# ESC/POS control sequences
+ESC_INIT = b'\x1b@'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_DOUBLE_ON = b'\x1d!\x11'
+ESC_DOUBLE_OFF = b'\x1d!\x00'
+ESC_FEED_CUT = b'\x1bd\x04\x1dV\x00'
+
+
+class BillCache:
+    """
+    Bounded LRU of rendered bills keyed by (order_id, order_version)
+
+    An order's version goes up on every invalidate(order_id), and every
+    order's version goes up on clear(), so a lookup is a single dictionary
+    probe, and a bill rendered from data that changed mid-flight is stored
+    under a version that is never asked for again.
+
+    Versions are stamps from one counter. Only the max_entries most recently
+    invalidated orders keep their own stamp; the rest share _floor, the
+    newest stamp dropped so far, so versions never go backwards.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = OrderedDict()
+        self._floor = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, order_id):
+        return self._versions.get(order_id, self._floor)
+
+    def get(self, order_id, fmt='json'):
+        """Cached rendering of a bill in the given format, or None"""
+        with self._lock:
+            key = (order_id, self.version(order_id))
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        if fmt not in entry:
+            entry[fmt] = RENDERERS[fmt](entry['json'])
+        return entry[fmt]
+
+    def put(self, order_id, version, bill):
+        """Store a bill rendered while the order was at `version`"""
+        with self._lock:
+            if version != self.version(order_id):
+                return
+            self._entries[(order_id, version)] = {'json': bill}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, order_id):
+        with self._lock:
+            self._entries.pop((order_id, self.version(order_id)), None)
+            self._clock += 1
+            self._versions[order_id] = self._clock
+            self._versions.move_to_end(order_id)
+            while len(self._versions) > self.max_entries:
+                _, self._floor = self._versions.popitem(last=False)
+
+    def clear(self):
+        """Drop everything, e.g. after a customer or menu item is edited"""
+        with self._lock:
+            self._clock += 1
+            self._floor = self._clock
+            self._versions.clear()
+            self._entries.clear()
+
+
+def order_totals(subtotal, order_type):
+    """GST, service charge and total for an order's item subtotal (floats)"""
+    gst_amount = subtotal * (GST_PERCENTAGE / 100)
+    service_charge = subtotal * (DINE_IN_SERVICE_PERCENTAGE / 100) if order_type == 'dine-in' else 0
+    return {
+        'subtotal': subtotal,
+        'gst_amount': gst_amount,
+        'service_charge': service_charge,
+        'total_amount': subtotal + gst_amount + service_charge
+    }
+
+
+def build_bill(order, items):
+    """Assemble the bill dict served by GET /api/payments/bill/<order_id>"""
+    return {
+        'order_id': order['order_id'],
+        'order_token': order['order_token'],
+        'order_type': order['order_type'],
+        'table_number': order['table_number'],
+        'customer_name': order['customer_name'],
+        'customer_phone': order['customer_phone'],
+        'items': items,
+        'subtotal': float(order['subtotal']),
+        'gst_amount': float(order['gst_amount']),
+        'gst_percentage': GST_PERCENTAGE,
+        'service_charge': float(order['service_charge']),
+        'service_charge_percentage': DINE_IN_SERVICE_PERCENTAGE if order['order_type'] == 'dine-in' else 0,
+        'total_amount': float(order['total_amount']),
+        'order_date': order['created_at'].strftime('%Y-%m-%d %H:%M:%S') if order['created_at'] else None
+    }
+
+
+def _line(left, right, width):
+    left = left[:width - len(right) - 1]
+    return f"{left}{' ' * (width - len(left) - len(right))}{right}"
+
+
+def _receipt(bill, width):
+    """Receipt lines split into (header, body, total, footer)"""
+    rule = '-' * width
+    where = f"Table {bill['table_number']}" if bill['order_type'] == 'dine-in' else 'Takeaway'
+
+    header = [
+        f"Order {bill['order_token']}".center(width),
+        where.center(width),
+        (bill['order_date'] or '').center(width)
+    ]
+
+    body = [rule]
+    if bill['customer_name']:
+        body.append(_line(bill['customer_name'], bill['customer_phone'] or '', width))
+        body.append(rule)
+    for item in bill['items']:
+        body.append(_line(f"{item['quantity']} x {item['item_name']}", f"{float(item['subtotal']):.2f}", width))
+        if item.get('customization'):
+            body.append(f"   ({item['customization']})"[:width])
+    body.append(rule)
+    body.append(_line('Subtotal', f"{bill['subtotal']:.2f}", width))
+    body.append(_line(f"GST {bill['gst_percentage']}%", f"{bill['gst_amount']:.2f}", width))
+    if bill['service_charge_percentage']:
+        body.append(_line(f"Service {bill['service_charge_percentage']}%", f"{bill['service_charge']:.2f}", width))
+    body.append(rule)
+
+    total = _line('TOTAL (Rs.)', f"{bill['total_amount']:.2f}", width)
+    footer = ['', 'Thank you!'.center(width)]
+    return header, body, total, footer
+
+
+def render_text(bill):
+    """Plain-text receipt for a fixed-width thermal printer"""
+    header, body, total, footer = _receipt(bill, getattr(Config, 'RECEIPT_WIDTH', 42))
+    return '\n'.join(header + body + [total] + footer) + '\n'
+
+
+def render_escpos(bill):
+    """ESC/POS byte stream: the same receipt with a bold total and a paper cut"""
+    header, body, total, footer = _receipt(bill, getattr(Config, 'RECEIPT_WIDTH', 42))
+    encode = lambda lines: ('\n'.join(lines) + '\n').encode('ascii', errors='replace')
+    # The printer centres these itself, so drop the padding added for text
+    header = [line.strip() for line in header]
+    footer = [line.strip() for line in footer]
+    return b''.join([
+        ESC_INIT,
+        ESC_ALIGN_CENTER, ESC_DOUBLE_ON, encode(header[:1]), ESC_DOUBLE_OFF, encode(header[1:]),
+        ESC_ALIGN_LEFT, encode(body),
+        ESC_BOLD_ON, encode([total]), ESC_BOLD_OFF,
+        ESC_ALIGN_CENTER, encode(footer),
+        ESC_FEED_CUT
+    ])
+
+
+RENDERERS = {
+    'json': lambda bill: bill,
+    'text': render_text,
+    'escpos': render_escpos
+}
+
+bill_cache = BillCache(getattr(Config, 'BILL_CACHE_SIZE', 256))
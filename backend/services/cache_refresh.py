@@ -0,0 +1,53 @@
+from utils.cache_sync import on_invalidate
+from utils.coalescing import single_flight
+from utils.shared_cache import NAMESPACES
+from services.tables import occupancy
+from services.kitchen import kitchen
+from services.trending import trending
+from services.menu_search import menu_search
+from services.billing import bill_cache
+from services.customers import customer_resolver
+
+
+@on_invalidate('menu')
+def refresh_menu(menu_ids):
+    """Re-index changed items; bills show item names and categories"""
+    if menu_ids is None:
+        if menu_search.loaded:
+            menu_search.load()
+    else:
+        for menu_id in menu_ids:
+            menu_search.refresh_item(menu_id)
+    bill_cache.clear()
+
+
+@on_invalidate('tables')
+def refresh_tables(table_numbers):
+    occupancy.refresh(table_numbers)
+
+
+@on_invalidate('orders')
+def refresh_orders(order_ids):
+    """Re-read the changed orders into the kitchen queue and trending counts, and drop their bills"""
+    kitchen.refresh(order_ids)
+    trending.refresh(order_ids)
+    if order_ids is None:
+        bill_cache.clear()
+    else:
+        for order_id in order_ids:
+            bill_cache.invalidate(order_id)
+
+
+@on_invalidate('customers')
+def refresh_customers(customer_ids):
+    if customer_ids is None:
+        customer_resolver.clear()
+    else:
+        for customer_id in customer_ids:
+            customer_resolver.invalidate(customer_id)
+    bill_cache.clear()
+
+
+@on_invalidate(*NAMESPACES)
+def drop_coalesced(keys):
+    single_flight.invalidate()
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from psycopg2.extras import execute_values
+from config import Config
+from utils.prepared import execute_prepared
+
+# Existing customers keep their details; a missing email is filled in
+UPSERT_CONFLICT = """
+    ON CONFLICT (phone) DO UPDATE SET email = COALESCE(Customers.email, EXCLUDED.email)
+    RETURNING phone, customer_id
+"""
+
+
+class CustomerResolver:
+    """
+    Bounded LRU of phone -> customer_id in front of the Customers upsert
+
+    A cached phone resolves with no database round trip; anything else is
+    one INSERT ... ON CONFLICT (phone) that either creates the customer or
+    returns the existing one, so two concurrent first orders from the same
+    phone cannot create two customers.
+
+    Entries are only added with remember() once the caller's transaction
+    has committed, and a remember() that raced with invalidate() or clear()
+    is dropped, using the same version idiom as BillCache.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._ids = OrderedDict()  # phone -> customer_id
+        self._phones = {}  # customer_id -> phone
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, cur, name, phone, email=None):
+        """customer_id for a phone, creating the customer if needed"""
+        with self._lock:
+            if phone in self._ids:
+                self._ids.move_to_end(phone)
+                self.hits += 1
+                return self._ids[phone]
+            self.misses += 1
+        execute_prepared(cur, 'customer_upsert', (name, phone, email))
+        return cur.fetchone()['customer_id']
+
+    def resolve_many(self, cur, customers):
+        """
+        Resolve several customers with at most one statement
+
+        Args:
+            customers: dict of phone -> {'name', 'email'}
+
+        Returns:
+            dict of phone -> customer_id
+        """
+        resolved = {}
+        with self._lock:
+            for phone in customers:
+                if phone in self._ids:
+                    self._ids.move_to_end(phone)
+                    resolved[phone] = self._ids[phone]
+            self.hits += len(resolved)
+            self.misses += len(customers) - len(resolved)
+        missing = [(c['name'], phone, c.get('email')) for phone, c in customers.items() if phone not in resolved]
+        if missing:
+            rows = execute_values(cur, "INSERT INTO Customers (name, phone, email) VALUES %s" + UPSERT_CONFLICT,
+                                  missing, page_size=len(missing), fetch=True)
+            resolved.update((row['phone'], row['customer_id']) for row in rows)
+        return resolved
+
+    def remember(self, ids, version):
+        """Cache committed phone -> customer_id pairs read at `version`"""
+        with self._lock:
+            if version != self.version:
+                return
+            for phone, customer_id in ids.items():
+                self._ids[phone] = customer_id
+                self._ids.move_to_end(phone)
+                self._phones[customer_id] = phone
+            while len(self._ids) > self.max_entries:
+                _, customer_id = self._ids.popitem(last=False)
+                self._phones.pop(customer_id, None)
+
+    def invalidate(self, customer_id):
+        """Forget a customer whose phone changed or who was deleted"""
+        with self._lock:
+            self.version += 1
+            phone = self._phones.pop(customer_id, None)
+            if phone is not None:
+                self._ids.pop(phone, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._ids.clear()
+            self._phones.clear()
+
+
+customer_resolver = CustomerResolver(max_entries=getattr(Config, 'CUSTOMER_CACHE_SIZE', 10000))
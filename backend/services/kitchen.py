@@ -0,0 +1,293 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+from config import Config
+from models import get_db_connection
+
+# Parallel cooking slots per station; a menu item cooks at the station of its category
+DEFAULT_STATIONS = {'appetizer': 2, 'main': 3, 'dessert': 1, 'beverage': 2}
+DEFAULT_PREP_MINUTES = 15
+
+
+class _Ticket:
+    __slots__ = ('order_id', 'menu_id', 'item_name', 'quantity', 'duration', 'started_at', 'ready_at')
+
+    def __init__(self, order_id, menu_id, item_name, quantity, duration):
+        self.order_id = order_id
+        self.menu_id = menu_id
+        self.item_name = item_name
+        self.quantity = quantity
+        self.duration = duration
+        self.started_at = None
+        self.ready_at = None
+
+
+class _Station:
+    """
+    One kitchen station: FIFO tickets and a heap of slot free-up times
+
+    `tail` is the slot heap after every queued ticket, so a new ticket is
+    scheduled with one heappop/heappush. Removing or starting a ticket in
+    the middle marks the station dirty and it is replayed on next read.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.tickets = {}  # (order_id, seq) -> _Ticket, in arrival order
+        self.tail = []
+        self.dirty = True
+
+    def schedule(self, ticket, now):
+        if self.dirty:
+            self.replay(now)
+        free_at = heapq.heappop(self.tail)
+        ticket.ready_at = max(free_at, now) + ticket.duration
+        heapq.heappush(self.tail, ticket.ready_at)
+
+    def replay(self, now):
+        self.tail = [now] * self.slots
+        # Tickets already on the stove hold their slots first
+        cooking = [t for t in self.tickets.values() if t.started_at is not None]
+        waiting = [t for t in self.tickets.values() if t.started_at is None]
+        for ticket in cooking:
+            free_at = heapq.heappop(self.tail)
+            ticket.ready_at = max(ticket.started_at + ticket.duration, now)
+            heapq.heappush(self.tail, max(free_at, ticket.ready_at))
+        for ticket in waiting:
+            free_at = heapq.heappop(self.tail)
+            ticket.ready_at = max(free_at, now) + ticket.duration
+            heapq.heappush(self.tail, ticket.ready_at)
+        self.dirty = False
+
+
+class KitchenQueue:
+    """
+    Live queue of pending and preparing items with expected ready times
+
+    Each item becomes a ticket at its category's station (menu
+    preparation_time, one slot per ticket whatever the quantity). New
+    orders are scheduled behind the existing queue in O(log slots) per
+    item; starts and removals replay only the stations they touch, lazily.
+    An order is ready when its slowest ticket is.
+    """
+
+    def __init__(self, stations=None, default_prep_minutes=DEFAULT_PREP_MINUTES):
+        self.station_slots = dict(stations or DEFAULT_STATIONS)
+        self.default_prep_minutes = default_prep_minutes
+        self._lock = threading.RLock()
+        self._stations = {}
+        self._orders = {}  # order_id -> {'order_token', 'order_type', 'created_at', 'tickets': [(station, key)]}
+        self.loaded = False
+
+    def _fetch(self, order_ids=None):
+        """Pending and preparing orders (only order_ids if given) with their items, oldest first"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT o.order_id, o.order_token, o.order_type, o.order_status, o.created_at, o.updated_at,
+                   oi.menu_id, oi.quantity, m.item_name, m.category, m.preparation_time
+            FROM Orders o
+            JOIN OrderItems oi ON oi.order_id = o.order_id AND oi.order_date = o.order_date
+            JOIN Menu m ON m.menu_id = oi.menu_id
+            WHERE o.order_status IN ('pending', 'preparing')
+              AND o.order_date BETWEEN CURRENT_DATE - 1 AND CURRENT_DATE
+              AND (%(all)s OR o.order_id = ANY(%(ids)s))
+            ORDER BY o.created_at, o.order_id, oi.order_item_id
+        """, {'all': order_ids is None, 'ids': list(order_ids or ())})
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        orders = {}
+        for row in rows:
+            order = orders.setdefault(row['order_id'], {'row': row, 'items': []})
+            order['items'].append(row)
+        return orders
+
+    def _add_row(self, order_id, order):
+        row = order['row']
+        self._add(order_id, row['order_token'], row['order_type'],
+                  row['created_at'].timestamp() if row['created_at'] else time.time(),
+                  order['items'])
+        if row['order_status'] == 'preparing' and row['updated_at']:
+            self._start(order_id, row['updated_at'].timestamp())
+
+    def load(self):
+        """(Re)build the queue from pending and preparing orders"""
+        orders = self._fetch()
+        with self._lock:
+            self._stations = {}
+            self._orders = {}
+            for order_id, order in orders.items():
+                self._add_row(order_id, order)
+            self.loaded = True
+
+    def refresh(self, order_ids=None):
+        """
+        Re-read orders another process changed (the whole queue if None)
+
+        Orders that left pending/preparing are removed, new ones queued
+        and started ones marked as cooking; items never change after an
+        order is created, so queued orders keep their tickets.
+        """
+        if not self.loaded:
+            return
+        if order_ids is None:
+            self.load()
+            return
+        order_ids = [int(order_id) for order_id in order_ids]
+        orders = self._fetch(order_ids)
+        with self._lock:
+            for order_id in order_ids:
+                order = orders.get(order_id)
+                if order is None:
+                    self.remove_order(order_id)
+                elif order_id not in self._orders:
+                    self._add_row(order_id, order)
+                else:
+                    row = order['row']
+                    category, key = self._orders[order_id]['tickets'][0]
+                    cooking = self._stations[category].tickets[key].started_at is not None
+                    if row['order_status'] == 'preparing' and not cooking:
+                        self._start(order_id, row['updated_at'].timestamp() if row['updated_at'] else time.time())
+                    elif row['order_status'] == 'pending' and cooking:
+                        self._start(order_id, None)
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _station(self, category):
+        if category not in self._stations:
+            slots = self.station_slots.get(category, 1)
+            self._stations[category] = _Station(slots)
+        return self._stations[category]
+
+    def _add(self, order_id, order_token, order_type, now, items):
+        entry = {'order_token': order_token, 'order_type': order_type, 'created_at': now, 'tickets': []}
+        self._orders[order_id] = entry
+        for seq, item in enumerate(items):
+            minutes = item.get('preparation_time')
+            if minutes is None:
+                minutes = self.default_prep_minutes
+            ticket = _Ticket(order_id, item['menu_id'], item.get('item_name'), item['quantity'], minutes * 60)
+            station = self._station(item.get('category'))
+            station.schedule(ticket, now)
+            station.tickets[(order_id, seq)] = ticket
+            entry['tickets'].append((item.get('category'), (order_id, seq)))
+
+    def _start(self, order_id, started_at):
+        """Mark an order's tickets as cooking since started_at (None: back to waiting)"""
+        for category, key in self._orders[order_id]['tickets']:
+            station = self._stations[category]
+            station.tickets[key].started_at = started_at
+            station.dirty = True
+
+    def add_order(self, order_id, order_token, order_type, items, now=None):
+        """
+        Queue a newly committed order and return its expected ready time
+
+        Args:
+            items: dicts with menu_id, quantity, item_name, category and
+                preparation_time (minutes)
+
+        Returns:
+            Expected ready time as a unix timestamp
+        """
+        self.ensure_loaded()
+        now = now or time.time()
+        with self._lock:
+            # The order may already be here if this call triggered load()
+            if order_id not in self._orders:
+                self._add(order_id, order_token, order_type, now, items)
+            return self._eta(order_id, now)
+
+    def start_order(self, order_id, now=None):
+        """The kitchen started cooking an order (status 'preparing')"""
+        self.ensure_loaded()
+        with self._lock:
+            if order_id in self._orders:
+                self._start(order_id, now or time.time())
+
+    def remove_order(self, order_id, now=None):
+        """An order is ready, completed or cancelled and leaves the queue"""
+        self.ensure_loaded()
+        now = now or time.time()
+        with self._lock:
+            entry = self._orders.pop(order_id, None)
+            if entry is None:
+                return
+            for category, key in entry['tickets']:
+                station = self._stations[category]
+                ticket = station.tickets.pop(key)
+                # A ticket that was due by now no longer holds up anyone
+                # behind it, so the rest of the schedule stands
+                if ticket.ready_at is None or ticket.ready_at > now:
+                    station.dirty = True
+
+    def _eta(self, order_id, now):
+        ready_at = now
+        for category, key in self._orders[order_id]['tickets']:
+            station = self._stations[category]
+            if station.dirty:
+                station.replay(now)
+            ready_at = max(ready_at, station.tickets[key].ready_at)
+        return ready_at
+
+    def eta(self, order_id, now=None):
+        """Expected ready time of a queued order (unix timestamp) or None"""
+        self.ensure_loaded()
+        now = now or time.time()
+        with self._lock:
+            if order_id not in self._orders:
+                return None
+            return self._eta(order_id, now)
+
+    def snapshot(self, now=None):
+        """The whole queue, soonest-ready order first"""
+        self.ensure_loaded()
+        now = now or time.time()
+        with self._lock:
+            for station in self._stations.values():
+                if station.dirty:
+                    station.replay(now)
+            orders = []
+            for order_id, entry in self._orders.items():
+                tickets = [(category, self._stations[category].tickets[key]) for category, key in entry['tickets']]
+                ready_at = max(ticket.ready_at for _, ticket in tickets)
+                orders.append((ready_at, order_id, {
+                    'order_id': order_id,
+                    'order_token': entry['order_token'],
+                    'order_type': entry['order_type'],
+                    'estimated_ready_at': format_eta(ready_at),
+                    'eta_minutes': eta_minutes(ready_at, now),
+                    'items': [{
+                        'menu_id': ticket.menu_id,
+                        'item_name': ticket.item_name,
+                        'quantity': ticket.quantity,
+                        'station': category,
+                        'cooking': ticket.started_at is not None,
+                        'estimated_ready_at': format_eta(ticket.ready_at)
+                    } for category, ticket in tickets]
+                }))
+            stations = {
+                category: {'slots': station.slots, 'tickets': len(station.tickets)}
+                for category, station in self._stations.items()
+            }
+        orders.sort(key=lambda order: order[:2])
+        return {'orders': [order for _, _, order in orders], 'stations': stations}
+
+
+def format_eta(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def eta_minutes(timestamp, now=None):
+    return max(0, round((timestamp - (now or time.time())) / 60))
+
+
+kitchen = KitchenQueue(
+    stations=getattr(Config, 'KITCHEN_STATIONS', None),
+    default_prep_minutes=getattr(Config, 'KITCHEN_DEFAULT_PREP_MINUTES', DEFAULT_PREP_MINUTES)
+)
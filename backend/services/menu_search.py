@@ -0,0 +1,231 @@
+import math
+import re
+import threading
+from models import get_db_connection
+from services.trending import trending
+
+# How much a match in each field counts towards an item's score
+FIELD_WEIGHTS = {'item_name': 3.0, 'category': 1.5, 'cuisine': 1.5, 'description': 1.0}
+FUZZY_PENALTY = 0.5  # a match one edit away scores half, two edits a quarter
+NAME_PREFIX_BONUS = 2.0  # the item name starts with what was typed
+POPULARITY_BOOST = 0.25  # x log(1 + quantity sold today)
+MATCH_CACHE_SIZE = 1024  # query tokens whose trie matches are remembered
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or '').lower())
+
+
+def max_edits(token):
+    """Typos tolerated in a query token: none while it is short"""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class _Node:
+    __slots__ = ('children', 'tokens')
+
+    def __init__(self):
+        self.children = {}
+        self.tokens = set()  # every indexed token in this subtree
+
+
+class MenuSearch:
+    """
+    In-memory prefix trie and token index over the menu
+
+    Every word of item_name, description, category and cuisine is a token.
+    The trie maps prefixes to the tokens below them, and the postings map
+    a token to the items and fields it occurs in. A query token matches
+    any token it is a prefix of (POS staff type partial names), or one
+    within max_edits() edits of such a prefix, found by walking the trie
+    with a Levenshtein row per node. An item must match every query token.
+
+    Items are indexed or dropped one at a time, so menu writes update the
+    index without rebuilding it.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._postings = {}  # token -> {menu_id: best field weight}
+        self._items = {}  # menu_id -> menu row
+        self._item_tokens = {}  # menu_id -> set of its tokens
+        self._match_cache = {}  # query token -> _matches() result, until the index changes
+        self.loaded = False
+
+    def load(self):
+        """(Re)build the index from the Menu table"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT menu_id, item_name, description, category, cuisine, price, is_available
+            FROM Menu
+        """)
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        with self._lock:
+            self._root = _Node()
+            self._postings = {}
+            self._items = {}
+            self._item_tokens = {}
+            self._match_cache = {}
+            for row in rows:
+                self._index(row)
+            self.loaded = True
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def refresh_item(self, menu_id):
+        """Re-index one item after it was created, edited or deleted"""
+        if not self.loaded:
+            return
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT menu_id, item_name, description, category, cuisine, price, is_available
+            FROM Menu WHERE menu_id = %s
+        """, (menu_id,))
+        row = cur.fetchone()
+        cur.close()
+        conn.close()
+
+        with self._lock:
+            self._unindex(menu_id)
+            if row is not None:
+                self._index(row)
+
+    def _index(self, row):
+        self._match_cache = {}
+        menu_id = row['menu_id']
+        self._items[menu_id] = dict(row)
+        tokens = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(row[field]):
+                postings = self._postings.setdefault(token, {})
+                postings[menu_id] = max(postings.get(menu_id, 0), weight)
+                if token not in tokens:
+                    tokens.add(token)
+                    if len(postings) == 1:
+                        self._trie_add(token)
+        self._item_tokens[menu_id] = tokens
+
+    def _unindex(self, menu_id):
+        self._match_cache = {}
+        self._items.pop(menu_id, None)
+        for token in self._item_tokens.pop(menu_id, ()):
+            postings = self._postings[token]
+            del postings[menu_id]
+            if not postings:
+                del self._postings[token]
+                self._trie_remove(token)
+
+    def _trie_add(self, token):
+        node = self._root
+        node.tokens.add(token)
+        for char in token:
+            node = node.children.setdefault(char, _Node())
+            node.tokens.add(token)
+
+    def _trie_remove(self, token):
+        node = self._root
+        node.tokens.discard(token)
+        for char in token:
+            child = node.children[char]
+            child.tokens.discard(token)
+            if not child.tokens:
+                del node.children[char]
+                return
+            node = child
+
+    def _matches(self, query):
+        """{indexed token: edits} for tokens that start with query, allowing typos"""
+        limit = max_edits(query)
+        if limit == 0:
+            node = self._root
+            for char in query:
+                node = node.children.get(char)
+                if node is None:
+                    return {}
+            return dict.fromkeys(node.tokens, 0)
+
+        found = {}
+        size = len(query)
+        stack = [(child, char, list(range(size + 1))) for char, child in self._root.children.items()]
+        while stack:
+            node, char, previous = stack.pop()
+            row = [previous[0] + 1]
+            best = row[0]
+            for i in range(size):
+                cost = min(row[i] + 1, previous[i + 1] + 1, previous[i] + (query[i] != char))
+                row.append(cost)
+                if cost < best:
+                    best = cost
+            if best > limit:
+                continue
+            edits = row[-1]
+            if edits <= limit:
+                for token in node.tokens:
+                    if edits < found.get(token, limit + 1):
+                        found[token] = edits
+            for next_char, child in node.children.items():
+                stack.append((child, next_char, row))
+        return found
+
+    def search(self, text, limit=10, available_only=False):
+        """
+        Menu items matching typed text, best first
+
+        Returns:
+            List of menu rows, each with a 'score'
+        """
+        self.ensure_loaded()
+        terms = tokenize(text)
+        if not terms:
+            return []
+        popularity = {item['menu_id']: item['quantity'] for item in trending.top('today', trending.capacity)}
+
+        with self._lock:
+            scores = None
+            for term in terms:
+                matches = self._match_cache.get(term)
+                if matches is None:
+                    if len(self._match_cache) >= MATCH_CACHE_SIZE:
+                        self._match_cache = {}
+                    matches = self._match_cache[term] = self._matches(term)
+                term_scores = {}
+                for token, edits in matches.items():
+                    factor = FUZZY_PENALTY ** edits
+                    for menu_id, weight in self._postings[token].items():
+                        term_scores[menu_id] = max(term_scores.get(menu_id, 0), weight * factor)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {menu_id: score + term_scores[menu_id]
+                              for menu_id, score in scores.items() if menu_id in term_scores}
+                if not scores:
+                    return []
+
+            phrase = ' '.join(terms)
+            results = []
+            for menu_id, score in scores.items():
+                item = self._items[menu_id]
+                if available_only and not item['is_available']:
+                    continue
+                if ' '.join(tokenize(item['item_name'])).startswith(phrase):
+                    score += NAME_PREFIX_BONUS
+                score *= 1 + POPULARITY_BOOST * math.log1p(popularity.get(menu_id, 0))
+                results.append(dict(item, score=round(score, 3)))
+
+        results.sort(key=lambda item: (-item['score'], item['item_name']))
+        return results[:limit]
+
+
+menu_search = MenuSearch()
@@ -0,0 +1,26 @@
+from collections import defaultdict
+from decimal import Decimal
+from psycopg2.extras import execute_values
+from utils.work_queue import handler
+
+
+@handler('customer_stats')
+def apply_customer_stats(cur, payloads):
+    """Fold a batch of settled payments into Customers.total_orders/total_spent"""
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    for payload in payloads:
+        if payload.get('customer_id') is None:
+            continue
+        totals[payload['customer_id']][0] += 1
+        totals[payload['customer_id']][1] += Decimal(payload['amount'])
+
+    if not totals:
+        return
+
+    execute_values(cur, """
+        UPDATE Customers c
+        SET total_orders = c.total_orders + v.orders,
+            total_spent = c.total_spent + v.spent
+        FROM (VALUES %s) AS v(customer_id, orders, spent)
+        WHERE c.customer_id = v.customer_id
+    """, [(customer_id, orders, spent) for customer_id, (orders, spent) in totals.items()])
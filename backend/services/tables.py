@@ -0,0 +1,205 @@
+import threading
+from models import get_db_connection
+from utils.cache_sync import publish
+
+# 'seated': a party was shown to the table and has not ordered yet
+TABLE_STATUSES = ['available', 'seated', 'occupied', 'reserved', 'maintenance']
+
+# Statuses a dine-in order may take a table from
+ORDERABLE_STATUSES = ('available', 'seated')
+
+
+class TableOccupancy:
+    """
+    In-memory copy of RestaurantTables
+
+    Every write path that changes a table's status updates this map after
+    its transaction commits, so reads never need to query the database.
+    Free tables are also indexed by party size: _free_for[n] holds every
+    available table that seats at least n guests.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables = {}
+        self._free_for = {}
+        self.loaded = False
+
+    def load(self):
+        """(Re)build the map from the database"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT table_number, seating_capacity, status, location
+            FROM RestaurantTables
+            ORDER BY table_number
+        """)
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        with self._lock:
+            self._tables = {}
+            self._free_for = {}
+            for row in rows:
+                self._tables[row['table_number']] = dict(row)
+                if row['status'] == 'available':
+                    self._index(row['table_number'], True)
+            self.loaded = True
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _index(self, table_number, free):
+        capacity = self._tables[table_number]['seating_capacity']
+        for guests in range(1, capacity + 1):
+            tables = self._free_for.setdefault(guests, set())
+            if free:
+                tables.add(table_number)
+            else:
+                tables.discard(table_number)
+
+    def get(self, table_number):
+        self.ensure_loaded()
+        with self._lock:
+            table = self._tables.get(table_number)
+            return dict(table) if table else None
+
+    def all(self, status=None):
+        self.ensure_loaded()
+        with self._lock:
+            return [
+                dict(table) for table in self._tables.values()
+                if status is None or table['status'] == status
+            ]
+
+    def free_for(self, guests):
+        """Available tables seating at least `guests`, smallest first"""
+        self.ensure_loaded()
+        with self._lock:
+            numbers = self._free_for.get(max(guests, 1), ())
+            tables = [dict(self._tables[n]) for n in numbers]
+        return sorted(tables, key=lambda t: (t['seating_capacity'], t['table_number']))
+
+    def set_status(self, table_number, status):
+        """Record a committed status change; returns the previous status"""
+        self.ensure_loaded()
+        with self._lock:
+            table = self._tables.get(table_number)
+            if table is None:
+                return None
+            previous = table['status']
+            table['status'] = status
+            if (previous == 'available') != (status == 'available'):
+                self._index(table_number, status == 'available')
+            return previous
+
+    def refresh(self, table_numbers=None):
+        """Re-read tables another process changed (all of them if None)"""
+        if not self.loaded:
+            return
+        if table_numbers is None:
+            self.load()
+            return
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT table_number, status
+            FROM RestaurantTables
+            WHERE table_number = ANY(%s)
+        """, (list(table_numbers),))
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        for row in rows:
+            self.set_status(row['table_number'], row['status'])
+
+
+def update_table_status(cur, table_number, status):
+    """Write a table status inside the caller's transaction and tell the other workers"""
+    cur.execute("""
+        UPDATE RestaurantTables
+        SET status = %s
+        WHERE table_number = %s
+    """, (status, table_number))
+    publish(cur, 'tables', table_number)
+
+
+def claim_table(cur, table_number, status='occupied', from_statuses=('available',)):
+    """
+    Move a table to status inside the caller's transaction, but only from
+    one of from_statuses
+
+    The database decides, so two workers cannot both seat a party at the
+    same table; the in-memory map is only a fast pre-check. The row stays
+    locked until the caller commits or rolls back. Returns False when the
+    table was in any other status.
+    """
+    cur.execute("""
+        UPDATE RestaurantTables
+        SET status = %s
+        WHERE table_number = %s AND status = ANY(%s)
+    """, (status, table_number, list(from_statuses)))
+    if cur.rowcount == 0:
+        return False
+    publish(cur, 'tables', table_number)
+    return True
+
+
+def claim_table_for_order(cur, table_number, customer_id):
+    """
+    Occupy a table for a dine-in order inside the caller's transaction
+
+    A free table, or one seated through /seat and waiting for its order,
+    is taken outright. An occupied table is accepted only for another
+    round by the party already there, i.e. when the same customer has an
+    open dine-in order on it; the table row is then locked so a payment
+    cannot release it underneath the new order. Returns False otherwise.
+    """
+    if claim_table(cur, table_number, from_statuses=ORDERABLE_STATUSES):
+        return True
+    cur.execute("""
+        SELECT 1
+        FROM RestaurantTables t
+        WHERE t.table_number = %s
+          AND t.status = 'occupied'
+          AND EXISTS (
+              SELECT 1 FROM Orders o
+              WHERE o.table_number = t.table_number
+                AND o.customer_id = %s
+                AND o.order_type = 'dine-in'
+                AND o.order_status NOT IN ('completed', 'cancelled')
+          )
+        FOR UPDATE
+    """, (table_number, customer_id))
+    return cur.fetchone() is not None
+
+
+def release_table(cur, table_number):
+    """
+    Free a table inside the caller's transaction once none of its dine-in
+    orders is still open
+
+    Call it after closing the order that triggered the release. Returns
+    True when the table was freed, False while another round is pending.
+    """
+    cur.execute("""
+        UPDATE RestaurantTables
+        SET status = 'available'
+        WHERE table_number = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM Orders
+              WHERE table_number = %s
+                AND order_type = 'dine-in'
+                AND order_status NOT IN ('completed', 'cancelled')
+          )
+    """, (table_number, table_number))
+    if cur.rowcount == 0:
+        return False
+    publish(cur, 'tables', table_number)
+    return True
+
+
+occupancy = TableOccupancy()
@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from config import Config
+from models import get_db_connection
+
+# window name -> length in seconds ('today' runs from local midnight)
+WINDOWS = {'15m': 15 * 60, '1h': 60 * 60, 'today': None}
+BUCKET_SECONDS = 60
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters summary holding at most `capacity` counters
+
+    When a new item arrives and the summary is full, it takes over the
+    smallest counter and inherits its count as `error`, so every reported
+    count overestimates the true one by at most that error.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, item, n=1):
+        if item in self.counts:
+            self.counts[item] += n
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = n
+            self.errors[item] = 0
+        else:
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            self.errors.pop(victim)
+            self.counts[item] = floor + n
+            self.errors[item] = floor
+
+    def merge(self, other):
+        for item, count in other.counts.items():
+            if item in self.counts:
+                self.counts[item] += count
+                self.errors[item] += other.errors[item]
+            else:
+                self.counts[item] = count
+                self.errors[item] = other.errors[item]
+        if len(self.counts) > self.capacity:
+            keep = sorted(self.counts, key=self.counts.get, reverse=True)[:self.capacity]
+            self.counts = {item: self.counts[item] for item in keep}
+            self.errors = {item: self.errors[item] for item in keep}
+
+    def top(self, k):
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+class TrendingItems:
+    """
+    Most-ordered menu items over sliding windows, fed as orders commit
+
+    Quantities go into one Space-Saving summary per minute; a window's
+    ranking merges the minutes it covers. Rankings are cached per window
+    until the next record() or the next minute, so reads are a dictionary
+    lookup. 'today' has its own summary that resets at midnight.
+
+    load() rebuilds the summaries from the database, so every worker
+    starts from the same counts after a restart, and refresh() adds the
+    orders other workers took. Each order is counted once however many
+    times it is recorded or re-read.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.horizon = max(s for s in WINDOWS.values() if s) // BUCKET_SECONDS
+        self._lock = threading.Lock()
+        self._buckets = deque()  # (minute, SpaceSaving), oldest first
+        self._today = SpaceSaving(capacity)
+        self._day = date.today()
+        self._names = {}
+        self._counted = {}  # order_id -> minute, for orders in the summaries
+        self._rankings = {}
+        self._pending = None  # orders recorded while load() runs
+        self.loaded = False
+
+    def _fetch(self, order_ids=None):
+        """(order_id, timestamp, items) of today's and the last hour's orders (only order_ids if given)"""
+        since = datetime.fromtimestamp(time.time() - self.horizon * BUCKET_SECONDS)
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT o.order_id, o.created_at, oi.menu_id, m.item_name, oi.quantity
+            FROM Orders o
+            JOIN OrderItems oi ON oi.order_id = o.order_id AND oi.order_date = o.order_date
+            JOIN Menu m ON m.menu_id = oi.menu_id
+            WHERE o.order_date >= CURRENT_DATE - 1
+              AND (o.order_date = CURRENT_DATE OR o.created_at >= %(since)s)
+              AND (%(all)s OR o.order_id = ANY(%(ids)s))
+            ORDER BY o.created_at, o.order_id
+        """, {'since': since, 'all': order_ids is None, 'ids': list(order_ids or ())})
+        rows = cur.fetchall()
+        cur.close()
+        conn.close()
+
+        orders = {}
+        for row in rows:
+            created = row['created_at'].timestamp() if row['created_at'] else time.time()
+            order = orders.setdefault(row['order_id'], (row['order_id'], created, []))
+            order[2].append((row['menu_id'], row['item_name'], row['quantity']))
+        return list(orders.values())
+
+    def load(self):
+        """(Re)build the summaries from today's and the last hour's orders"""
+        with self._lock:
+            self._pending = []
+        try:
+            orders = self._fetch()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._buckets = deque()
+            self._today = SpaceSaving(self.capacity)
+            self._day = date.today()
+            self._counted = {}
+            minute = int(time.time() // BUCKET_SECONDS)
+            # Orders recorded while the query ran may have committed after it
+            for order_id, created, items in orders + pending:
+                self._count(order_id, created, items, minute)
+            self._rankings.clear()
+            self.loaded = True
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def refresh(self, order_ids=None):
+        """Count orders another process committed (re-read everything if None)"""
+        if not self.loaded:
+            return
+        if order_ids is None:
+            self.load()
+            return
+        with self._lock:
+            order_ids = [int(order_id) for order_id in order_ids if int(order_id) not in self._counted]
+        if not order_ids:
+            return
+        orders = self._fetch(order_ids)
+        with self._lock:
+            minute = int(time.time() // BUCKET_SECONDS)
+            self._expire(minute)
+            for order_id, created, items in orders:
+                self._count(order_id, created, items, minute)
+            self._rankings.clear()
+
+    def _expire(self, minute):
+        while self._buckets and self._buckets[0][0] <= minute - self.horizon:
+            self._buckets.popleft()
+        if date.today() != self._day:
+            self._day = date.today()
+            self._today = SpaceSaving(self.capacity)
+            self._counted = {
+                order_id: counted for order_id, counted in self._counted.items()
+                if counted > minute - self.horizon
+            }
+
+    def _bucket(self, minute):
+        """The summary for a minute, keeping the buckets in order"""
+        position = len(self._buckets)
+        while position and self._buckets[position - 1][0] >= minute:
+            position -= 1
+            if self._buckets[position][0] == minute:
+                return self._buckets[position][1]
+        bucket = SpaceSaving(self.capacity)
+        self._buckets.insert(position, (minute, bucket))
+        return bucket
+
+    def _count(self, order_id, created, items, now_minute):
+        if order_id is not None:
+            if order_id in self._counted:
+                return
+            self._counted[order_id] = int(created // BUCKET_SECONDS)
+        minute = int(created // BUCKET_SECONDS)
+        bucket = self._bucket(minute) if minute > now_minute - self.horizon else None
+        today = date.fromtimestamp(created) == self._day
+        for menu_id, item_name, quantity in items:
+            if bucket is not None:
+                bucket.add(menu_id, quantity)
+            if today:
+                self._today.add(menu_id, quantity)
+            if item_name:
+                self._names[menu_id] = item_name
+
+    def record(self, items, now=None, order_id=None):
+        """
+        Count the items of a committed order
+
+        Before load() there is nothing to add to: the load will read the
+        order from the database.
+
+        Args:
+            items: iterable of (menu_id, item_name, quantity)
+            order_id: the order, so a later refresh() does not count it again
+        """
+        if not self.loaded and self._pending is None:
+            return
+        now = now or time.time()
+        items = list(items)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((order_id, now, items))
+            minute = int(now // BUCKET_SECONDS)
+            self._expire(minute)
+            self._count(order_id, now, items, minute)
+            self._rankings.clear()
+
+    def top(self, window, k=10, now=None):
+        """Top k items for a window; quantities are approximate within 'error'"""
+        self.ensure_loaded()
+        minute = int((now or time.time()) // BUCKET_SECONDS)
+        with self._lock:
+            cached = self._rankings.get(window)
+            if cached is None or cached[0] != minute:
+                self._expire(minute)
+                if WINDOWS[window] is None:
+                    summary = self._today
+                else:
+                    summary = SpaceSaving(self.capacity)
+                    span = WINDOWS[window] // BUCKET_SECONDS
+                    for bucket_minute, bucket in self._buckets:
+                        if bucket_minute > minute - span:
+                            summary.merge(bucket)
+                ranking = [{
+                    'menu_id': menu_id,
+                    'item_name': self._names.get(menu_id),
+                    'quantity': count,
+                    'error': summary.errors[menu_id]
+                } for menu_id, count in summary.top(self.capacity)]
+                cached = (minute, ranking)
+                self._rankings[window] = cached
+            return cached[1][:k]
+
+
+trending = TrendingItems(capacity=getattr(Config, 'TRENDING_CAPACITY', 64))
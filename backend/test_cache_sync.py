@@ -0,0 +1,240 @@
+"""
+Cross-worker cache coherence check
+
+Starts several worker processes, each running the full app (shared cache
+segment, NOTIFY listener, in-memory mirrors) as gunicorn workers would on
+one host. Writes go through one worker; the check passes when every other
+worker serves the change within a few seconds, from both the shared cache
+and its own in-memory copies.
+
+It creates an order, a payment and a customer, so run it against a
+development database loaded from database.sql.
+
+Usage (from the backend folder):
+    python test_cache_sync.py
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKERS = 3
+TIMEOUT = 5.0
+
+
+class SetupFailed(Exception):
+    """A request the remaining checks depend on did not succeed"""
+
+
+def serve(pipe):
+    """Worker process: run requests against this process's app until told to stop"""
+    from app import app
+    from utils.warmup import warm_up
+
+    warm_up(app)
+    client = app.test_client()
+    pipe.send('ready')
+    while True:
+        command = pipe.recv()
+        if command is None:
+            break
+        method, path, body = command
+        response = client.open(path, method=method, json=body)
+        pipe.send((response.status_code, response.get_json(silent=True)))
+
+
+class Worker:
+    def __init__(self, context):
+        self.pipe, child = context.Pipe()
+        self.process = context.Process(target=serve, args=(child,), daemon=True)
+        self.process.start()
+
+    def call(self, method, path, body=None):
+        self.pipe.send((method, path, body))
+        return self.pipe.recv()
+
+    def data(self, path):
+        """The response's data, or None (logged) if it was not a 200"""
+        status, payload = self.call('GET', path)
+        if status != 200:
+            print(f"   GET {path} answered {status}: {(payload or {}).get('message')}")
+            return None
+        return payload['data']
+
+    def require(self, path):
+        """The response's data; raises SetupFailed if it was not a 200"""
+        data = self.data(path)
+        if data is None:
+            raise SetupFailed(f"GET {path} failed")
+        return data
+
+    def stop(self):
+        self.pipe.send(None)
+        self.process.join(10)
+
+
+def wait_for(check):
+    """Poll check() until it holds; a failed request (data None) counts as not yet"""
+    deadline = time.time() + TIMEOUT
+    while time.time() < deadline:
+        try:
+            if check():
+                return True
+        except (TypeError, KeyError, IndexError):
+            pass
+        time.sleep(0.05)
+    return False
+
+
+def report(results, name, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {name}")
+
+
+def run_checks(writer, readers, created):
+    """Run every check; created collects what cleanup() has to undo"""
+    results = []
+    try:
+        _run_checks(writer, readers, created, results)
+    except SetupFailed as e:
+        report(results, f"{e}, remaining checks skipped", False)
+    return results
+
+
+def _run_checks(writer, readers, created, results):
+    tag = f"Coherence {os.getpid()}"
+
+    # Menu: shared /api/menu entries and every worker's search index
+    item = created['menu_item'] = writer.require('/api/menu')[0]
+    for worker in readers:
+        worker.data('/api/menu')
+    edited = dict(item, item_name=tag)
+    status, _ = writer.call('PUT', f"/api/menu/{item['menu_id']}", edited)
+    report(results, 'menu update accepted', status == 200)
+    report(results, 'menu listing updated on every worker', all(
+        wait_for(lambda: any(m['item_name'] == tag for m in worker.data('/api/menu'))) for worker in readers
+    ))
+    report(results, 'menu search re-indexed on every worker', all(
+        wait_for(lambda: any(m['menu_id'] == item['menu_id'] for m in worker.data('/api/menu/search?q=coherence')))
+        for worker in readers
+    ))
+
+    # Tables: each worker's occupancy map
+    table = writer.require('/api/tables?status=available')[0]
+    number = created['table_number'] = table['table_number']
+    writer.call('PATCH', f"/api/tables/{number}/seat", {'guests': 1})
+    report(results, 'seated table shown on every worker', all(
+        wait_for(lambda: worker.data(f'/api/tables/{number}')['status'] == 'seated') for worker in readers
+    ))
+    writer.call('PATCH', f"/api/tables/{number}/status", {'status': 'available'})
+    report(results, 'released table available on every worker', all(
+        wait_for(lambda: worker.data(f'/api/tables/{number}')['status'] == 'available') for worker in readers
+    ))
+
+    # Orders: shared listings and each worker's kitchen queue
+    phone = created['phone'] = f"7{os.getpid() % 10**9:09d}"
+    trending_before = []
+    for worker in readers:
+        worker.data('/api/orders/active')
+        worker.data('/api/payments/summary/today')
+        trending_before.append(next((t['quantity'] for t in worker.require('/api/reports/trending?window=15m&limit=64')['items']
+                                     if t['menu_id'] == item['menu_id']), 0))
+    status, payload = writer.call('POST', '/api/orders', {
+        'customer': {'name': tag, 'phone': phone},
+        'order_type': 'takeaway',
+        'items': [{'menu_id': item['menu_id'], 'quantity': 1}]
+    })
+    report(results, 'order created', status == 201)
+    if status != 201:
+        raise SetupFailed('POST /api/orders failed')
+    order_id = created['order_id'] = payload['data']['order_id']
+    report(results, 'new order on every active-orders board', all(
+        wait_for(lambda: any(o['order_id'] == order_id for o in worker.data('/api/orders/active'))) for worker in readers
+    ))
+    report(results, 'new order in every kitchen queue', all(
+        wait_for(lambda: any(o['order_id'] == order_id for o in worker.data('/api/orders/queue')['orders']))
+        for worker in readers
+    ))
+    report(results, 'new order in every worker\'s trending items', all(
+        wait_for(lambda: any(t['menu_id'] == item['menu_id'] and t['quantity'] > count
+                             for t in worker.data('/api/reports/trending?window=15m&limit=64')['items']))
+        for worker, count in zip(readers, trending_before)
+    ))
+
+    # Customers: order listings showing the customer's name
+    customer_id = writer.require(f'/api/customers/phone/{phone}')['customer_id']
+    listing = '/api/orders?fields=order_id,customer_name&status=pending'
+    for worker in readers:
+        worker.data(listing)
+    renamed = f"{tag} renamed"
+    writer.call('PUT', f'/api/customers/{customer_id}', {'name': renamed, 'phone': phone, 'customer_type': 'takeaway'})
+    report(results, 'renamed customer in every order listing', all(
+        wait_for(lambda: any(o['order_id'] == order_id and o['customer_name'] == renamed for o in worker.data(listing)))
+        for worker in readers
+    ))
+
+    # Payments: settled on one worker, summarised and dequeued on the others
+    before = [worker.require('/api/payments/summary/today')['total_transactions'] for worker in readers]
+    status, _ = readers[0].call('POST', '/api/payments/', {'order_id': order_id, 'payment_method': 'cash'})
+    report(results, 'payment accepted', status in (200, 201))
+    workers = [writer] + readers[1:]
+    report(results, 'payment in every worker\'s summary', all(
+        wait_for(lambda: worker.data('/api/payments/summary/today')['total_transactions'] > count)
+        for worker, count in zip(readers, before)
+    ))
+    report(results, 'paid order left every kitchen queue', all(
+        wait_for(lambda: all(o['order_id'] != order_id for o in worker.data('/api/orders/queue')['orders']))
+        for worker in workers
+    ))
+
+
+def cleanup(writer, created):
+    """Restore the menu item and table and delete the test order, payment and customer"""
+    if 'menu_item' in created:
+        item = created['menu_item']
+        writer.call('PUT', f"/api/menu/{item['menu_id']}", item)
+    if 'table_number' in created:
+        writer.call('PATCH', f"/api/tables/{created['table_number']}/status", {'status': 'available'})
+    if 'phone' not in created:
+        return
+
+    from models import get_db_connection
+    from utils.cache_sync import publish
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    if 'order_id' in created:
+        cur.execute("DELETE FROM Payments WHERE order_id = %s", (created['order_id'],))
+        cur.execute("DELETE FROM Orders WHERE order_id = %s", (created['order_id'],))
+        publish(cur, 'payments')
+        publish(cur, 'orders')
+    cur.execute("DELETE FROM Customers WHERE phone = %s", (created['phone'],))
+    publish(cur, 'customers')
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    context = multiprocessing.get_context('spawn')
+    workers = [Worker(context) for _ in range(WORKERS)]
+    created = {}
+    try:
+        for worker in workers:
+            worker.pipe.recv()
+        print(f"✅ {WORKERS} workers warm")
+        results = run_checks(workers[0], workers[1:], created)
+    finally:
+        try:
+            cleanup(workers[0], created)
+        finally:
+            for worker in workers:
+                worker.stop()
+
+    if all(results):
+        print(f"✅ All {len(results)} coherence checks passed")
+    else:
+        print(f"❌ {results.count(False)} of {len(results)} coherence checks failed")
+        sys.exit(1)
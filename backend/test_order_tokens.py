@@ -0,0 +1,95 @@
+"""
+Order token check: online orders after an out-of-order offline sync
+
+A POS terminal may sync its queue newest first. Tokens are numbered by
+when the orders were taken, so the newest order_id does not hold the
+highest token; the next online order must still get a free token.
+
+It creates orders and a customer and deletes them again, so run it
+against a development database loaded from database.sql.
+
+Usage (from the backend folder):
+    python test_order_tokens.py
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def report(results, name, ok):
+    results.append(ok)
+    print(f"{'✅' if ok else '❌'} {name}")
+
+
+def run_checks(client, created):
+    """Run every check; created collects what cleanup() has to undo"""
+    results = []
+    menu_id = client.get('/api/menu').get_json()['data'][0]['menu_id']
+    phone = created['phone'] = f"6{os.getpid() % 10**9:09d}"
+    customer = {'name': 'Token check', 'phone': phone}
+    now = datetime.now()
+
+    # Newest first: the later order_id gets the lower token
+    offline = [{
+        'client_uuid': str(uuid.uuid4()),
+        'created_at': (now - timedelta(minutes=minutes)).isoformat(timespec='seconds'),
+        'order_type': 'takeaway',
+        'customer': customer,
+        'items': [{'menu_id': menu_id, 'quantity': 1}]
+    } for minutes in (1, 2)]
+    response = client.post('/api/orders/sync', json={'orders': offline})
+    synced = response.get_json()['data']['orders'] if response.status_code == 200 else []
+    created['order_ids'] = [order['order_id'] for order in synced if order.get('order_id')]
+    report(results, 'out-of-order sync accepted', len(created['order_ids']) == 2)
+
+    tokens = set()
+    for _ in range(3):
+        response = client.post('/api/orders', json={
+            'customer': customer,
+            'order_type': 'takeaway',
+            'items': [{'menu_id': menu_id, 'quantity': 1}]
+        })
+        if response.status_code == 201:
+            created['order_ids'].append(response.get_json()['data']['order_id'])
+            tokens.add(response.get_json()['data']['order_token'])
+    report(results, 'online orders after the sync created', len(tokens) == 3)
+    report(results, 'online tokens differ from the synced ones',
+           not tokens & {order['order_token'] for order in synced})
+    return results
+
+
+def cleanup(created):
+    """Delete the test orders and customer"""
+    from models import get_db_connection
+    from utils.cache_sync import publish
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    if created.get('order_ids'):
+        cur.execute("DELETE FROM Orders WHERE order_id = ANY(%s)", (created['order_ids'],))
+        publish(cur, 'orders')
+    if 'phone' in created:
+        cur.execute("DELETE FROM Customers WHERE phone = %s", (created['phone'],))
+        publish(cur, 'customers')
+    conn.commit()
+    cur.close()
+    conn.close()
+
+
+if __name__ == '__main__':
+    from app import app
+
+    created = {}
+    try:
+        results = run_checks(app.test_client(), created)
+    finally:
+        cleanup(created)
+
+    if all(results):
+        print(f"✅ All {len(results)} token checks passed")
+    else:
+        print(f"❌ {results.count(False)} of {len(results)} token checks failed")
+        sys.exit(1)
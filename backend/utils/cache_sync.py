@@ -0,0 +1,203 @@
+import json
+import os
+import select
+import socket
+import threading
+import time
+import traceback
+from flask import g, has_request_context
+from config import Config
+from models import dedicated_connection
+from utils.shared_cache import shared_cache, NAMESPACES
+
+CHANNEL = 'cache_invalidation'
+
+# namespace -> functions(keys) that refresh this process's in-memory copies;
+# keys is the set of changed ids, or None when anything may have changed
+HANDLERS = {name: [] for name in NAMESPACES}
+
+
+def on_invalidate(*namespaces):
+    """Register a refresher for changes other processes publish"""
+    def decorator(func):
+        for name in namespaces:
+            HANDLERS[name].append(func)
+        return func
+    return decorator
+
+
+def origin():
+    """Identifies this process, so it can skip changes it already applied"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def publish(cur, namespace, key=None):
+    """
+    Announce a change to every worker inside the caller's transaction
+
+    NOTIFY is delivered only if the transaction commits. The writer
+    updates its own in-memory copies inline as before; this tells the
+    other workers to refresh theirs and, once the request finishes, drops
+    this host's shared-cache entries for the namespace.
+    """
+    payload = {'ns': namespace, 'origin': origin()}
+    if key is not None:
+        payload['key'] = key
+    cur.execute("SELECT pg_notify(%s, %s)", (CHANNEL, json.dumps(payload)))
+    if has_request_context():
+        g.setdefault('cache_changes', set()).add(namespace)
+
+
+class CacheListener:
+    """
+    Thread holding a LISTEN connection that applies other workers' changes
+
+    Notifications arriving within `debounce` seconds of each other are
+    applied together: one shared-cache bump and one refresher call per
+    namespace, with the union of changed keys. After the connection is
+    lost and re-established everything is refreshed, since notifications
+    sent in between were missed.
+    """
+
+    def __init__(self, debounce=0.05, reconnect_seconds=2.0):
+        self.debounce = debounce
+        self.reconnect_seconds = reconnect_seconds
+        self._stop = threading.Event()
+        self._thread = None
+        self.received = 0
+        self.applied = 0
+        self.reconnects = 0
+        self.last_applied_at = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='cache-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _connect(self):
+        conn = dedicated_connection()
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute(f"LISTEN {CHANNEL}")
+        cur.close()
+        return conn
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                if connected_before:
+                    self.reconnects += 1
+                    self.apply(NAMESPACES, dict.fromkeys(NAMESPACES))
+                connected_before = True
+                self._listen(conn)
+            except Exception as e:
+                print(f"Cache listener error: {e}")
+                self._stop.wait(self.reconnect_seconds)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _listen(self, conn):
+        while not self._stop.is_set():
+            if select.select([conn], [], [], 1.0)[0] == []:
+                continue
+            conn.poll()
+            if not conn.notifies:
+                continue
+            # Let the rest of a burst (e.g. one order's several namespaces) arrive
+            time.sleep(self.debounce)
+            conn.poll()
+            notifies, conn.notifies[:] = list(conn.notifies), []
+            self.received += len(notifies)
+            self.apply(*self._changes(notifies))
+
+    @staticmethod
+    def _changes(notifies):
+        """
+        Namespaces to bump, and {namespace: keys or None} to refresh
+
+        Our own writes may have been shared before their commit was visible
+        (batch transactions), so they are bumped too, but only other
+        processes' changes are refreshed: ours were applied inline.
+        """
+        bumped = set()
+        remote = {}
+        me = origin()
+        for notify in notifies:
+            try:
+                payload = json.loads(notify.payload)
+            except ValueError:
+                continue
+            name = payload.get('ns')
+            if name not in HANDLERS:
+                continue
+            bumped.add(name)
+            if payload.get('origin') == me:
+                continue
+            if 'key' not in payload:
+                remote[name] = None
+            elif remote.get(name, set()) is not None:
+                remote.setdefault(name, set()).add(payload['key'])
+        return bumped, remote
+
+    def apply(self, bumped, remote):
+        """Bump shared-cache generations and run the refreshers for remote changes"""
+        if not bumped:
+            return
+        shared_cache.bump(bumped)
+        for name, keys in remote.items():
+            for refresh in HANDLERS[name]:
+                try:
+                    refresh(keys)
+                except Exception:
+                    traceback.print_exc()
+        self.applied += 1
+        self.last_applied_at = time.time()
+
+    def stats(self):
+        return {
+            'alive': self.alive(),
+            'received': self.received,
+            'applied': self.applied,
+            'reconnects': self.reconnects,
+            'last_applied_at': self.last_applied_at,
+        }
+
+
+cache_listener = CacheListener(
+    debounce=getattr(Config, 'CACHE_SYNC_DEBOUNCE', 0.05),
+    reconnect_seconds=getattr(Config, 'CACHE_SYNC_RECONNECT_SECONDS', 2.0)
+)
+
+
+def init_cache_sync(app):
+    """
+    Drop this host's shared-cache entries for whatever a request changed
+
+    Runs once the response is built, i.e. after the write committed; the
+    other workers on the host see the bump immediately, and those on
+    other hosts when their listener gets the NOTIFY.
+    """
+    @app.after_request
+    def bump_changed_namespaces(response):
+        changes = g.pop('cache_changes', None)
+        if changes:
+            shared_cache.bump(changes)
+        return response
+
+    if getattr(Config, 'CACHE_SYNC_ENABLED', True):
+        cache_listener.start()
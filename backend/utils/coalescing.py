@@ -0,0 +1,172 @@
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlencode
+from flask import current_app, g, request, Response
+from config import Config
+from models import SharedTransaction
+from utils.shared_cache import shared_cache
+
+# Methods that never change data; any other request invalidates shared results
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'generation', 'finished_at')
+
+    def __init__(self, generation):
+        self.done = threading.Event()
+        self.result = None  # (status, headers, body), or None if it cannot be shared
+        self.generation = generation
+        self.finished_at = None
+
+
+class SingleFlight:
+    """
+    One execution per key for concurrent callers, with an optional micro-TTL
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it runs wait for it and get the same result. With a ttl, a
+    finished result keeps being handed out for that many seconds.
+
+    invalidate() bumps the generation: flights started before it are no
+    longer joined and cached results are dropped, so a read that arrives
+    after a write in this process never gets data from before the write.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> _Flight, running or kept for its ttl
+        self.generation = 0
+        self.leaders = 0
+        self.followers = 0
+
+    def run(self, key, work, ttl=0.0, keep=None):
+        """
+        Return work()'s result, sharing it with concurrent callers of key
+
+        work returns the result to share, or None when its outcome must not
+        be shared; followers of such a flight run work themselves. Only
+        results that pass keep(result), if given, are held for the ttl.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.generation == self.generation:
+                if flight.finished_at is None or time.monotonic() - flight.finished_at < ttl:
+                    self.followers += 1
+                    leader = False
+                else:
+                    flight = None
+            else:
+                flight = None
+            if flight is None:
+                flight = self._flights[key] = _Flight(self.generation)
+                self.leaders += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.result is not None:
+                return flight.result
+            return work()
+
+        try:
+            flight.result = work()
+        finally:
+            with self._lock:
+                flight.finished_at = time.monotonic()
+                cached = ttl > 0 and flight.result is not None and (keep is None or keep(flight.result))
+                if not cached and self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._flights = {}
+
+    def stats(self):
+        with self._lock:
+            return {'leaders': self.leaders, 'followers': self.followers, 'keys': len(self._flights)}
+
+
+single_flight = SingleFlight()
+
+
+def _request_key():
+    """Path plus the query string with its parameters in a canonical order"""
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def _shared_key(key):
+    path, args = key
+    return f'{path}?{urlencode(args)}'
+
+
+def coalesce(ttl=None, shared=()):
+    """
+    Share one execution of a GET route between identical concurrent requests
+
+    Requests for the same path and query parameters that arrive while one
+    is being served wait for it and get a copy of its status, headers and
+    serialized body, so database work scales with distinct queries rather
+    than with the number of screens polling. ttl (seconds, default
+    COALESCE_TTL) also serves a finished response to requests arriving
+    shortly after; only 200 responses are kept for it. Streamed responses
+    are never shared, and sub-requests of a transactional batch always
+    run on their own.
+
+    shared names the data namespaces (utils/shared_cache.NAMESPACES) the
+    response depends on. The leader then looks in the host-wide shared
+    cache before running the view and stores 200 responses there, so the
+    other workers on the host reuse it until a write publishes a change
+    to one of those namespaces. Responses built from replica reads are not
+    stored: the replica may not have replayed the write whose notification
+    produced the current stamp, and its stale rows would outlive the lag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or SharedTransaction.current() is not None:
+                return view(*args, **kwargs)
+
+            key = _request_key()
+            own = []  # set when this request ran the view itself
+
+            def work():
+                if shared:
+                    cached = shared_cache.get(_shared_key(key), shared)
+                    if cached is not None:
+                        content_type, _, body = cached.partition(b'\n')
+                        return 200, [('Content-Type', content_type.decode())], body
+                    stamp = shared_cache.stamp(shared)
+                response = current_app.make_response(view(*args, **kwargs))
+                own.append(response)
+                if response.is_streamed:
+                    return None
+                body = response.get_data()
+                if shared and response.status_code == 200 and not g.get('db_used_replica'):
+                    shared_cache.put(_shared_key(key), shared, stamp, response.content_type.encode() + b'\n' + body)
+                return response.status_code, list(response.headers.items()), body
+
+            result = single_flight.run(
+                key, work,
+                ttl=getattr(Config, 'COALESCE_TTL', 0.0) if ttl is None else ttl,
+                keep=lambda result: result[0] == 200
+            )
+            if own:
+                return own[0]
+            status, headers, body = result
+            return Response(body, status=status, headers=headers)
+        return wrapper
+    return decorator
+
+
+def init_coalescing(app):
+    """Register the hook that drops shared GET results whenever data may have changed"""
+    @app.after_request
+    def invalidate_after_write(response):
+        if request.method not in SAFE_METHODS:
+            single_flight.invalidate()
+        return response
@@ -0,0 +1,112 @@
+import gzip
+import zlib
+from flask import request
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Settings can be overridden in config.py; the values below are the defaults
+DEFAULTS = {
+    'COMPRESS_MIN_SIZE': 1024,
+    'COMPRESS_GZIP_LEVEL': 6,
+    'COMPRESS_BROTLI_QUALITY': 4,
+    'COMPRESS_MIMETYPES': ('application/json', 'text/csv', 'text/plain'),
+}
+
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the best content coding the client accepts
+
+    Args:
+        accept_encodings: werkzeug Accept object (request.accept_encodings)
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    br_q = accept_encodings.quality('br') if brotli is not None else 0
+    gzip_q = accept_encodings.quality('gzip')
+
+    if br_q and br_q >= gzip_q:
+        return 'br'
+    if gzip_q:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding, gzip_level=6, brotli_quality=4):
+    """Compress a complete body with the given content coding"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def compress_stream(chunks, encoding, gzip_level=6, brotli_quality=4):
+    """
+    Compress a streamed body chunk by chunk
+
+    Every chunk is flushed so a slow producer (e.g. an export) still
+    reaches the client incrementally instead of sitting in the compressor.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=brotli_quality)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield compressor.flush()
+
+
+def init_compression(app):
+    """Register the after_request hook that compresses eligible responses"""
+    for key, default in DEFAULTS.items():
+        app.config.setdefault(key, getattr(Config, key, default))
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if response.mimetype not in app.config['COMPRESS_MIMETYPES']:
+            return response
+        if 'Content-Encoding' in response.headers:
+            return response
+        if 'no-transform' in response.headers.get('Cache-Control', ''):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        gzip_level = app.config['COMPRESS_GZIP_LEVEL']
+        brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+
+        if response.is_streamed:
+            response.response = compress_stream(
+                response.response, encoding, gzip_level, brotli_quality
+            )
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            response.set_data(compress_bytes(data, encoding, gzip_level, brotli_quality))
+
+        response.headers['Content-Encoding'] = encoding
+        return response
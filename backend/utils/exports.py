@@ -0,0 +1,241 @@
+import json
+import queue
+import threading
+from psycopg2.extensions import cursor as TupleCursor
+from config import Config
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional, CSV exports always work
+    pyarrow = None
+
+CHUNK_BYTES = getattr(Config, 'EXPORT_CHUNK_BYTES', 256 * 1024)
+QUEUE_CHUNKS = getattr(Config, 'EXPORT_QUEUE_CHUNKS', 8)
+BATCH_ROWS = getattr(Config, 'EXPORT_BATCH_ROWS', 50000)
+
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _ChunkWriter:
+    """File-like sink for copy_expert that hands fixed-size chunks to a queue"""
+
+    def __init__(self, chunks, cancelled, chunk_size):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self.put(bytes(self._buffer))
+            self._buffer.clear()
+
+    def put(self, item):
+        # Blocks while the client is slower than Postgres, which in turn
+        # stops copy_expert from reading more rows off the socket.
+        while True:
+            if self._cancelled.is_set():
+                raise _Cancelled()
+            try:
+                self._chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+class CopyStream:
+    """
+    Response body fed by COPY (...) TO STDOUT
+
+    A pump thread runs copy_expert into a bounded queue, so memory stays
+    at a few chunks however large the export is, and a slow client pauses
+    Postgres instead of piling up rows. Register close() with
+    response.call_on_close() so an abandoned download stops the COPY and
+    the connection goes back to the pool.
+    """
+
+    def __init__(self, conn, copy_sql, chunk_size=CHUNK_BYTES, max_chunks=QUEUE_CHUNKS):
+        self._conn = conn
+        self._sql = copy_sql
+        self._chunks = queue.Queue(max_chunks)
+        self._cancelled = threading.Event()
+        self._writer = _ChunkWriter(self._chunks, self._cancelled, chunk_size)
+        self._thread = None
+        self._error = None
+
+    def _pump(self):
+        cur = self._conn.cursor()
+        try:
+            cur.copy_expert(self._sql, self._writer)
+            self._writer.flush()
+        except _Cancelled:
+            return
+        except Exception as e:
+            self._error = e
+        finally:
+            cur.close()
+        try:
+            self._writer.put(_DONE)
+        except _Cancelled:
+            pass
+
+    def __iter__(self):
+        self._thread = threading.Thread(target=self._pump, name='export-copy', daemon=True)
+        self._thread.start()
+        while True:
+            chunk = self._chunks.get()
+            if chunk is _DONE:
+                break
+            yield chunk
+        if self._error is not None:
+            # Headers are already sent; failing here truncates the download
+            raise self._error
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._cancelled.set()
+        if self._thread is not None and self._thread.is_alive():
+            conn.cancel()
+            self._thread.join()
+        _release(conn)
+
+
+class ColumnarStream:
+    """
+    Response body with Parquet or Arrow IPC bytes, written batch by batch
+
+    Rows come from a server-side cursor BATCH_ROWS at a time; each batch
+    becomes one record batch (one Parquet row group) and its bytes are
+    sent before the next batch is fetched.
+    """
+
+    def __init__(self, conn, query, fmt, batch_rows=BATCH_ROWS):
+        self._conn = conn
+        self._query = query
+        self._fmt = fmt
+        self._batch_rows = batch_rows
+
+    def __iter__(self):
+        cur = self._conn.cursor(name='export', cursor_factory=TupleCursor)
+        cur.itersize = self._batch_rows
+        cur.execute(self._query)
+        sink = _Spool()
+        writer = None
+        try:
+            while True:
+                rows = cur.fetchmany(self._batch_rows)
+                if writer is None:
+                    schema = arrow_schema(cur.description)
+                    if self._fmt == 'parquet':
+                        writer = pyarrow.parquet.ParquetWriter(sink, schema)
+                    else:
+                        writer = pyarrow.ipc.new_stream(sink, schema)
+                if not rows:
+                    break
+                writer.write_batch(record_batch(rows, schema))
+                yield sink.drain()
+            writer.close()
+            yield sink.drain()
+        finally:
+            cur.close()
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        _release(conn)
+
+
+class _Spool:
+    """Write-only file object whose contents are handed out and forgotten"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def _release(conn):
+    """Return an export connection to the pool, whatever state it was left in"""
+    try:
+        conn.rollback()
+    except Exception:
+        # Still mid-COPY after a cancel; don't hand it to the next request
+        conn._conn.close()
+    conn.close()
+
+
+def copy_sql(cur, query, params):
+    """COPY (query) TO STDOUT as CSV with a header row; COPY takes no bind parameters"""
+    return f"COPY ({cur.mogrify(query, params).decode()}) TO STDOUT WITH (FORMAT csv, HEADER)"
+
+
+# Postgres type OID -> Arrow type; anything else is exported as text
+def _arrow_type(column):
+    types = {
+        16: pyarrow.bool_(),
+        20: pyarrow.int64(),
+        21: pyarrow.int16(),
+        23: pyarrow.int32(),
+        700: pyarrow.float32(),
+        701: pyarrow.float64(),
+        1082: pyarrow.date32(),
+        1114: pyarrow.timestamp('us'),
+        1184: pyarrow.timestamp('us', tz='UTC'),
+    }
+    if column.type_code == 1700:
+        if column.precision and column.scale is not None and column.precision <= 38:
+            return pyarrow.decimal128(column.precision, column.scale)
+        return pyarrow.float64()
+    return types.get(column.type_code, pyarrow.string())
+
+
+def arrow_schema(description):
+    return pyarrow.schema([(column.name, _arrow_type(column)) for column in description])
+
+
+def record_batch(rows, schema):
+    columns = []
+    for i, field in enumerate(schema):
+        values = [row[i] for row in rows]
+        if field.type == pyarrow.string():
+            values = [v if v is None or isinstance(v, str) else
+                      json.dumps(v) if isinstance(v, (dict, list)) else str(v) for v in values]
+        elif field.type == pyarrow.float64():
+            values = [None if v is None else float(v) for v in values]
+        columns.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(columns, schema=schema)
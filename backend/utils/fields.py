@@ -0,0 +1,111 @@
+# resource -> {field a client may ask for: SQL expression producing it}
+FIELDSETS = {
+    'menu': {
+        'menu_id': 'menu_id',
+        'item_name': 'item_name',
+        'description': 'description',
+        'category': 'category',
+        'cuisine': 'cuisine',
+        'price': 'price',
+        'is_available': 'is_available',
+        'preparation_time': 'preparation_time',
+        'image_url': 'image_url',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    },
+    'customer': {
+        'customer_id': 'customer_id',
+        'name': 'name',
+        'phone': 'phone',
+        'email': 'email',
+        'customer_type': 'customer_type',
+        'total_orders': 'total_orders',
+        'total_spent': 'total_spent',
+        'created_at': 'created_at',
+    },
+    'order': {
+        'order_id': 'o.order_id',
+        'order_token': 'o.order_token',
+        'customer_id': 'o.customer_id',
+        'order_type': 'o.order_type',
+        'table_number': 'o.table_number',
+        'order_status': 'o.order_status',
+        'special_instructions': 'o.special_instructions',
+        'subtotal': 'o.subtotal',
+        'gst_amount': 'o.gst_amount',
+        'service_charge': 'o.service_charge',
+        'total_amount': 'o.total_amount',
+        'order_date': 'o.order_date',
+        'created_at': 'o.created_at',
+        'updated_at': 'o.updated_at',
+        'change_seq': 'o.change_seq',
+        'completed_at': 'o.completed_at',
+        'customer_name': 'c.name',
+        'customer_phone': 'c.phone',
+    },
+}
+
+# Fields that are not columns but switch extra work on or off
+RELATIONS = {
+    'order': {'items'},
+}
+
+
+def requested_fields(resource, raw, relations=True):
+    """
+    Parse a ?fields= value against a resource's whitelist
+
+    Args:
+        resource: key of FIELDSETS (string)
+        raw: comma-separated field names, or None/'' for every field
+        relations: whether the route serves the resource's RELATIONS
+            (False for listings, which never load them)
+
+    Returns:
+        List of field names in request order, or None for "all fields"
+
+    Raises:
+        ValueError naming the fields that are not allowed
+    """
+    if not raw:
+        return None
+    fields = []
+    for name in raw.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    allowed = FIELDSETS[resource].keys()
+    if relations:
+        allowed = allowed | RELATIONS.get(resource, set())
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {resource}: {', '.join(unknown)}. "
+                         f"Allowed: {', '.join(sorted(allowed))}")
+    return fields
+
+
+def select_list(resource, fields, required=()):
+    """
+    SELECT list for the requested fields plus any the route needs itself
+
+    Returns None when fields is None, so the caller keeps its full query.
+    """
+    if fields is None:
+        return None
+    columns = FIELDSETS[resource]
+    names = [name for name in fields if name in columns]
+    names += [name for name in required if name not in names]
+    return ', '.join(
+        columns[name] if columns[name].split('.')[-1] == name else f"{columns[name]} as {name}"
+        for name in names
+    )
+
+
+def trim(rows, fields):
+    """Drop helper columns the client did not ask for (rows may be one dict or a list)"""
+    if fields is None:
+        return rows
+    keep = set(fields)
+    if isinstance(rows, list):
+        return [{k: v for k, v in row.items() if k in keep} for row in rows]
+    return {k: v for k, v in rows.items() if k in keep}
@@ -0,0 +1,125 @@
+import threading
+import time
+from psycopg2 import pool as pg_pool
+from config import Config
+from models import get_pool
+from services.tables import occupancy
+from services.kitchen import kitchen
+from services.menu_search import menu_search
+from services.analytics import analytics
+from services.billing import bill_cache
+from services.customers import customer_resolver
+from utils.work_queue import work_queue
+from utils.coalescing import single_flight
+from utils.shared_cache import shared_cache
+from utils.cache_sync import cache_listener
+from routes.batch_routes import executor_backlog
+
+STARTED_AT = time.time()
+
+
+class DatabaseProbe:
+    """
+    Cached SELECT 1 round trip on an already-pooled primary connection
+
+    Probes arriving within ttl seconds of the last check get its result,
+    and only one thread checks at a time (the others get the previous
+    result), so orchestrator polling costs at most one query per ttl per
+    process. A probe never waits longer than timeout for a free
+    connection: a saturated pool is reported as ok None (unknown, but not
+    a reason to pull a busy worker out of rotation) instead of queued
+    behind. The query itself runs under a statement_timeout of timeout,
+    and new connections give up after DB_CONNECT_TIMEOUT. While a check
+    is in progress the others get the previous result, but once that is
+    older than ttl + timeout the check is hanging and they get ok False.
+    """
+
+    def __init__(self, ttl=2.0, timeout=0.5):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._result = None
+
+    def check(self):
+        result = self._result
+        if result is not None and time.monotonic() - result['_at'] < self.ttl:
+            return self._public(result)
+        if result is None:
+            acquired = self._lock.acquire(timeout=self.ttl + self.timeout)
+        else:
+            acquired = self._lock.acquire(blocking=False)
+        if not acquired:
+            if result is None or time.monotonic() - result['_at'] > self.ttl + self.timeout:
+                at = result['_at'] if result else time.monotonic()
+                return self._public({'ok': False, 'error': 'Database check is not responding', '_at': at})
+            return self._public(result)
+        try:
+            self._result = self._probe()
+            return self._public(self._result)
+        finally:
+            self._lock.release()
+
+    def _probe(self):
+        started = time.perf_counter()
+        try:
+            conn = get_pool('primary').getconn(timeout=self.timeout)
+        except pg_pool.PoolError as e:
+            return {'ok': None, 'saturated': True, 'error': str(e), '_at': time.monotonic()}
+        except Exception as e:
+            return {'ok': False, 'error': str(e), '_at': time.monotonic()}
+        try:
+            cur = conn.cursor()
+            cur.execute("SET LOCAL statement_timeout = %s; SELECT 1", (int(self.timeout * 1000),))
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return {
+                'ok': True,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                '_at': time.monotonic()
+            }
+        except Exception as e:
+            return {'ok': False, 'error': str(e), '_at': time.monotonic()}
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _public(result):
+        public = {k: v for k, v in result.items() if k != '_at'}
+        public['age_seconds'] = round(time.monotonic() - result['_at'], 2)
+        return public
+
+
+def cache_state():
+    """Whether each in-memory mirror is loaded, and cache hit counters"""
+    return {
+        'tables_loaded': occupancy.loaded,
+        'kitchen_loaded': kitchen.loaded,
+        'menu_search_loaded': menu_search.loaded,
+        'analytics_refreshed_at': analytics.refreshed_at,
+        'bill_cache': {'hits': bill_cache.hits, 'misses': bill_cache.misses},
+        'customer_resolver': {'hits': customer_resolver.hits, 'misses': customer_resolver.misses},
+        'coalescing': single_flight.stats(),
+        'shared_cache': shared_cache.stats(),
+        'cache_listener': cache_listener.stats(),
+    }
+
+
+def backlog(app):
+    """Work waiting on this process's request slots and worker threads"""
+    shedder = app.extensions.get('load_shedder')
+    return {
+        'requests_in_flight': dict(shedder.in_flight) if shedder else {},
+        'batch_executor': executor_backlog(),
+        'outbox_workers': {'workers': work_queue.workers, 'alive': work_queue.workers_alive()},
+    }
+
+
+def uptime():
+    return round(time.time() - STARTED_AT, 1)
+
+
+db_probe = DatabaseProbe(
+    ttl=getattr(Config, 'HEALTH_DB_TTL', 2.0),
+    timeout=getattr(Config, 'HEALTH_DB_TIMEOUT', 0.5)
+)
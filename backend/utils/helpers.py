@@ -1,4 +1,12 @@
-from flask import jsonify
+import traceback
+from flask import jsonify, current_app, Response
+from psycopg2.extensions import cursor as TupleCursor
+
+# ?shape= values accepted by listings that answer with rows_response()
+RESULT_SHAPES = ('objects', 'columns')
+
+# Rows fetched and encoded at a time by rows_response()
+OBJECT_CHUNK_ROWS = 1000
 
 def success_response(data=None, message='Success', status_code=200):
     """
@@ -38,3 +46,77 @@ def error_response(message='An error occurred', status_code=400):
         'status': 'error',
         'message': message
     }), status_code
+
+
+def after_commit(description, fn, *args, **kwargs):
+    """
+    Apply an in-memory update for a write that has already committed
+
+    Failures (e.g. a mirror reloading from a saturated pool) are logged
+    and None is returned: the request must still report success, or the
+    client would retry a write that went through.
+    """
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        print(f"⚠️  {description} failed after commit: {e}")
+        traceback.print_exc()
+        return None
+
+
+def compact_cursor(conn):
+    """
+    Cursor that returns plain tuples instead of one dict per row
+
+    Large listings fetch through this and answer with rows_response(), so
+    the column names are held once (cur.description) rather than repeated
+    in every row.
+    """
+    return conn.cursor(cursor_factory=TupleCursor)
+
+
+def rows_response(cur, shape='objects', message='Success', status_code=200):
+    """
+    Success response for the tuple rows of an executed compact_cursor()
+
+    Rows are converted and encoded OBJECT_CHUNK_ROWS at a time. The whole
+    result is still in memory: libpq receives it in full on execute(),
+    and the encoded body is built before it is sent. The saving is on the
+    Python side: at most one chunk of row tuples (and, for 'objects',
+    dicts) exists at a time, instead of a RealDictRow per row for the
+    whole result.
+
+    Args:
+        cur: compact_cursor() after execute()
+        shape: 'objects' for the usual list of objects, byte-for-byte what
+            success_response() would send, or 'columns' for
+            {"columns": [...], "rows": [[...], ...]}
+        message: Success message (string)
+        status_code: HTTP status code (int)
+
+    Returns:
+        Flask Response with the same envelope as success_response()
+    """
+    columns = [column.name for column in cur.description]
+    dumps = current_app.json.dumps
+    compact = {'separators': (',', ':')}
+
+    parts = []
+    while True:
+        rows = cur.fetchmany(OBJECT_CHUNK_ROWS)
+        if not rows:
+            break
+        if shape != 'columns':
+            rows = [dict(zip(columns, row)) for row in rows]
+        parts.append(dumps(rows, **compact)[1:-1].encode())
+
+    # Keys in the order jsonify() sorts them: data, message, status
+    if shape == 'columns':
+        head = '{"data":{"columns":' + dumps(columns, **compact) + ',"rows":['
+        tail = ']},'
+    else:
+        head = '{"data":['
+        tail = '],'
+    envelope = dumps({'message': message, 'status': 'success'}, **compact)
+    body = b''.join([head.encode(), b','.join(parts), (tail + envelope[1:] + '\n').encode()])
+    return Response(body, status=status_code, mimetype='application/json')
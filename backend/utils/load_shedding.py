@@ -0,0 +1,144 @@
+import threading
+from flask import g, jsonify, request
+from config import Config
+
+# Per route class, per process:
+#   limit        requests allowed in flight at once
+#   wait_ms      how long a request may queue for a slot before it is shed
+#   timeout_ms   statement_timeout for its connections (0 = none)
+#   retry_after  seconds suggested to shed clients
+#
+# These limits only bound how many requests of a class queue for the
+# pool. The pool is shared with outbox workers, warm-up, probes and batch
+# threads, so order taking is protected by the primary pool instead: it
+# holds DB_POOL_RESERVED (default 3) connections back for 'orders'
+# requests only. The dashboard loads three reports at once, so 'reports'
+# admits three and lets a fourth wait briefly rather than shedding it.
+DEFAULT_CLASSES = {
+    'orders': {'limit': 10, 'wait_ms': 2000, 'timeout_ms': 5000, 'retry_after': 1},
+    'listings': {'limit': 4, 'wait_ms': 100, 'timeout_ms': 3000, 'retry_after': 1},
+    'reports': {'limit': 3, 'wait_ms': 500, 'timeout_ms': 15000, 'retry_after': 5},
+    'exports': {'limit': 1, 'wait_ms': 0, 'timeout_ms': 0, 'retry_after': 30},
+}
+
+# Blueprint -> class for routes without @route_class; None means never shed.
+# Other blueprints use 'listings' for GET and 'orders' for writes.
+BLUEPRINT_CLASSES = {
+    'report': 'reports',
+    'export': 'exports',
+    'table': 'orders',
+    'system': None,
+    'batch': None,  # each sub-request is admitted on its own
+}
+
+
+def route_class(name):
+    """
+    Put a route in a load class other than the one its blueprint implies
+
+    None exempts the route from shedding, for cheap reads served from memory.
+    """
+    def decorator(view):
+        view.route_class = name
+        return view
+    return decorator
+
+
+class LoadShedder:
+    """Counting semaphores per route class that reject instead of piling up"""
+
+    def __init__(self, classes):
+        self.classes = classes
+        self._slots = {name: threading.BoundedSemaphore(c['limit']) for name, c in classes.items()}
+        self._lock = threading.Lock()
+        self.in_flight = {name: 0 for name in classes}
+        self.rejected = {name: 0 for name in classes}
+
+    def acquire(self, name):
+        settings = self.classes[name]
+        if not self._slots[name].acquire(timeout=settings['wait_ms'] / 1000):
+            with self._lock:
+                self.rejected[name] += 1
+            return False
+        with self._lock:
+            self.in_flight[name] += 1
+        return True
+
+    def release(self, name):
+        with self._lock:
+            self.in_flight[name] -= 1
+        self._slots[name].release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: dict(settings, in_flight=self.in_flight[name], rejected=self.rejected[name])
+                for name, settings in self.classes.items()
+            }
+
+
+def _load_class(app):
+    view = app.view_functions.get(request.endpoint)
+    if view is None:
+        return None
+    if hasattr(view, 'route_class'):
+        return view.route_class
+    if request.blueprint in BLUEPRINT_CLASSES:
+        return BLUEPRINT_CLASSES[request.blueprint]
+    if request.blueprint is None:
+        return None
+    return 'listings' if request.method in ('GET', 'HEAD') else 'orders'
+
+
+def init_load_shedding(app):
+    """
+    Register the hooks that admit, time-limit and shed requests by class
+
+    A request that cannot get a slot within its class's wait_ms gets an
+    immediate 503 with Retry-After. Admitted requests carry their class's
+    statement_timeout, which get_db_connection() sets on the connection.
+    Streamed responses keep their slot until the body has been sent.
+    """
+    classes = {}
+    for name, defaults in DEFAULT_CLASSES.items():
+        classes[name] = dict(defaults, **getattr(Config, 'LOAD_CLASSES', {}).get(name, {}))
+    shedder = LoadShedder(classes)
+    app.extensions['load_shedder'] = shedder
+
+    @app.before_request
+    def admit_request():
+        if request.method == 'OPTIONS':
+            return None
+        name = _load_class(app)
+        if name is None:
+            return None
+        if not shedder.acquire(name):
+            response = jsonify({
+                'status': 'error',
+                'message': f"Server busy ({name}), please retry"
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(classes[name]['retry_after'])
+            return response
+        g.load_class = name
+        g.db_statement_timeout = classes[name]['timeout_ms']
+        return None
+
+    @app.after_request
+    def hold_slot_while_streaming(response):
+        name = g.pop('load_class', None)
+        if name is not None:
+            if response.is_streamed:
+                response.call_on_close(lambda: shedder.release(name))
+            else:
+                shedder.release(name)
+        return response
+
+    @app.teardown_request
+    def release_slot(error=None):
+        # Only reached with a slot still held if after_request never ran
+        name = g.pop('load_class', None)
+        if name is not None:
+            shedder.release(name)
+
+    return shedder
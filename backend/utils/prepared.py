@@ -0,0 +1,136 @@
+import re
+from psycopg2 import errors, extensions
+
+# name -> SQL written with psycopg2 %s placeholders
+STATEMENTS = {}
+
+_PLACEHOLDER = re.compile(r'%s')
+
+
+def register(name, sql):
+    """
+    Register a named statement to be PREPAREd on each pooled connection
+
+    Args:
+        name: Statement name used with PREPARE/EXECUTE (string)
+        sql: Query text with %s placeholders (string)
+    """
+    STATEMENTS[name] = sql.strip()
+
+
+def _prepare_sql(name, sql):
+    counter = iter(range(1, sql.count('%s') + 1))
+    body = _PLACEHOLDER.sub(lambda _: f'${next(counter)}', sql)
+    return f'PREPARE {name} AS {body}'
+
+
+def execute_prepared(cur, name, params=()):
+    """
+    Run a registered statement with EXECUTE, preparing it on first use
+
+    Each connection tracks the names it has prepared, so a reconnect
+    (which yields a fresh connection object) simply prepares again.
+    Connections without that tracking fall back to a plain execute.
+    """
+    sql = STATEMENTS[name]
+    conn = cur.connection
+    prepared = getattr(conn, 'prepared', None)
+
+    if prepared is None:
+        cur.execute(sql, params)
+        return
+
+    placeholders = ', '.join(['%s'] * len(params))
+    execute_sql = f'EXECUTE {name} ({placeholders})' if params else f'EXECUTE {name}'
+    fresh_transaction = conn.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+    if name not in prepared:
+        cur.execute(_prepare_sql(name, sql))
+        prepared.add(name)
+
+    try:
+        cur.execute(execute_sql, params)
+    except errors.InvalidSqlStatementName:
+        # The server lost its prepared statements (e.g. DISCARD ALL) while
+        # this connection object survived. Only retry when nothing else in
+        # the aborted transaction would be lost.
+        prepared.clear()
+        if not fresh_transaction:
+            raise
+        conn.rollback()
+        cur.execute(_prepare_sql(name, sql))
+        prepared.add(name)
+        cur.execute(execute_sql, params)
+
+
+def prepare_all(conn):
+    """PREPARE every registered statement on a connection ahead of its first use"""
+    prepared = getattr(conn, 'prepared', None)
+    if prepared is None:
+        return
+    cur = conn.cursor()
+    for name, sql in STATEMENTS.items():
+        if name not in prepared:
+            cur.execute(_prepare_sql(name, sql))
+            prepared.add(name)
+    conn.commit()
+    cur.close()
+
+
+# ==========================================
+# HOT STATEMENTS
+# ==========================================
+register('menu_price', """
+    SELECT price, item_name, category, preparation_time FROM Menu WHERE menu_id = %s
+""")
+
+register('customer_upsert', """
+    INSERT INTO Customers (name, phone, email) VALUES (%s, %s, %s)
+    ON CONFLICT (phone) DO UPDATE SET email = COALESCE(Customers.email, EXCLUDED.email)
+    RETURNING customer_id
+""")
+
+register('customer_by_phone', """
+    SELECT * FROM Customers WHERE phone = %s
+""")
+
+register('active_orders', """
+    SELECT o.*, c.name as customer_name, c.phone as customer_phone
+    FROM Orders o
+    LEFT JOIN Customers c ON o.customer_id = c.customer_id
+    WHERE o.order_status IN ('pending', 'preparing', 'ready')
+      AND o.order_date BETWEEN CURRENT_DATE - 1 AND CURRENT_DATE
+    ORDER BY o.created_at ASC
+""")
+
+register('active_order_items', """
+    SELECT oi.*, m.item_name
+    FROM OrderItems oi
+    JOIN Menu m ON oi.menu_id = m.menu_id
+    WHERE oi.order_id = %s AND oi.order_date = %s
+""")
+
+register('order_by_id', """
+    SELECT o.*, c.name as customer_name, c.phone as customer_phone
+    FROM Orders o
+    LEFT JOIN Customers c ON o.customer_id = c.customer_id
+    WHERE o.order_id = %s
+""")
+
+register('order_items_by_order', """
+    SELECT oi.*, m.item_name, m.price as current_price
+    FROM OrderItems oi
+    JOIN Menu m ON oi.menu_id = m.menu_id
+    WHERE oi.order_id = %s AND oi.order_date = %s
+""")
+
+register('payment_by_order', """
+    SELECT p.*, o.order_token
+    FROM Payments p
+    JOIN Orders o ON p.order_id = o.order_id AND p.order_date = o.order_date
+    WHERE p.order_id = %s
+""")
+
+register('payment_id_by_order', """
+    SELECT payment_id FROM Payments WHERE order_id = %s
+""")
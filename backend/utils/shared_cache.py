@@ -0,0 +1,216 @@
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking (Windows): the cache stays disabled
+    fcntl = None
+
+# Everything a cached entry can depend on; write paths publish changes per namespace
+NAMESPACES = ('menu', 'tables', 'orders', 'payments', 'customers')
+
+MAGIC = b'RMSCACHE'
+LAYOUT = 1
+_HEADER = struct.Struct('<8sIII')  # magic, layout, slots, slot_bytes
+_GENERATION = struct.Struct('<Q')
+_GENERATIONS_AT = 64
+_SLOTS_AT = 4096
+# seq (odd while being written), key hash, namespace mask, stamp, stored_at, key length, value length
+_SLOT = struct.Struct('<QQIQdHI')
+
+
+def _key_hash(key):
+    # hash() is salted per process, so workers would disagree on slots
+    return struct.unpack('<Q', hashlib.blake2b(key, digest_size=8).digest())[0] or 1
+
+
+def _mask(namespaces):
+    mask = 0
+    for name in namespaces:
+        mask |= 1 << NAMESPACES.index(name)
+    return mask
+
+
+def default_path(slots, slot_bytes):
+    # The layout is part of the name, so workers started with other settings
+    # (e.g. during a rolling restart) get their own segment
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, f"restaurant-cache-{Config.DB_NAME}-v{LAYOUT}-{slots}x{slot_bytes}")
+
+
+class SharedCache:
+    """
+    Byte cache in a memory-mapped file shared by every worker on the host
+
+    The file holds one generation counter per namespace and a fixed table
+    of direct-mapped slots (a new key evicts whatever hashed to its slot).
+    An entry is stamped with the sum of its namespaces' generations when
+    its value was computed and is served only while that sum is unchanged
+    and it is younger than max_age, so bump() invalidates every entry of a
+    namespace in every worker at once.
+
+    Writers serialise on flock (plus a thread lock, as flock does not
+    exclude threads sharing the file). Readers take no lock: each slot has
+    a sequence number that is odd while the slot is being written, and a
+    read that sees it change is retried.
+    """
+
+    def __init__(self, path=None, slots=256, slot_bytes=64 * 1024, max_age=60.0):
+        self.path = path or default_path(slots, slot_bytes)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.max_age = max_age
+        self.enabled = fcntl is not None
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.oversized = 0
+
+    def _segment(self):
+        """The mapped segment (created on first use), or None if the cache is off"""
+        if self._map is not None or not self.enabled:
+            return self._map
+        with self._lock:
+            if self._map is not None or not self.enabled:
+                return self._map
+            try:
+                self._map = self._open()
+            except Exception as e:
+                print(f"⚠️  Shared cache disabled: {e}")
+                self.enabled = False
+            return self._map
+
+    def _open(self):
+        """Open or create the backing file and map it"""
+        size = _SLOTS_AT + self.slots * self.slot_bytes
+        expected = _HEADER.pack(MAGIC, LAYOUT, self.slots, self.slot_bytes)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                os.pwrite(fd, expected, 0)
+            elif os.fstat(fd).st_size != size or os.pread(fd, _HEADER.size, 0) != expected:
+                # Resizing a file other workers have mapped would crash them
+                raise RuntimeError(f"{self.path} has a different layout; remove it or set SHARED_CACHE_PATH")
+        except Exception:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            raise
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        return mmap.mmap(fd, size)
+
+    @contextmanager
+    def _writing(self):
+        """Exclusive access for writers: this process's threads, then other processes"""
+        segment = self._segment()
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield segment
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def generations(self):
+        """{namespace: generation} as currently published on this host"""
+        segment = self._segment()
+        if segment is None:
+            return dict.fromkeys(NAMESPACES, 0)
+        return {
+            name: _GENERATION.unpack_from(segment, _GENERATIONS_AT + i * _GENERATION.size)[0]
+            for i, name in enumerate(NAMESPACES)
+        }
+
+    def stamp(self, namespaces):
+        """Take before computing a value, and pass to put() with it"""
+        generations = self.generations()
+        return sum(generations[name] for name in namespaces)
+
+    def bump(self, namespaces):
+        """Invalidate every entry that depends on any of the namespaces"""
+        if self._segment() is None:
+            return
+        with self._writing() as segment:
+            for name in set(namespaces):
+                offset = _GENERATIONS_AT + NAMESPACES.index(name) * _GENERATION.size
+                _GENERATION.pack_into(segment, offset, _GENERATION.unpack_from(segment, offset)[0] + 1)
+
+    def get(self, key, namespaces):
+        """The value stored under key if still current, else None"""
+        segment = self._segment()
+        if segment is None:
+            return None
+        key = key.encode('utf-8')
+        key_hash = _key_hash(key)
+        offset = _SLOTS_AT + key_hash % self.slots * self.slot_bytes
+        stamp = self.stamp(namespaces)
+        mask = _mask(namespaces)
+
+        for _ in range(3):
+            seq, slot_hash, slot_mask, slot_stamp, stored_at, key_len, value_len = _SLOT.unpack_from(segment, offset)
+            if seq % 2:
+                continue
+            if slot_hash != key_hash or slot_mask != mask or slot_stamp != stamp:
+                break
+            start = offset + _SLOT.size
+            slot_key = segment[start:start + key_len]
+            value = segment[start + key_len:start + key_len + value_len]
+            if _SLOT.unpack_from(segment, offset)[0] != seq:
+                continue  # overwritten while we copied it
+            if slot_key != key or time.time() - stored_at > self.max_age:
+                break
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, namespaces, stamp, value):
+        """Store value, computed when the namespaces' stamp() was `stamp`"""
+        if self._segment() is None:
+            return False
+        key = key.encode('utf-8')
+        if _SLOT.size + len(key) + len(value) > self.slot_bytes:
+            self.oversized += 1
+            return False
+        key_hash = _key_hash(key)
+        offset = _SLOTS_AT + key_hash % self.slots * self.slot_bytes
+        with self._writing() as segment:
+            seq = _SLOT.unpack_from(segment, offset)[0]
+            _SLOT.pack_into(segment, offset, seq + 1, 0, 0, 0, 0.0, 0, 0)
+            start = offset + _SLOT.size
+            segment[start:start + len(key)] = key
+            segment[start + len(key):start + len(key) + len(value)] = value
+            _SLOT.pack_into(segment, offset, seq + 2, key_hash, _mask(namespaces), stamp,
+                            time.time(), len(key), len(value))
+        self.stores += 1
+        return True
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'path': self.path,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'oversized': self.oversized,
+            'generations': self.generations(),
+        }
+
+
+shared_cache = SharedCache(
+    path=getattr(Config, 'SHARED_CACHE_PATH', None),
+    slots=getattr(Config, 'SHARED_CACHE_SLOTS', 256),
+    slot_bytes=getattr(Config, 'SHARED_CACHE_SLOT_BYTES', 64 * 1024),
+    max_age=getattr(Config, 'SHARED_CACHE_MAX_AGE', 60.0)
+)
@@ -0,0 +1,90 @@
+import os
+import time
+from config import Config
+from models import get_pool, replica_configured
+from utils.prepared import prepare_all
+from services.tables import occupancy
+from services.kitchen import kitchen
+from services.menu_search import menu_search
+from services.trending import trending
+from services.analytics import analytics, np
+
+# Cheap GETs replayed through the app so the first real request finds
+# every import, connection and server-side plan already in place
+DEFAULT_WARMUP_PATHS = ('/api/menu', '/api/tables', '/api/orders/active', '/api/orders/queue')
+
+
+def _warm_pool(role):
+    """Lease every idle connection the pool keeps and PREPARE the hot statements on it"""
+    pool = get_pool(role)
+    leased = []
+    try:
+        for _ in range(pool.minconn):
+            conn = pool.getconn()
+            leased.append(conn)
+            prepare_all(conn)
+    finally:
+        for conn in leased:
+            conn.close()
+    return len(leased)
+
+
+def _replay_requests(app, paths):
+    client = app.test_client()
+    statuses = {}
+    for path in paths:
+        statuses[path] = client.get(path).status_code
+    failed = [path for path, status in statuses.items() if status >= 500]
+    if failed:
+        raise RuntimeError(f"Warm-up requests failed: {', '.join(failed)}")
+    return statuses
+
+
+def warm_up(app):
+    """
+    Get this process ready to serve before it takes traffic
+
+    Opens and prepares pooled connections, loads the in-memory table map,
+    kitchen queue, trending counts and menu search index (and the analytics store if
+    WARMUP_ANALYTICS is set), then replays WARMUP_PATHS. Progress is kept
+    in app.extensions['warmup'], which GET /api/system/ready reports; it
+    turns ready only if every step succeeded.
+
+    Returns:
+        The warm-up state dict
+    """
+    state = {'ready': False, 'pid': None, 'steps': {}, 'seconds': None}
+    app.extensions['warmup'] = state
+    started = time.perf_counter()
+
+    steps = [('primary_pool', lambda: _warm_pool('primary'))]
+    if replica_configured():
+        steps.append(('replica_pool', lambda: _warm_pool('replica')))
+    steps += [
+        ('tables', occupancy.load),
+        ('kitchen', kitchen.load),
+        ('trending', trending.load),
+        ('menu_search', menu_search.load),
+    ]
+    if getattr(Config, 'WARMUP_ANALYTICS', False) and np is not None:
+        steps.append(('analytics', analytics.refresh))
+    paths = getattr(Config, 'WARMUP_PATHS', DEFAULT_WARMUP_PATHS)
+    steps.append(('requests', lambda: _replay_requests(app, paths)))
+
+    ok = True
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            result = step()
+            state['steps'][name] = {'ok': True, 'ms': round((time.perf_counter() - step_started) * 1000, 1)}
+            if result is not None:
+                state['steps'][name]['result'] = result
+        except Exception as e:
+            ok = False
+            state['steps'][name] = {'ok': False, 'error': str(e)}
+            print(f"⚠️  Warm-up step {name} failed: {e}")
+
+    state['pid'] = os.getpid()
+    state['seconds'] = round(time.perf_counter() - started, 3)
+    state['ready'] = ok
+    return state
@@ -0,0 +1,187 @@
+import threading
+import time
+import traceback
+from psycopg2.extras import Json
+from config import Config
+from models import get_db_connection
+
+# kind -> function(cur, payloads) applying a whole batch inside cur's transaction
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register the batch handler for an outbox kind"""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(cur, kind, payload, dedupe_key=None):
+    """
+    Record a side effect in the outbox inside the caller's transaction
+
+    The row only becomes visible to workers if the caller commits, and a
+    repeated dedupe_key is ignored, so effects are never lost or doubled.
+    Call work_queue.notify() after commit to wake a worker immediately.
+    """
+    cur.execute("""
+        INSERT INTO SideEffectOutbox (kind, payload, dedupe_key)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (dedupe_key) DO NOTHING
+    """, (kind, Json(payload), dedupe_key))
+
+
+class WorkQueue:
+    """
+    Bounded pool of worker threads draining SideEffectOutbox
+
+    Workers claim pending rows with FOR UPDATE SKIP LOCKED, hand each kind's
+    rows to its handler as one batch, and mark them done in the same
+    transaction as the effect itself. A failing batch is retried with
+    exponential backoff until max_attempts, then parked as 'failed'.
+    """
+
+    def __init__(self, workers=2, batch_size=100, poll_interval=2.0, max_attempts=5):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.retried = 0
+        self.last_batch_at = None
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'outbox-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        self._wakeup.set()
+
+    def workers_alive(self):
+        return sum(thread.is_alive() for thread in self._threads)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            try:
+                claimed = self.process_batch()
+            except Exception as e:
+                print(f"Outbox worker error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+
+    def process_batch(self):
+        """Claim and apply one batch; returns the number of rows claimed"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        try:
+            cur.execute("""
+                SELECT outbox_id, kind, payload, attempts
+                FROM SideEffectOutbox
+                WHERE status = 'pending' AND available_at <= CURRENT_TIMESTAMP
+                ORDER BY outbox_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (self.batch_size,))
+            rows = cur.fetchall()
+            if not rows:
+                conn.rollback()
+                return 0
+
+            by_kind = {}
+            for row in rows:
+                by_kind.setdefault(row['kind'], []).append(row)
+
+            for kind, kind_rows in by_kind.items():
+                ids = [row['outbox_id'] for row in kind_rows]
+                cur.execute("SAVEPOINT outbox_batch")
+                try:
+                    if kind not in HANDLERS:
+                        raise LookupError(f"No outbox handler registered for '{kind}'")
+                    HANDLERS[kind](cur, [row['payload'] for row in kind_rows])
+                    cur.execute("""
+                        UPDATE SideEffectOutbox
+                        SET status = 'done', attempts = attempts + 1, processed_at = CURRENT_TIMESTAMP
+                        WHERE outbox_id = ANY(%s)
+                    """, (ids,))
+                    cur.execute("RELEASE SAVEPOINT outbox_batch")
+                    self._count('processed', len(ids))
+                except Exception as e:
+                    traceback.print_exc()
+                    cur.execute("ROLLBACK TO SAVEPOINT outbox_batch")
+                    cur.execute("""
+                        UPDATE SideEffectOutbox
+                        SET attempts = attempts + 1,
+                            last_error = %s,
+                            status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'pending' END,
+                            available_at = CURRENT_TIMESTAMP + (2 ^ attempts) * INTERVAL '1 second'
+                        WHERE outbox_id = ANY(%s)
+                    """, (str(e), self.max_attempts, ids))
+                    self._count('retried', len(ids))
+
+            conn.commit()
+            self.last_batch_at = time.time()
+            return len(rows)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+            conn.close()
+
+    def _count(self, counter, n):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + n)
+
+    def stats(self):
+        """Queue depth and lag from the outbox plus this process's counters"""
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'pending') as depth,
+                COUNT(*) FILTER (WHERE status = 'failed') as failed,
+                COALESCE(EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(created_at) FILTER (WHERE status = 'pending')), 0) as lag_seconds
+            FROM SideEffectOutbox
+            WHERE status IN ('pending', 'failed')
+        """)
+        row = cur.fetchone()
+        cur.close()
+        conn.close()
+
+        return {
+            'depth': row['depth'],
+            'failed': row['failed'],
+            'lag_seconds': float(row['lag_seconds']),
+            'workers': self.workers,
+            'workers_alive': self.workers_alive(),
+            'processed': self.processed,
+            'retried': self.retried,
+            'last_batch_at': self.last_batch_at
+        }
+
+
+work_queue = WorkQueue(
+    workers=getattr(Config, 'WORK_QUEUE_WORKERS', 2),
+    batch_size=getattr(Config, 'WORK_QUEUE_BATCH_SIZE', 100),
+    poll_interval=getattr(Config, 'WORK_QUEUE_POLL_SECONDS', 2.0),
+    max_attempts=getattr(Config, 'WORK_QUEUE_MAX_ATTEMPTS', 5)
+)
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
 import { orderAPI } from '../services/api';
 import '../styles/Kitchen.css';
@@ -7,24 +7,37 @@ import '../styles/Global.css';
 
 
 function TakeawayOrders() {
-  const [orders, setOrders] = useState([]);
+  const [ordersById, setOrdersById] = useState({});
   const [filterStatus, setFilterStatus] = useState('all');
   const [loading, setLoading] = useState(true);
+  const cursorRef = useRef(0);
 
   useEffect(() => {
     loadOrders();
     const interval = setInterval(loadOrders, 10000);
     return () => clearInterval(interval);
-  }, [filterStatus]);
+  }, []);
 
+  // Only orders changed since the last cursor are fetched; they are merged
+  // into the board and the status filter is applied client-side.
   const loadOrders = async () => {
     try {
-      const params = { order_type: 'takeaway' };
-      if (filterStatus !== 'all') {
-        params.status = filterStatus;
+      let changed = [];
+      let hasMore = true;
+      while (hasMore) {
+        const res = await orderAPI.getChanges({ since: cursorRef.current, order_type: 'takeaway' });
+        const { orders: batch, cursor, has_more } = res.data.data;
+        changed = changed.concat(batch);
+        cursorRef.current = Math.max(cursorRef.current, cursor);
+        hasMore = has_more;
+      }
+      if (changed.length > 0) {
+        setOrdersById(prev => {
+          const next = { ...prev };
+          changed.forEach(order => { next[order.order_id] = order; });
+          return next;
+        });
       }
-      const res = await orderAPI.getAll(params);
-      setOrders(res.data.data);
       setLoading(false);
     } catch (error) {
       console.error('Error loading orders:', error);
@@ -59,6 +72,10 @@ function TakeawayOrders() {
     return `${minutes} mins ago`;
   };
 
+  const orders = Object.values(ordersById)
+    .filter(order => filterStatus === 'all' || order.order_status === filterStatus)
+    .sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+
   if (loading) return <div className="loading"><div className="spinner"></div>Loading orders...</div>;
 
   return (
@@ -12,6 +12,7 @@ const api = axios.create({
 export const menuAPI = {
   getAll: (params) => api.get('/menu', { params }),
   getById: (id) => api.get(`/menu/${id}`),
+  search: (q, params) => api.get('/menu/search', { params: { q, ...params } }),
   create: (data) => api.post('/menu', data),
   update: (id, data) => api.put(`/menu/${id}`, data),
   toggleAvailability: (id, isAvailable) => api.patch(`/menu/${id}/availability`, { is_available: isAvailable }),
@@ -32,10 +33,13 @@ export const customerAPI = {
 
 export const orderAPI = {
   getAll: (params) => api.get('/orders', { params }),
+  getChanges: (params) => api.get('/orders/changes', { params }),
+  getQueue: () => api.get('/orders/queue'),
   getById: (id) => api.get(`/orders/${id}`),
   getDineIn: (params) => api.get('/orders/dine-in', { params }),
   getTakeaway: (params) => api.get('/orders/takeaway', { params }),
   create: (data) => api.post('/orders', data),
+  sync: (orders) => api.post('/orders/sync', { orders }),
   updateStatus: (id, status) => api.patch(`/orders/${id}/status`, { order_status: status }),
   updateItemStatus: (orderId, itemId, status) => api.patch(`/orders/${orderId}/items/${itemId}/status`, { item_status: status }),
   getActive: () => api.get('/orders/active'),
@@ -50,6 +54,14 @@ export const paymentAPI = {
   getTodaySummary: () => api.get('/payments/summary/today'),
 };
 
+export const tableAPI = {
+  getAll: (params) => api.get('/tables', { params }),
+  getAvailable: (guests) => api.get('/tables/available', { params: { guests } }),
+  getById: (tableNumber) => api.get(`/tables/${tableNumber}`),
+  seat: (tableNumber, guests) => api.patch(`/tables/${tableNumber}/seat`, { guests }),
+  updateStatus: (tableNumber, status) => api.patch(`/tables/${tableNumber}/status`, { status }),
+};
+
 export const reportAPI = {
   getDailySales: (date) => api.get('/reports/daily-sales', { params: { date } }),
   getPopularItems: (params) => api.get('/reports/popular-items', { params }),
@@ -58,6 +70,12 @@ export const reportAPI = {
   getPaymentMethods: (params) => api.get('/reports/payment-methods', { params }),
   getWeeklyComparison: () => api.get('/reports/weekly-comparison'),
   getOrderStatus: () => api.get('/reports/order-status'),
+  query: (params) => api.get('/reports/query', { params }),
+  getTrending: (window, limit) => api.get('/reports/trending', { params: { window, limit } }),
+};
+
+export const batchAPI = {
+  run: (requests, mode = 'parallel') => api.post('/batch', { requests, mode }),
 };
 
 export default api;